@@ -0,0 +1,56 @@
+"""
+Resource sampling benchmark
+===========================
+
+Spawns a number of idle processes, then measures the CPU time needed to
+sample all of them, as a fraction of one core at a given sampling rate.
+
+Usage: python benchmarks/bench_metrics.py [--tasks N] [--rounds N] [--interval S]
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import argparse
+import asyncio
+import time
+
+from igniiite.task import Task
+from igniiite.metrics import ResourceSampler
+
+
+##################################
+
+
+async def main(args):
+    tasks = [
+        Task(name=f"sleep{index}", command=["sleep", "3600"], log_output="none")
+        for index in range(args.tasks)
+    ]
+
+    runners = [asyncio.create_task(task.run()) for task in tasks]
+    while any(task.process is None for task in tasks):
+        await asyncio.sleep(0.05)
+
+    sampler = ResourceSampler(tasks)
+    try:
+        start = time.process_time()
+        for _ in range(args.rounds):
+            await sampler.sample()
+        used = (time.process_time() - start) / args.rounds
+
+        print(f"{args.tasks} tasks: {used * 1000:.2f} ms CPU per round, "
+              f"{used / args.interval * 100:.2f} % of one core at {1 / args.interval:g} Hz")
+
+    finally:
+        for task in tasks:
+            task.process.kill()
+        await asyncio.gather(*runners, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=1.0)
+    asyncio.run(main(parser.parse_args()))
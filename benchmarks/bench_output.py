@@ -0,0 +1,102 @@
+"""
+Output pumping benchmark
+========================
+
+Measures the throughput of a task output through Task, for a synthetic
+high-rate producer, using the different logging modes, listener kinds and
+output sink formats. Sink timings include writing everything to disk.
+
+Usage: python benchmarks/bench_output.py [--lines N] [--line-size N]
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+import tempfile
+
+from igniiite.sink import OutputSink
+from igniiite.task import Task
+
+
+##################################
+
+
+class CountingListener:
+    """Minimal listener counting what it receives"""
+
+    def __init__(self):
+        self.count = 0
+
+    maxsize = 0
+
+    def put_nowait(self, item):
+        self.count += len(item) if isinstance(item, list) else 1
+
+
+async def measure(nlines, line_size, log_output, listener=None, sink=None, directory=None):
+    line = "x" * (line_size - 1)
+    output_sink = None
+    if sink is not None:
+        output_sink = OutputSink(os.path.join(directory, sink), format=sink)
+
+    task = Task(
+        name="bench",
+        command=["sh", "-c", f"yes '{line}' | head -n {nlines}"],
+        log_output=log_output,
+        output_sink=output_sink,
+    )
+
+    if listener is not None:
+        await task.stdout_listeners.register(CountingListener(), raw=(listener == "raw"))
+
+    start = time.perf_counter()
+    await task.run()
+    if output_sink is not None:
+        await asyncio.to_thread(output_sink.close)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mb_per_s": nlines * line_size / elapsed / 1e6,
+        "lines_per_s": nlines / elapsed,
+    }
+
+
+async def main(args):
+    cases = [
+        ("lines", None, None),
+        ("batch", None, None),
+        ("none", None, None),
+        ("none", "text", None),
+        ("none", "raw", None),
+        ("none", None, "text"),
+        ("none", None, "json"),
+    ]
+
+    print(f"{'log_output':<12}{'listener':<10}{'sink':<8}{'MB/s':>10}{'lines/s':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for log_output, listener, sink in cases:
+            result = await measure(
+                args.lines, args.line_size, log_output, listener, sink, directory
+            )
+            print(
+                f"{log_output:<12}{listener or '-':<10}{sink or '-':<8}"
+                f"{result['mb_per_s']:>10.1f}{result['lines_per_s']:>14.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--line-size", type=int, default=80)
+    args = parser.parse_args()
+
+    # Log to /dev/null so that formatting and handler costs are accounted
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+
+    asyncio.run(main(args))
@@ -0,0 +1,96 @@
+"""
+Readiness hooks benchmark
+=========================
+
+Starts a chain of dependent services, each one opening a TCP socket and
+creating a file once started, and measures the time until the last one is
+ready, for each kind of readiness hook.
+
+Usage: python benchmarks/bench_readiness.py [--chain N] [--base-port PORT]
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+from igniiite.task import Task
+from igniiite.graph import Supervisor
+from igniiite.hooks import (
+    wait_for_seconds,
+    wait_for_tcp,
+    wait_for_listen,
+    wait_for_file,
+)
+
+SERVICE = """
+import socket, sys, time
+port, path = int(sys.argv[1]), sys.argv[2]
+sock = socket.socket()
+sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+sock.bind(("127.0.0.1", port))
+sock.listen()
+open(path, "w").close()
+while True:
+    conn, _ = sock.accept()
+    conn.close()
+"""
+
+HOOKS = {
+    "seconds(1)": lambda port, path: wait_for_seconds(1),
+    "tcp": lambda port, path: wait_for_tcp(port),
+    "listen": lambda port, path: wait_for_listen(port=port),
+    "file": lambda port, path: wait_for_file(path),
+}
+
+
+##################################
+
+
+async def measure(kind, args, directory):
+    tasks = []
+    for index in range(args.chain):
+        port = args.base_port + index
+        path = os.path.join(directory, f"{kind}-{index}.ready")
+        tasks.append(
+            Task(
+                name=f"service{index}",
+                command=[sys.executable, "-c", SERVICE, str(port), path],
+                dependencies={tasks[-1]} if tasks else set(),
+                ready_hook=HOOKS[kind](port, path),
+                stop_timeout=1.0,
+                log_output="none",
+            )
+        )
+
+    supervisor = Supervisor(tasks)
+    start = time.perf_counter()
+    runner = asyncio.create_task(supervisor.run())
+    await tasks[-1].ready.wait()
+    elapsed = time.perf_counter() - start
+
+    await supervisor.shutdown()
+    await runner
+
+    return elapsed
+
+
+async def main(args):
+    print(f"{'hook':<12}{'chain ready (s)':>16}{'per task (ms)':>16}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in HOOKS:
+            elapsed = await measure(kind, args, directory)
+            print(f"{kind:<12}{elapsed:>16.3f}{elapsed / args.chain * 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chain", type=int, default=5)
+    parser.add_argument("--base-port", type=int, default=18000)
+    asyncio.run(main(parser.parse_args()))
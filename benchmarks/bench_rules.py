@@ -0,0 +1,67 @@
+"""
+Scheduling rules benchmark
+==========================
+
+Computes chains of next run datetimes for a set of cron expressions.
+
+Usage: python benchmarks/bench_rules.py [--count N]
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import argparse
+import time
+
+from datetime import datetime
+
+from igniiite.rules import CronRule
+
+EXPRESSIONS = (
+    "* * * * *",
+    "*/5 * * * *",
+    "0 3 * * *",
+    "30 6 * * mon-fri",
+    "0 0 1 * *",
+    "0 9 * * mon#1",
+    "0 0 13 * fri",
+    "0 0 29 2 *",
+)
+
+
+##################################
+
+
+def measure(expression, count):
+    rule = CronRule(expression)
+    origin = datetime(2024, 1, 1)
+    then = origin
+
+    start = time.perf_counter()
+    for _ in range(count):
+        then = rule.next_after(then)
+
+        # Stay away from datetime.max with sparse rules
+        if then.year > 9000:
+            then = origin
+    elapsed = time.perf_counter() - start
+
+    return count / elapsed
+
+
+def main(args):
+    print(f"{'expression':<22}{'runs/s':>14}")
+
+    total = 0
+    for expression in EXPRESSIONS:
+        rate = measure(expression, args.count)
+        total += args.count
+        print(f"{expression:<22}{rate:>14.0f}")
+
+    print(f"{total} next run datetimes computed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=250_000)
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+"""
+Process spawn latency benchmark
+===============================
+
+Compares the default launcher with the fork server launcher, for a plain
+command and for a short Python job.
+
+Usage: python benchmarks/bench_spawn.py [--runs N]
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import argparse
+import asyncio
+import tempfile
+import time
+
+from igniiite.task import Task
+from igniiite.launcher import ForkServerLauncher
+
+JOB = """
+import json
+import logging
+print(json.dumps({"done": True}))
+"""
+
+
+##################################
+
+
+async def measure(command, launcher, runs):
+    task = Task(name="bench", command=command, launcher=launcher, log_output="none")
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        await task.run()
+    elapsed = time.perf_counter() - start
+
+    return elapsed / runs * 1e3
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        job = os.path.join(tmp, "job.py")
+        with open(job, "w") as fhandle:
+            fhandle.write(JOB)
+
+        forkserver = ForkServerLauncher(preload=["json", "logging"])
+        await forkserver.start()
+
+        print(f"{'command':<12}{'launcher':<12}{'ms/run':>10}")
+        try:
+            for name, command in (
+                ("true", ["true"]),
+                ("python job", [sys.executable, job]),
+            ):
+                for launcher_name, launcher in (
+                    ("exec", None),
+                    ("forkserver", forkserver),
+                ):
+                    latency = await measure(command, launcher, args.runs)
+                    print(f"{name:<12}{launcher_name:<12}{latency:>10.2f}")
+
+        finally:
+            await forkserver.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,377 @@
+"""
+Benchmark suite
+===============
+
+Reproducible benchmarks of supervising a task stack, runnable offline with
+stub commands only (true, yes, sleep, sh):
+
+- graph: time for synthetic task graphs (wide, deep and diamond shaped) to
+  get ready, then to shut down;
+- output: output throughput through the task stream pumps and listeners;
+- readiness: latency of readiness hooks, from spawn to ready;
+- scheduler: firing accuracy, and scheduler overhead per firing.
+
+Results are written as JSON, and compared against a stored baseline: the
+exit status is 1 when a metric regressed by more than the tolerance.
+
+Usage:
+    python benchmarks/suite.py -o baseline.json
+    python benchmarks/suite.py --baseline baseline.json [--tolerance 0.2]
+    python benchmarks/suite.py --only graph --sizes 10,100,1000,5000
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import re
+import gc
+import sys
+import json
+import time
+import signal
+import asyncio
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+
+from datetime import datetime, timedelta
+
+from igniiite.__about__ import __version__
+from igniiite.task import Task
+from igniiite.graph import Supervisor
+from igniiite.hooks import wait_for_str_re, wait_for_file
+from igniiite.rules import IntervalRule
+from igniiite.scheduler import Scheduler
+
+SHAPES = ("wide", "deep", "diamond")
+
+# Results format version, bumped when metrics change meaning
+FORMAT_VERSION = 1
+
+
+##################################
+
+
+class Results:
+    """Metrics of a suite run: name -> value, unit, and which way is better"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, unit, better="lower"):
+        self.metrics[name] = {"value": value, "unit": unit, "better": better}
+        print(f"{name:<40}{value:>14.3f} {unit}", flush=True)
+
+
+async def median_of(repeat, measure):
+    # Median of repeated measures, each one starting from a collected heap
+    values = []
+    for _ in range(repeat):
+        gc.collect()
+        values.append(await measure())
+    return statistics.median(values)
+
+
+##################################
+
+
+def make_graph(shape, size):
+    """Synthetic graph of long running tasks, ready as soon as launched
+
+    Args:
+        shape: "wide" (independent tasks), "deep" (a chain) or "diamond" (a
+               root, size - 2 tasks depending on it, and a sink depending on all of them)
+        size: number of tasks
+    """
+
+    def task(index, dependencies=()):
+        return Task(
+            name=f"{shape}{index}",
+            command=["sleep", "3600"],
+            dependencies=set(dependencies),
+            log_output="none",
+            stop_signal=signal.SIGTERM,
+            stop_timeout=5.0,
+        )
+
+    if shape == "wide":
+        return [task(index) for index in range(size)]
+
+    if shape == "deep":
+        tasks = [task(0)]
+        for index in range(1, size):
+            tasks.append(task(index, (tasks[-1],)))
+        return tasks
+
+    root = task(0)
+    middle = [task(index, (root,)) for index in range(1, size - 1)]
+    return [root, *middle, task(size - 1, middle or (root,))]
+
+
+async def bench_graph(results, args):
+    for shape in SHAPES:
+        for size in args.sizes:
+
+            async def measure():
+                tasks = make_graph(shape, size)
+                supervisor = Supervisor(tasks)
+
+                start = time.perf_counter()
+                runner = asyncio.create_task(supervisor.run())
+                await asyncio.gather(*(tt.ready.wait() for tt in tasks))
+                ready = time.perf_counter() - start
+
+                start = time.perf_counter()
+                await supervisor.shutdown()
+                await runner
+                return ready, time.perf_counter() - start
+
+            measures = [await measure() for _ in range(args.repeat)]
+            results.add(
+                f"graph.{shape}.{size}.startup",
+                statistics.median(ready for ready, _ in measures) * 1e3,
+                "ms",
+            )
+            results.add(
+                f"graph.{shape}.{size}.shutdown",
+                statistics.median(stop for _, stop in measures) * 1e3,
+                "ms",
+            )
+
+
+##################################
+
+
+class CountingListener:
+    """Minimal listener counting what it receives"""
+
+    maxsize = 0
+
+    def __init__(self):
+        self.count = 0
+
+    def full(self):
+        return False
+
+    def put_nowait(self, item):
+        if item is not None:
+            self.count += len(item) if isinstance(item, list) else 1
+
+
+async def bench_output(results, args):
+    line = "x" * (args.line_size - 1)
+
+    for listener in ("none", "raw", "text"):
+
+        async def measure():
+            task = Task(
+                name="output",
+                command=["sh", "-c", f"yes '{line}' | head -n {args.lines}"],
+                log_output="none",
+            )
+            if listener != "none":
+                await task.stdout_listeners.register(CountingListener(), raw=(listener == "raw"))
+
+            start = time.perf_counter()
+            await task.run()
+            return time.perf_counter() - start
+
+        elapsed = await median_of(args.repeat, measure)
+        results.add(f"output.{listener}.lines_per_s", args.lines / elapsed, "lines/s", "higher")
+        results.add(
+            f"output.{listener}.mb_per_s", args.lines * args.line_size / elapsed / 1e6, "MB/s", "higher"
+        )
+
+
+##################################
+
+
+async def bench_readiness(results, args):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "ready")
+
+        hooks = {
+            "immediate": (None, ["sleep", "3600"]),
+            "regex": (wait_for_str_re("ready", "stdout"), ["sh", "-c", "echo ready; exec sleep 3600"]),
+            "file": (wait_for_file(path), ["sh", "-c", f"touch {path}; exec sleep 3600"]),
+        }
+
+        for name, (hook, command) in hooks.items():
+
+            async def measure():
+                if os.path.exists(path):
+                    os.unlink(path)
+
+                task = Task(name="ready", command=command, log_output="none", stop_signal=signal.SIGTERM)
+                if hook is not None:
+                    task.ready_hook = hook
+
+                runner = asyncio.create_task(task.run())
+                await task.ready.wait()
+                latency = task.timestamps["ready"] - task.timestamps["spawned"]
+
+                await task.stop()
+                await runner
+                return latency
+
+            latencies = [await measure() for _ in range(args.runs)]
+            results.add(f"readiness.{name}.median", statistics.median(latencies) * 1e3, "ms")
+            results.add(f"readiness.{name}.max", max(latencies) * 1e3, "ms")
+
+
+##################################
+
+
+class NullJob:
+    """Scheduled job doing nothing, so that only the scheduler is measured"""
+
+    name = "job"
+    log = logging.getLogger("benchmark.job")
+
+    async def run(self):
+        pass
+
+
+async def run_scheduler(count, interval, duration):
+    scheduler = Scheduler()
+    anchor = datetime.now()
+    schedules = [
+        scheduler.add(NullJob(), IntervalRule(timedelta(seconds=interval), anchor), history=10_000)
+        for _ in range(count)
+    ]
+
+    cpu = time.process_time()
+    runner = scheduler.start()
+    await asyncio.sleep(duration)
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    cpu = time.process_time() - cpu
+
+    firings = [firing for schedule in schedules for firing in schedule.history]
+    return firings, cpu
+
+
+async def bench_scheduler(results, args):
+    firings, _ = await run_scheduler(10, 0.05, args.duration)
+    lateness = [firing.lateness for firing in firings]
+    results.add("scheduler.lateness.mean", statistics.mean(lateness) * 1e3, "ms")
+    results.add("scheduler.lateness.max", max(lateness) * 1e3, "ms")
+
+    firings, cpu = await run_scheduler(args.schedules, 0.1, args.duration)
+    results.add("scheduler.overhead", cpu / max(len(firings), 1) * 1e6, "us/firing")
+    results.add("scheduler.firings", len(firings) / args.duration, "firings/s", "higher")
+
+
+BENCHMARKS = {
+    "graph": bench_graph,
+    "output": bench_output,
+    "readiness": bench_readiness,
+    "scheduler": bench_scheduler,
+}
+
+
+##################################
+
+
+def compare(metrics, baseline, tolerance):
+    """Compare metrics against a baseline
+
+    Args:
+        metrics: name -> {"value", "unit", "better"}
+        baseline: the same, from a previous run
+        tolerance: relative change accepted before a metric is a regression
+
+    Returns:
+        the names of the regressed metrics
+    """
+
+    regressions = []
+    print(f"\n{'metric':<40}{'baseline':>14}{'current':>14}{'change':>10}")
+
+    for name, metric in metrics.items():
+        if name not in baseline or not baseline[name]["value"]:
+            continue
+
+        base = baseline[name]["value"]
+        change = (metric["value"] - base) / base
+        worse = change > tolerance if metric["better"] == "lower" else change < -tolerance
+        if worse:
+            regressions.append(name)
+
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<40}{base:>14.3f}{metric['value']:>14.3f}{change:>+10.1%}{flag}")
+
+    return regressions
+
+
+async def main(args):
+    results = Results()
+    for name, bench in BENCHMARKS.items():
+        if args.only is None or re.search(args.only, name):
+            await bench(results, args)
+
+    report = {
+        "version": FORMAT_VERSION,
+        "meta": {
+            "igniiite": __version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "settings": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        },
+        "results": results.metrics,
+    }
+
+    if args.output is not None:
+        with open(args.output, "w") as fhandle:
+            json.dump(report, fhandle, indent=2)
+            fhandle.write("\n")
+
+    if args.baseline is not None:
+        with open(args.baseline) as fhandle:
+            baseline = json.load(fhandle)
+
+        if baseline.get("version") != FORMAT_VERSION:
+            print(f"Baseline format {baseline.get('version')} is not {FORMAT_VERSION}", file=sys.stderr)
+            return 2
+
+        regressions = compare(results.metrics, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against the results of this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative change accepted, 0.2 for 20%%")
+    parser.add_argument("--only", help="only run the benchmarks matching this regex")
+    parser.add_argument("--repeat", type=int, default=3, help="number of measures, the median is kept")
+    parser.add_argument(
+        "--sizes",
+        type=lambda text: [int(size) for size in text.split(",")],
+        default=[10, 100, 1000],
+        help="graph sizes, comma separated",
+    )
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("--line-size", type=int, default=80)
+    parser.add_argument("--runs", type=int, default=20, help="readiness measures per hook")
+    parser.add_argument("--schedules", type=int, default=1000, help="schedules of the overhead benchmark")
+    parser.add_argument("--duration", type=float, default=2.0, help="scheduler benchmark duration, in seconds")
+    args = parser.parse_args()
+
+    # Before running anything: baselines are recorded on each machine
+    if args.baseline is not None and not os.path.exists(args.baseline):
+        parser.error(f"baseline {args.baseline} not found, record one first with -o {args.baseline}")
+
+    # Stop signals are logged as warnings
+    logging.basicConfig(level=logging.ERROR)
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,278 @@
+"""
+Socket activation
+=================
+
+Listening sockets created and bound by the supervisor, then passed to the
+task process as in systemd socket activation: the sockets are inherited
+starting at file descriptor 3, and LISTEN_FDS, LISTEN_FDNAMES and
+LISTEN_PID are set in the process environment.
+
+As the sockets exist before the process starts, the task is ready as soon
+as they are bound: dependents start at once, and their connections wait
+in the kernel backlog until the service accepts them. Sockets are kept
+open across restarts, so no connection is refused while the process is
+restarting.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import stat
+import fcntl
+import socket
+import asyncio
+import logging
+
+from dataclasses import dataclass
+
+from igniiite.hooks import _read_text, TCP_LISTEN, UNIX_ACCEPTCON
+
+
+log = logging.getLogger(__name__)
+
+# First file descriptor of the passed sockets, as in sd_listen_fds()
+LISTEN_FDS_START = 3
+
+# TCP states of closed connections
+TCP_CLOSED = ("06", "07")
+
+# Sockets wrapper for descriptors a POSIX shell can't redirect (above 9):
+# arguments are the socket count, the descriptors, then the command
+_MOVE_FDS = """
+import os, sys
+count = int(sys.argv[1])
+fds = [int(fd) for fd in sys.argv[2 : 2 + count]]
+for index, fd in enumerate(fds):
+    os.dup2(fd, 3 + index)
+    os.close(fd)
+os.environ["LISTEN_PID"] = str(os.getpid())
+os.execvp(sys.argv[2 + count], sys.argv[2 + count :])
+"""
+
+
+##################################
+
+
+@dataclass
+class ListenSocket:
+    """A listening socket passed to a task process, see Task.sockets"""
+
+    """TCP port to listen on"""
+    port: int = None
+
+    """Unix socket path to listen on, "@name" for an abstract socket"""
+    path: str = None
+
+    """Address to listen on with port, all interfaces if None"""
+    host: str = None
+
+    """Name given to the process in LISTEN_FDNAMES"""
+    name: str = None
+
+    """Maximum number of connections waiting to be accepted"""
+    backlog: int = 128
+
+    def __post_init__(self):
+        if (self.port is None) == (self.path is None):
+            raise ValueError(
+                f"port = {self.port!r} and path = {self.path!r}: exactly one of them must be set"
+            )
+
+        if self.backlog < 1:
+            raise ValueError(f"backlog = {self.backlog!r} must be at least 1")
+
+        self.sock = None
+
+    def __str__(self):
+        if self.path is not None:
+            return self.path
+        return f"{self.host or '*'}:{self.port}"
+
+    def open(self):
+        """Create, bind and listen, if not already done
+
+        A stale Unix socket file at path is replaced.
+
+        Raises:
+            OSError: the socket could not be bound
+        """
+
+        if self.sock is not None:
+            return
+
+        if self.path is not None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address = "\0" + self.path[1:] if self.path.startswith("@") else self.path
+            if not self.path.startswith("@"):
+                try:
+                    if stat.S_ISSOCK(os.lstat(self.path).st_mode):
+                        os.unlink(self.path)
+                except FileNotFoundError:
+                    pass
+
+        else:
+            family = socket.AF_INET6 if self.host and ":" in self.host else socket.AF_INET
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            address = (self.host or "", self.port)
+
+        try:
+            sock.bind(address)
+            sock.listen(self.backlog)
+        except BaseException:
+            sock.close()
+            raise
+
+        # Left blocking, as processes expect: the supervisor never accepts
+        self.sock = sock
+
+        log.debug(f"Listening on {self}")
+
+    def close(self):
+        """Close the socket, and remove its Unix socket file"""
+
+        if self.sock is None:
+            return
+
+        self.sock.close()
+        self.sock = None
+
+        if self.path is not None and not self.path.startswith("@"):
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def connections(self, pid):
+        """Number of connections to the socket, accepted or waiting to be
+
+        Connections are looked up in /proc, from the network namespace of a
+        process.
+
+        Args:
+            pid: the process
+        """
+
+        count = 0
+
+        if self.path is not None:
+            for line in _read_text(f"/proc/{pid}/net/unix").splitlines()[1:]:
+                fields = line.split()
+                if len(fields) >= 8 and fields[7] == self.path and not int(fields[3], 16) & UNIX_ACCEPTCON:
+                    count += 1
+
+            return count
+
+        inode = os.fstat(self.sock.fileno()).st_ino
+        for name in ("tcp", "tcp6"):
+            for line in _read_text(f"/proc/{pid}/net/{name}").splitlines()[1:]:
+                fields = line.split()
+                if len(fields) < 10 or int(fields[1].rsplit(":", 1)[1], 16) != self.port:
+                    continue
+
+                if fields[3] == TCP_LISTEN:
+                    # Receive queue of a listening socket: connections not accepted yet
+                    if int(fields[9]) == inode:
+                        count += int(fields[4].split(":")[1], 16)
+                elif fields[3] not in TCP_CLOSED:
+                    count += 1
+
+        return count
+
+
+##################################
+
+
+def activation_command(command, sockets):
+    """Command and environment passing sockets to a process
+
+    The sockets are duplicated above the target descriptors, and a wrapper
+    moves them to their place then sets LISTEN_PID to its own pid before
+    exec'ing the command: the pid of the process is only known once it is
+    forked, and launchers only need to support pass_fds.
+
+    The wrapper is a shell, unless a descriptor is above 9, which POSIX
+    shells can't redirect: a Python interpreter is used then.
+
+    Args:
+        command: the command to launch
+        sockets: the opened ListenSocket objects
+
+    Returns:
+        the wrapped command, the environment variables to add, and the
+        descriptors to pass, which the caller closes once the process is
+        launched
+    """
+
+    count = len(sockets)
+    fds = [
+        fcntl.fcntl(sock.fileno(), fcntl.F_DUPFD_CLOEXEC, LISTEN_FDS_START + count)
+        for sock in sockets
+    ]
+
+    command = [str(arg) for arg in command]
+    if max(fds) <= 9:
+        moves = " ".join(
+            f"{LISTEN_FDS_START + index}<&{fd} {fd}<&-" for index, fd in enumerate(fds)
+        )
+        script = f'exec {moves}; export LISTEN_PID=$$; exec "$@"'
+        wrapped = ["/bin/sh", "-c", script, "sh", *command]
+    else:
+        wrapped = [
+            sys.executable, "-I", "-S", "-c", _MOVE_FDS, str(count), *map(str, fds), *command
+        ]
+
+    environment = {
+        "LISTEN_FDS": str(count),
+        "LISTEN_FDNAMES": ":".join(sock.name or "unknown" for sock in sockets),
+    }
+
+    return wrapped, environment, fds
+
+
+async def wait_for_connection(sockets):
+    """Wait for a connection to one of the sockets, without accepting it
+
+    Args:
+        sockets: the opened ListenSocket objects
+    """
+
+    loop = asyncio.get_running_loop()
+    connected = loop.create_future()
+
+    def on_readable():
+        if not connected.done():
+            connected.set_result(None)
+
+    for sock in sockets:
+        loop.add_reader(sock.fileno(), on_readable)
+
+    try:
+        await connected
+    finally:
+        for sock in sockets:
+            loop.remove_reader(sock.fileno())
+
+
+async def wait_idle(pid, sockets, idle_timeout):
+    """Wait until the sockets had no connection for idle_timeout seconds
+
+    Args:
+        pid: the process the connections are looked up from
+        sockets: the opened ListenSocket objects
+        idle_timeout: the time without connection, in seconds
+    """
+
+    loop = asyncio.get_running_loop()
+    interval = min(idle_timeout / 4, 1.0)
+    idle_since = loop.time()
+
+    while loop.time() - idle_since < idle_timeout:
+        await asyncio.sleep(interval)
+        if any(sock.connections(pid) for sock in sockets):
+            idle_since = loop.time()
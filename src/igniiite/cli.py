@@ -0,0 +1,201 @@
+"""
+Command line client
+===================
+
+Control a running igniiite supervisor through its control socket, see
+igniiite.control.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import sys
+import asyncio
+import argparse
+
+from igniiite import timeline
+from igniiite.control import ControlClient, CONTROL_STREAMS
+
+
+##################################
+
+
+def format_status(tasks):
+    """Format task statuses as a text table
+
+    Args:
+        tasks: the result of a status command
+    """
+
+    lines = [
+        f"{'task':<24}{'state':<10}{'pid':>8}{'uptime':>10}{'restarts':>10}  {'health'}"
+    ]
+
+    for task in tasks:
+        pid = "-" if task["pid"] is None else str(task["pid"])
+        uptime = "-" if task["uptime"] is None else f"{task['uptime']:.0f}s"
+        lines.append(
+            f"{task['name']:<24}{task['state']:<10}{pid:>8}{uptime:>10}"
+            f"{task['restarts']:>10}  {task['health'] or '-'}"
+        )
+
+    return "\n".join(lines)
+
+
+def format_line(message, prefix):
+    if prefix:
+        return f"{message['task']} {message['stream']}: {message['line']}"
+    return message["line"]
+
+
+def format_blame(times):
+    """Format the activation time of tasks, slowest first
+
+    Args:
+        times: task name -> TaskTimes
+    """
+
+    return "\n".join(f"{spent:>10.3f}s {name}" for name, spent in timeline.blame(times))
+
+
+def measure_startup(args):
+    from igniiite import footprint
+
+    try:
+        report = footprint.measure_startup(args.tasks)
+    except (ValueError, RuntimeError) as exc:
+        print(f"igniiite: {exc}", file=sys.stderr)
+        return 1
+
+    print(footprint.format_report(report))
+
+    over = footprint.check_budget(report)
+    if args.check and over:
+        names = ", ".join(name for name, _, _ in over)
+        print(f"igniiite: over the startup budget: {names}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+async def run(args):
+    client = ControlClient(args.socket)
+    await client.connect()
+
+    try:
+        if args.command == "status":
+            print(format_status(await client.request("status", task=args.task)))
+
+        elif args.command in ("start", "stop", "restart"):
+            params = {"task": args.task, "subtree": args.subtree}
+            if args.command != "stop":
+                params.update(priority=args.priority, group=args.group)
+
+            names = await client.request(args.command, **params)
+            for name in names:
+                print(f"{args.command}: {name}")
+
+        elif args.command == "logs":
+            prefix = len(args.tasks) != 1
+            lines = await client.request(
+                "logs",
+                tasks=args.tasks,
+                stream=args.stream,
+                tail=args.lines,
+                follow=args.follow,
+            )
+            for line in lines:
+                print(format_line(line, prefix))
+
+            if args.follow:
+                async for message in client.events():
+                    if message.get("event") == "output":
+                        print(format_line(message, prefix), flush=True)
+                    elif message.get("event") == "dropped":
+                        print(
+                            f"-- {message['lines']} lines of {message['task']} {message['stream']} dropped --",
+                            file=sys.stderr,
+                        )
+
+        elif args.command in ("blame", "critical-chain", "timeline"):
+            result = await client.request("timeline")
+            times = timeline.times_from_json(result["tasks"])
+
+            if args.command == "blame":
+                print(format_blame(times))
+            elif args.command == "critical-chain":
+                print(timeline.format_critical_chain(timeline.critical_chain(times, args.task)))
+            else:
+                if args.svg:
+                    output = timeline.svg_timeline(times, result["now"])
+                else:
+                    output = timeline.dump_chrome_trace(times, result["now"])
+
+                if args.output in (None, "-"):
+                    sys.stdout.write(output)
+                else:
+                    with open(args.output, "w") as fhandle:
+                        fhandle.write(output)
+
+    finally:
+        await client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="igniiite", description=__doc__.splitlines()[1])
+    parser.add_argument("--socket", help="control socket path, IGNIIITE_SOCKET or /run/igniiite/control.sock by default")
+    parser.add_argument(
+        "--measure-startup", action="store_true", help="measure the core import time and memory per task, then exit"
+    )
+    parser.add_argument("--check", action="store_true", help="with --measure-startup, fail when over budget")
+    parser.add_argument("--tasks", type=int, default=1000, help="with --measure-startup, number of tasks created")
+
+    commands = parser.add_subparsers(dest="command")
+
+    status = commands.add_parser("status", help="show the state of the tasks")
+    status.add_argument("task", nargs="?")
+
+    for command in ("start", "stop", "restart"):
+        control = commands.add_parser(command, help=f"{command} a task")
+        control.add_argument("task")
+        control.add_argument("--subtree", action="store_true", help="also the tasks depending on it")
+        if command != "stop":
+            control.add_argument("--priority", type=int, default=0, help="priority of the launched runs in the executor")
+            control.add_argument("--group", help="executor group of the launched runs")
+
+    logs = commands.add_parser("logs", help="show the output of tasks")
+    logs.add_argument("tasks", nargs="*", help="all tasks if none")
+    logs.add_argument("-n", "--lines", type=int, default=10, help="number of last lines to show")
+    logs.add_argument("-f", "--follow", action="store_true", help="show new output as it comes")
+    logs.add_argument("--stream", choices=tuple(CONTROL_STREAMS), default="both")
+
+    commands.add_parser("blame", help="show the time each task took to get ready")
+
+    chain = commands.add_parser("critical-chain", help="show the chain of tasks that delayed a task")
+    chain.add_argument("task", nargs="?", help="the task that got ready last if not set")
+
+    trace = commands.add_parser("timeline", help="export the startup timeline, as a Chrome trace by default")
+    trace.add_argument("-o", "--output", help="output file, standard output by default")
+    trace.add_argument("--svg", action="store_true", help="export as a SVG image")
+
+    args = parser.parse_args(argv)
+
+    if args.measure_startup:
+        return measure_startup(args)
+
+    if args.command is None:
+        parser.error("a command is required")
+
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, RuntimeError) as exc:
+        print(f"igniiite: {exc}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
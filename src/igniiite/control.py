@@ -0,0 +1,478 @@
+"""
+Control socket
+==============
+
+Control of a running Supervisor from outside of the process, through a Unix
+socket. Messages are JSON objects, one per line, both ways.
+
+Requests hold a "cmd" key, and an optional "id" copied to the response:
+
+- {"cmd": "status"}, or {"cmd": "status", "task": name}: state of the tasks;
+- {"cmd": "start" | "stop" | "restart", "task": name, "subtree": bool}.
+  Started runs go through the supervisor executor, with the optional
+  "priority" and "group" of the request, see Supervisor.start();
+- {"cmd": "logs", "tasks": [names], "stream": "stdout" | "stderr" | "both",
+  "tail": n, "follow": bool}: last output lines, then live output;
+- {"cmd": "timeline"}: phase timestamps of the tasks, see igniiite.timeline.
+
+Responses are {"id": id, "ok": true, "result": ...} or {"id": id, "ok":
+false, "error": message}. Followed output is sent as {"event": "output",
+"task": name, "stream": stream, "line": text} messages, until the client
+disconnects or sends {"cmd": "unfollow"}.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import json
+import time
+import socket
+import asyncio
+import logging
+
+import traceback
+
+
+log = logging.getLogger(__name__)
+
+# Default socket path, overridden by IGNIIITE_SOCKET
+DEFAULT_CONTROL_PATH = "/run/igniiite/control.sock"
+
+CONTROL_STREAMS = {
+    "stdout": ("stdout",),
+    "stderr": ("stderr",),
+    "both": ("stdout", "stderr"),
+}
+
+# Maximum size of a request line
+MAX_REQUEST = 64 * 1024
+
+
+##################################
+
+
+def control_path():
+    """Socket path from the environment, or the default one"""
+
+    return os.environ.get("IGNIIITE_SOCKET", DEFAULT_CONTROL_PATH)
+
+
+def _encode(message):
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def task_status(supervisor, task):
+    """Status of a task of a supervised graph, as a JSON compatible dict
+
+    Args:
+        supervisor: the Supervisor running the task
+        task: the task
+    """
+
+    running = supervisor.is_running(task)
+    if task in supervisor.queued:
+        # Started on demand, waiting for the executor
+        state = "queued"
+    elif running:
+        state = "ready" if task.ready.is_set() else "starting"
+    elif task in supervisor.running:
+        state = "failed" if task.failed.is_set() else "ended"
+    else:
+        state = "waiting" if task in supervisor.remaining else "inactive"
+
+    alive = running and task.process is not None and task.process.returncode is None
+
+    return {
+        "name": task.name,
+        "state": state,
+        "ready": task.ready.is_set(),
+        "failed": task.failed.is_set(),
+        "ended": task.ended.is_set(),
+        "pid": task.process.pid if alive else None,
+        "uptime": time.monotonic() - task.start_time if alive else None,
+        "restarts": task.restarts,
+        "health": task.health,
+        "status": task.status,
+        "level": supervisor.graph.level_of[task],
+        "dependencies": sorted(tt.name for tt in task.dependencies),
+    }
+
+
+class _OutputFanout:
+    """Raw listener sending the output of a task stream to many clients
+
+    Each batch is encoded once, then written as is to every client. A client
+    that does not read fast enough has its output dropped, while its write
+    buffer is above max_buffer, and is told how many lines were lost.
+    """
+
+    maxsize = 0
+
+    def __init__(self, task, stream, max_buffer):
+        self.task = task
+        self.stream = stream
+        self.max_buffer = max_buffer
+
+        # Client writer -> number of lines dropped since the last notice
+        self.clients = {}
+
+    def full(self):
+        return False
+
+    def encode(self, lines):
+        head = f'{{"event":"output","task":{json.dumps(self.task.name)},"stream":"{self.stream}","line":'
+        return "".join(
+            f"{head}{json.dumps(line.decode('utf-8', errors='replace').strip())}}}\n"
+            for line in lines
+        ).encode("utf-8")
+
+    def put_nowait(self, lines):
+        if lines is None:
+            return
+
+        data = None
+        for writer, dropped in self.clients.items():
+            if writer.is_closing():
+                continue
+
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.clients[writer] = dropped + len(lines)
+                continue
+
+            if dropped:
+                writer.write(
+                    _encode(
+                        {
+                            "event": "dropped",
+                            "task": self.task.name,
+                            "stream": self.stream,
+                            "lines": dropped,
+                        }
+                    )
+                )
+                self.clients[writer] = 0
+
+            if data is None:
+                data = self.encode(lines)
+            writer.write(data)
+
+
+class ControlServer:
+    """Serve the control protocol of a Supervisor on a Unix socket"""
+
+    def __init__(self, supervisor, path=None, max_buffer: int = 1024 * 1024):
+        """
+        Args:
+            supervisor: the controlled Supervisor
+            path: socket path, see control_path() if None
+            max_buffer: per client pending output size above which followed output is dropped
+        """
+
+        self.supervisor = supervisor
+        self.path = path or control_path()
+        self.max_buffer = max_buffer
+
+        self.server = None
+        self.clients = set()
+
+        # (task, stream) -> _OutputFanout
+        self.fanouts = {}
+
+    async def start(self):
+        """Start listening on the socket. A stale socket file is replaced"""
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+        # Owner only from creation on: no other user may connect meanwhile
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o077)
+        try:
+            sock.bind(self.path)
+            os.chmod(self.path, 0o600)
+        except BaseException:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+
+        self.server = await asyncio.start_unix_server(self.__client, sock=sock, limit=MAX_REQUEST)
+
+        log.debug(f"Control socket listening on {self.path}")
+
+    async def close(self):
+        """Stop listening, and disconnect the clients"""
+
+        if self.server is None:
+            return
+
+        self.server.close()
+        for writer in self.clients:
+            writer.close()
+
+        await self.server.wait_closed()
+        self.server = None
+
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    async def __client(self, reader, writer):
+        followed = []
+        self.clients.add(writer)
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(_encode({"ok": False, "error": "request too long"}))
+                    break
+
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                response = await self.__request(line, writer, followed)
+                writer.write(_encode(response))
+                await writer.drain()
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+        except Exception:
+            log.error(traceback.format_exc())
+
+        finally:
+            self.clients.discard(writer)
+            await self.__unfollow(writer, followed)
+            writer.close()
+
+    async def __request(self, line, writer, followed):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request is not an object")
+
+            request_id = request.get("id")
+            command = request.get("cmd")
+
+            if command == "status":
+                result = self.__status(request)
+            elif command in ("start", "stop", "restart"):
+                result = await self.__control(command, request)
+            elif command == "logs":
+                result = await self.__logs(request, writer, followed)
+            elif command == "timeline":
+                result = self.__timeline()
+            elif command == "unfollow":
+                result = await self.__unfollow(writer, followed)
+            else:
+                raise ValueError(f"unknown command {command!r}")
+
+            return {"id": request_id, "ok": True, "result": result}
+
+        except Exception as exc:
+            log.debug(traceback.format_exc())
+            return {"id": request_id, "ok": False, "error": str(exc) or type(exc).__name__}
+
+    def __task(self, name):
+        # Looked up each time, the supervisor graph may be updated
+        for task in self.supervisor.graph.tasks:
+            if task.name == name:
+                return task
+
+        raise ValueError(f"unknown task {name!r}")
+
+    def __status(self, request):
+        if request.get("task") is not None:
+            tasks = [self.__task(request["task"])]
+        else:
+            tasks = self.supervisor.graph.tasks
+
+        return [task_status(self.supervisor, tt) for tt in tasks]
+
+    def __timeline(self):
+        return {
+            "now": time.monotonic(),
+            "tasks": [
+                {
+                    "name": tt.name,
+                    "dependencies": sorted(dep.name for dep in tt.dependencies),
+                    "timestamps": tt.timestamps,
+                }
+                for tt in self.supervisor.graph.tasks
+            ],
+        }
+
+    async def __control(self, command, request):
+        task = self.__task(request.get("task"))
+        subtree = bool(request.get("subtree", False))
+
+        priority = int(request.get("priority", 0))
+        group = request.get("group")
+
+        if command == "start":
+            started = self.supervisor.start(task, subtree, priority, group)
+            return [tt.name for tt in started]
+
+        if command == "stop":
+            await self.supervisor.stop(task, subtree)
+        else:
+            await self.supervisor.restart(task, subtree, priority, group)
+
+        tasks = self.supervisor.subtree(task) if subtree else [task]
+        return [tt.name for tt in tasks]
+
+    async def __logs(self, request, writer, followed):
+        names = request.get("tasks") or [tt.name for tt in self.supervisor.graph.tasks]
+        tasks = [self.__task(name) for name in names]
+
+        stream = request.get("stream", "both")
+        if stream not in CONTROL_STREAMS:
+            raise ValueError(f"stream = {stream!r} is not one of {tuple(CONTROL_STREAMS)}")
+        streams = CONTROL_STREAMS[stream]
+
+        tail = int(request.get("tail", 0))
+        follow = bool(request.get("follow", False))
+
+        # Listeners are registered first, and the client added to them with no
+        # wait until the response is written: followed output comes right after
+        # the history, with no line lost or repeated
+        if follow:
+            fanouts = [await self.__fanout(task, name) for task in tasks for name in streams]
+            for fanout in fanouts:
+                fanout.clients[writer] = 0
+                followed.append(fanout)
+
+        lines = []
+        if tail > 0:
+            for task in tasks:
+                if task.output is None:
+                    continue
+
+                for line in task.output.tail(tail, stream if len(streams) == 1 else None):
+                    lines.append(
+                        {
+                            "task": task.name,
+                            "stream": line.stream,
+                            "cursor": line.cursor,
+                            "line": line.text(),
+                        }
+                    )
+
+        return lines
+
+    async def __fanout(self, task, stream):
+        fanout = self.fanouts.get((task, stream))
+        if fanout is None:
+            fanout = _OutputFanout(task, stream, self.max_buffer)
+            self.fanouts[(task, stream)] = fanout
+            await getattr(task, f"{stream}_listeners").register(fanout, raw=True)
+
+        return fanout
+
+    async def __unfollow(self, writer, followed):
+        for fanout in followed:
+            fanout.clients.pop(writer, None)
+            if not fanout.clients and self.fanouts.get((fanout.task, fanout.stream)) is fanout:
+                del self.fanouts[(fanout.task, fanout.stream)]
+                await getattr(fanout.task, f"{fanout.stream}_listeners").unregister(fanout)
+
+        followed.clear()
+
+
+##################################
+
+
+class ControlClient:
+    """Client of a ControlServer"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: socket path, see control_path() if None
+        """
+
+        self.path = path or control_path()
+        self.reader = None
+        self.writer = None
+
+        # Events received while waiting for a response
+        self.pending = []
+        self.counter = 0
+
+    async def connect(self):
+        """Connect to the server"""
+
+        self.reader, self.writer = await asyncio.open_unix_connection(
+            self.path, limit=16 * 1024 * 1024
+        )
+
+    async def close(self):
+        """Disconnect from the server"""
+
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+            self.writer = None
+
+    async def request(self, cmd, **params):
+        """Send a request, and wait for its response
+
+        Args:
+            cmd: the command
+            params: the command parameters
+
+        Returns:
+            the result of the command
+
+        Raises:
+            RuntimeError: the server returned an error
+            ConnectionError: the connection was lost
+        """
+
+        self.counter += 1
+        self.writer.write(_encode({"id": self.counter, "cmd": cmd, **params}))
+        await self.writer.drain()
+
+        while True:
+            message = await self.__read()
+            if "event" in message:
+                self.pending.append(message)
+            elif message.get("id") in (self.counter, None):
+                break
+
+        if not message.get("ok"):
+            raise RuntimeError(message.get("error"))
+
+        return message.get("result")
+
+    async def events(self):
+        """Iterate over the events sent by the server, such as followed output"""
+
+        while self.pending:
+            yield self.pending.pop(0)
+
+        while True:
+            try:
+                yield await self.__read()
+            except ConnectionError:
+                return
+
+    async def __read(self):
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by the server")
+
+        return json.loads(line)
@@ -0,0 +1,301 @@
+"""
+Job executor
+============
+
+Shared executor of task runs: scheduled and on demand runs go through it,
+so that bursts of runs (every hourly job firing at the top of the hour) are
+spread into a bounded workload:
+
+- at most max_concurrent runs at once, and at most group_limits[group]
+  runs at once per group;
+- runs over the limits wait in a pending queue, highest priority first,
+  then in submission order. A run held back by its group limit does not
+  hold back the runs of other groups;
+- starts can be spaced by start_interval seconds;
+- the pending queue may be bounded, with a policy for when it is full.
+
+Queue wait and run time statistics are kept over the latest runs.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import heapq
+import asyncio
+import logging
+import itertools
+import collections
+
+
+log = logging.getLogger(__name__)
+
+PENDING_POLICIES = ("block", "drop-newest", "drop-oldest", "drop-lowest")
+
+
+class JobDropped(Exception):
+    """A run was dropped from a full pending queue, see JobExecutor"""
+
+
+def _mean_max(values):
+    if not values:
+        return None
+    return sum(values) / len(values), max(values)
+
+
+##################################
+
+
+class JobExecutor:
+    """Run tasks with concurrency limits and priorities
+
+    What happens to a run submitted while the pending queue is full depends
+    on the policy:
+
+    - block: the submitter waits for room in the queue;
+    - drop-newest: the new run is dropped;
+    - drop-oldest: the run pending for the longest time is dropped;
+    - drop-lowest: the newest run of lowest priority is dropped, which is
+      the new one if no pending run has a lower priority.
+
+    Dropped runs raise JobDropped to their submitter. Limits are plain
+    attributes, and may be changed at any time.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = None,
+        group_limits: dict = None,
+        max_pending: int = None,
+        policy: str = "block",
+        start_interval: float = 0.0,
+        history: int = 1000,
+    ):
+        """
+        Args:
+            max_concurrent: maximum number of runs at once, None for no limit
+            group_limits: group name -> maximum number of runs of the group at once
+            max_pending: maximum number of runs waiting to start, None for no limit
+            policy: What to do when the pending queue is full: "block", "drop-newest", "drop-oldest" or "drop-lowest"
+            start_interval: minimum time between two starts, in seconds
+            history: number of runs the statistics are computed over
+        """
+
+        if max_concurrent is not None and max_concurrent < 1:
+            raise ValueError(f"max_concurrent = {max_concurrent!r} must be at least 1")
+
+        if max_pending is not None and max_pending < 1:
+            raise ValueError(f"max_pending = {max_pending!r} must be at least 1")
+
+        if policy not in PENDING_POLICIES:
+            raise ValueError(f"policy = {policy!r} is not one of {PENDING_POLICIES}")
+
+        if start_interval < 0:
+            raise ValueError(f"start_interval = {start_interval!r} must not be negative")
+
+        for group, limit in (group_limits or {}).items():
+            if limit < 1:
+                raise ValueError(f"group_limits[{group!r}] = {limit!r} must be at least 1")
+
+        self.max_concurrent = max_concurrent
+        self.group_limits = dict(group_limits or {})
+        self.max_pending = max_pending
+        self.policy = policy
+        self.start_interval = start_interval
+
+        # Heap of (-priority, sequence number, admission future, group)
+        self.pending = []
+        self.counter = itertools.count()
+
+        # Number of runs going on, overall and per group
+        self.running = 0
+        self.group_running = collections.Counter()
+
+        # Submitters waiting for room in the pending queue, for the block policy
+        self.room = []
+
+        # Loop time before which no run starts, see start_interval
+        self.next_start = 0.0
+        self.timer = None
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+        # Queue wait and run time of the latest runs, in seconds
+        self.waits = collections.deque(maxlen=history)
+        self.run_times = collections.deque(maxlen=history)
+
+    async def run(self, what, priority: int = 0, group: str = None):
+        """Run a task once the limits allow it
+
+        Cancelling the run while it is pending removes it from the queue.
+
+        Args:
+            what: the task to run, any object with a run() coroutine method
+            priority: runs of higher priority start first
+            group: group of the run, see group_limits
+
+        Returns:
+            the result of what.run()
+
+        Raises:
+            JobDropped: the run was dropped from a full pending queue
+        """
+
+        loop = asyncio.get_running_loop()
+        submitted = loop.time()
+        self.submitted += 1
+
+        await self.__make_room(what, priority)
+
+        admitted = loop.create_future()
+        entry = (-priority, next(self.counter), admitted, group)
+        heapq.heappush(self.pending, entry)
+        self.__dispatch()
+
+        try:
+            await admitted
+
+        except JobDropped:
+            log.warning(f"Run of '{what.name}' dropped, pending queue is full")
+            raise
+
+        except BaseException:
+            if admitted.done() and not admitted.cancelled() and admitted.exception() is None:
+                # Admitted while being cancelled
+                self.__release(group)
+            elif entry in self.pending:
+                self.pending.remove(entry)
+                heapq.heapify(self.pending)
+                self.__wake_room()
+            raise
+
+        started = loop.time()
+        self.waits.append(started - submitted)
+
+        try:
+            result = await what.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.run_times.append(loop.time() - started)
+            self.__release(group)
+
+        self.completed += 1
+        return result
+
+    def stats(self):
+        """Executor statistics
+
+        Returns:
+            a dict with the running and pending run counts, running runs per
+            group, submitted, completed, failed (raised an exception) and
+            dropped run counts, and wait and run: (mean, max) queue wait and
+            run time over the latest runs, in seconds, None if nothing ran
+        """
+
+        return {
+            "running": self.running,
+            "pending": len(self.pending),
+            "groups": {group: count for group, count in self.group_running.items() if count},
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "wait": _mean_max(self.waits),
+            "run": _mean_max(self.run_times),
+        }
+
+    async def __make_room(self, what, priority):
+        while self.max_pending is not None and len(self.pending) >= self.max_pending:
+            if self.policy == "block":
+                waiter = asyncio.get_running_loop().create_future()
+                self.room.append(waiter)
+                try:
+                    await waiter
+                except BaseException:
+                    if waiter in self.room:
+                        self.room.remove(waiter)
+                    else:
+                        # Woken up while being cancelled: pass the room on
+                        self.__wake_room()
+                    raise
+                continue
+
+            if self.policy == "drop-oldest":
+                victim = min(self.pending, key=lambda entry: entry[1])
+            elif self.policy == "drop-lowest" and max(self.pending)[0] > -priority:
+                victim = max(self.pending)
+            else:
+                self.dropped += 1
+                log.warning(f"Run of '{what.name}' dropped, pending queue is full")
+                raise JobDropped(f"Run of '{what.name}' dropped, pending queue is full")
+
+            self.pending.remove(victim)
+            heapq.heapify(self.pending)
+            self.dropped += 1
+            victim[2].set_exception(JobDropped("Run dropped, pending queue is full"))
+
+    def __wake_room(self):
+        if self.max_pending is None:
+            return
+
+        free = self.max_pending - len(self.pending)
+        while self.room and free > 0:
+            waiter = self.room.pop(0)
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def __release(self, group):
+        self.running -= 1
+        if group is not None:
+            self.group_running[group] -= 1
+            if not self.group_running[group]:
+                del self.group_running[group]
+
+        self.__dispatch()
+
+    def __on_timer(self):
+        self.timer = None
+        self.__dispatch()
+
+    def __dispatch(self):
+        # Start as many pending runs as the limits allow
+        loop = asyncio.get_running_loop()
+        held = []
+
+        while self.pending and (self.max_concurrent is None or self.running < self.max_concurrent):
+            if self.start_interval and loop.time() < self.next_start:
+                if self.timer is None:
+                    self.timer = loop.call_at(self.next_start, self.__on_timer)
+                break
+
+            entry = heapq.heappop(self.pending)
+            _, _, admitted, group = entry
+            if admitted.done():
+                continue
+
+            limit = self.group_limits.get(group) if group is not None else None
+            if limit is not None and self.group_running[group] >= limit:
+                held.append(entry)
+                continue
+
+            self.running += 1
+            if group is not None:
+                self.group_running[group] += 1
+            self.next_start = loop.time() + self.start_interval
+            admitted.set_result(None)
+
+        for entry in held:
+            heapq.heappush(self.pending, entry)
+
+        self.__wake_room()
+
+
+# Executor shared by the schedulers, with no limits unless configured
+default_executor = JobExecutor()
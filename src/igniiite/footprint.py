@@ -0,0 +1,177 @@
+"""
+Startup footprint
+=================
+
+Import time of the igniiite core and memory used per task, measured in a
+fresh interpreter, and checked against a documented budget. On small
+boards, interpreter startup and the memory of each task matter: the core
+(tasks, hooks, graph, scheduler) only imports the standard library, and
+the state of a task is allocated when it is first used.
+
+    igniiite --measure-startup [--check] [--tasks 1000]
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import sys
+import json
+import subprocess
+
+from typing import NamedTuple
+
+
+# Modules making the core, as used by an embedded supervisor
+CORE_MODULES = ("igniiite.task", "igniiite.hooks", "igniiite.graph", "igniiite.scheduler")
+
+
+class Budget(NamedTuple):
+    """Startup footprint budget"""
+
+    """Time to import the core once asyncio is imported, in milliseconds"""
+    import_ms: float
+
+    """Memory of a created task which did not run yet, in bytes"""
+    bytes_per_task: int
+
+    """Modules outside of the standard library imported by the core"""
+    third_party: int
+
+
+# asyncio is left out of the import time: every supervisor pays for it, and
+# its cost only depends on the interpreter
+STARTUP_BUDGET = Budget(import_ms=50.0, bytes_per_task=4096, third_party=0)
+
+
+# Run in a fresh interpreter, so that nothing is imported yet
+_MEASURE = """
+import gc
+import sys
+import json
+import time
+import importlib
+import tracemalloc
+
+modules, count = sys.argv[1].split(","), int(sys.argv[2])
+
+start = time.perf_counter()
+import asyncio
+asyncio_ms = (time.perf_counter() - start) * 1e3
+
+already = set(sys.modules)
+start = time.perf_counter()
+for name in modules:
+    importlib.import_module(name)
+import_ms = (time.perf_counter() - start) * 1e3
+
+stdlib = getattr(sys, "stdlib_module_names", ())
+third_party = sorted(
+    name for name in set(sys.modules) - already
+    if stdlib and name.split(".")[0] not in stdlib and name.split(".")[0] != "igniiite"
+)
+
+from igniiite.task import Task
+
+gc.collect()
+tracemalloc.start()
+before = tracemalloc.get_traced_memory()[0]
+tasks = [Task(name=f"task{index}", command=["true"]) for index in range(count)]
+gc.collect()
+used = tracemalloc.get_traced_memory()[0] - before
+
+print(json.dumps({
+    "python": sys.version.split()[0],
+    "asyncio_ms": asyncio_ms,
+    "import_ms": import_ms,
+    "modules": len(sys.modules) - len(already),
+    "third_party": third_party,
+    "tasks": count,
+    "bytes_per_task": used / count,
+}))
+"""
+
+
+##################################
+
+
+def measure_startup(tasks: int = 1000, modules=CORE_MODULES):
+    """Measure the startup footprint in a new interpreter
+
+    Args:
+        tasks: number of tasks created to measure the memory per task
+        modules: modules imported to measure the import time
+
+    Returns:
+        a dict with asyncio_ms, import_ms, modules (number of modules
+        imported with the core), third_party (their names, outside of the
+        standard library) and bytes_per_task
+
+    Raises:
+        ValueError: tasks is less than 1
+        RuntimeError: the measure failed
+    """
+
+    if tasks < 1:
+        raise ValueError(f"tasks = {tasks!r} must be at least 1")
+
+    result = subprocess.run(
+        [sys.executable, "-c", _MEASURE, ",".join(modules), str(tasks)],
+        capture_output=True,
+        text=True,
+    )
+
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup measure failed: {result.stderr.strip()}")
+
+    return json.loads(result.stdout)
+
+
+def check_budget(report, budget: Budget = STARTUP_BUDGET):
+    """Check a startup report against a budget
+
+    Args:
+        report: the result of measure_startup()
+        budget: the budget
+
+    Returns:
+        a list of (metric, measured, allowed) for the metrics over budget
+    """
+
+    measured = {
+        "import_ms": report["import_ms"],
+        "bytes_per_task": report["bytes_per_task"],
+        "third_party": len(report["third_party"]),
+    }
+
+    return [
+        (name, measured[name], allowed)
+        for name, allowed in budget._asdict().items()
+        if measured[name] > allowed
+    ]
+
+
+def format_report(report, budget: Budget = STARTUP_BUDGET):
+    """Format a startup report as text, along with the budget
+
+    Args:
+        report: the result of measure_startup()
+        budget: the budget
+    """
+
+    over = {name for name, _, _ in check_budget(report, budget)}
+
+    def line(name, value, allowed, unit=""):
+        flag = "  OVER BUDGET" if name in over else ""
+        return f"{name:<18}{value:>12.{1 if unit else 0}f} {unit:<8}(budget {allowed:g}){flag}"
+
+    return "\n".join(
+        [
+            f"{'python':<18}{report['python']:>12}",
+            f"{'asyncio_ms':<18}{report['asyncio_ms']:>12.1f} ms",
+            line("import_ms", report["import_ms"], budget.import_ms, "ms"),
+            f"{'modules':<18}{report['modules']:>12}",
+            line("third_party", len(report["third_party"]), budget.third_party)
+            + "".join(f"\n  {name}" for name in report["third_party"]),
+            line("bytes_per_task", report["bytes_per_task"], budget.bytes_per_task, "B"),
+        ]
+    )
@@ -0,0 +1,215 @@
+"""
+Fork server process
+===================
+
+Pre-warmed process forking the tasks launched through a ForkServerLauncher.
+Commands running a Python module or script with the same interpreter are
+run directly in the forked child, skipping interpreter startup and the
+import of preloaded modules. Other commands are forked then exec'd.
+
+This module is run as a script by the launcher and only relies on the
+standard library, and on igniiite.limits for tasks with resource limits.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import json
+import fcntl
+import signal
+import socket
+import select
+import traceback
+
+# Maximum size of a request packet
+MAX_PACKET = 1024 * 1024
+
+# Maximum number of descriptors of a request: stdout, stderr and passed ones
+MAX_FDS = 16
+
+
+##################################
+
+
+def _child(sock, wakeup, request, fds):
+    """Setup the forked child, then run the requested command. Never returns"""
+
+    try:
+        # Leader of its own process group, signalled as a whole like the
+        # tasks of the other launchers
+        os.setsid()
+
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        sock.close()
+        for fd in wakeup:
+            os.close(fd)
+
+        # Standard streams
+        stdin = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(stdin, 0)
+        os.dup2(fds[0], 1)
+        os.dup2(fds[1], 2)
+        for fd in (stdin, *fds[:2]):
+            if fd > 2:
+                os.close(fd)
+
+        # Passed descriptors get the numbers they had in the launcher: moved
+        # above all of them first, so that none is overwritten
+        targets = request.get("pass_fds", [])
+        if targets:
+            above = max(targets) + 1
+            moved = [fcntl.fcntl(fd, fcntl.F_DUPFD, above) for fd in fds[2:]]
+            for fd in fds[2:]:
+                os.close(fd)
+            for fd, target in zip(moved, targets):
+                os.dup2(fd, target)
+                os.close(fd)
+
+        if request.get("cwd") is not None:
+            os.chdir(request["cwd"])
+
+        # Resource limits, see igniiite.limits
+        if request.get("setup") is not None:
+            from igniiite.limits import setup_child
+
+            setup_child(request["setup"])
+
+        env = request.get("env")
+        argv = request["argv"]
+
+        if request["mode"] == "python":
+            import runpy
+
+            if env is not None:
+                os.environ.clear()
+                os.environ.update(env)
+
+            try:
+                if argv[1] == "-m":
+                    sys.argv = [argv[2], *argv[3:]]
+                    sys.path[0] = os.getcwd()
+                    runpy.run_module(argv[2], run_name="__main__", alter_sys=True)
+                else:
+                    sys.argv = argv[1:]
+                    sys.path[0] = os.path.dirname(os.path.abspath(argv[1]))
+                    runpy.run_path(argv[1], run_name="__main__")
+                code = 0
+
+            except SystemExit as exc:
+                if exc.code is None or isinstance(exc.code, int):
+                    code = exc.code or 0
+                else:
+                    print(exc.code, file=sys.stderr)
+                    code = 1
+
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+        if env is None:
+            os.execvp(argv[0], argv)
+        else:
+            os.execvpe(argv[0], argv, env)
+
+    except BaseException:
+        traceback.print_exc()
+
+    os._exit(127)
+
+
+def serve(sock, paths, preload):
+    """Serve fork requests until the launcher closes the socket
+
+    Args:
+        sock: the SOCK_SEQPACKET socket connected to the launcher
+        paths: sys.path of the launcher process
+        preload: modules to import before serving
+    """
+
+    sys.path[:] = paths
+    for name in preload:
+        try:
+            __import__(name)
+        except Exception:
+            traceback.print_exc()
+
+    # Terminal interrupts are for the launcher and the tasks, not for us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    wakeup = os.pipe()
+    for fd in wakeup:
+        os.set_blocking(fd, False)
+    signal.set_wakeup_fd(wakeup[1])
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    def send(message):
+        sock.send(json.dumps(message).encode("utf-8"))
+
+    send({"ready": os.getpid()})
+
+    while True:
+        try:
+            readable, _, _ = select.select([sock, wakeup[0]], [], [])
+        except InterruptedError:
+            continue
+
+        if wakeup[0] in readable:
+            try:
+                while os.read(wakeup[0], 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+            # Reap every exited child
+            while True:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+                send({"exit": pid, "returncode": os.waitstatus_to_exitcode(status)})
+
+        if sock in readable:
+            data, fds, _, _ = socket.recv_fds(sock, MAX_PACKET, MAX_FDS)
+            if not data:
+                return
+
+            request = json.loads(data)
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                pid = os.fork()
+                if pid == 0:
+                    _child(sock, wakeup, request, fds)
+
+                send({"id": request["id"], "pid": pid})
+
+            except OSError as exc:
+                send({"id": request["id"], "error": str(exc)})
+
+            finally:
+                for fd in fds:
+                    os.close(fd)
+
+
+def main():
+    # Don't shadow modules with the igniiite package directory
+    del sys.path[0]
+
+    sock = socket.socket(fileno=int(sys.argv[1]))
+    config = json.loads(sys.argv[2])
+    serve(sock, config["paths"], config["preload"])
+
+
+if __name__ == "__main__":
+    main()
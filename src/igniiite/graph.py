@@ -0,0 +1,532 @@
+"""
+Task graph supervision
+======================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import signal
+import asyncio
+import graphlib
+import logging
+
+import traceback
+
+from collections.abc import Iterable
+
+from igniiite.task import Task
+from igniiite.executor import JobDropped, default_executor
+
+
+log = logging.getLogger("igniiite.graph")
+
+
+##################################
+
+
+class _QueuedRun:
+    """Run of a task started on demand, waiting in the executor until admitted"""
+
+    def __init__(self, task, queued):
+        self.task = task
+        self.name = task.name
+        self.queued = queued
+
+    async def run(self):
+        self.queued.discard(self.task)
+        return await self.task.run()
+
+
+##################################
+
+
+class Graph:
+    """A validated dependency graph of tasks
+
+    The graph is checked once when built: every dependency must be part of the
+    graph, and no dependency cycle is allowed. Tasks are then sorted in
+    topological levels: level 0 tasks have no dependencies, level n tasks only
+    depend on tasks from levels < n.
+    """
+
+    def __init__(self, tasks: Iterable[Task]):
+        """Build and validate the graph
+
+        Args:
+            tasks: the tasks of the graph
+
+        Raises:
+            ValueError: a dependency is missing from the graph, or a cycle was found
+        """
+
+        self.tasks = list(dict.fromkeys(tasks))
+        self.dependents = {tt: [] for tt in self.tasks}
+
+        # Check for missing nodes and build reverse edges
+        for tt in self.tasks:
+            for dep in tt.dependencies:
+                if dep not in self.dependents:
+                    raise ValueError(
+                        f"Task '{tt.name}' depends on '{dep.name}' which is not part of the graph"
+                    )
+
+                self.dependents[dep].append(tt)
+
+        # Compute topological levels
+        sorter = graphlib.TopologicalSorter(
+            {tt: tt.dependencies for tt in self.tasks}
+        )
+
+        try:
+            sorter.prepare()
+        except graphlib.CycleError as exc:
+            cycle = " -> ".join(tt.name for tt in exc.args[1])
+            raise ValueError(f"Dependency cycle found: {cycle}") from exc
+
+        self.levels = []
+        self.level_of = {}
+        while sorter.is_active():
+            level = list(sorter.get_ready())
+            for tt in level:
+                self.level_of[tt] = len(self.levels)
+
+            self.levels.append(level)
+            sorter.done(*level)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def __contains__(self, task):
+        return task in self.dependents
+
+    @property
+    def depth(self):
+        """Number of topological levels in the graph"""
+        return len(self.levels)
+
+
+class Supervisor:
+    """Run a whole task graph
+
+    Each task is started as soon as all its dependencies are ready. Dependency
+    tracking relies on task state callbacks, so no coroutine is parked per
+    dependency edge: startup time scales with the graph depth, and bookkeeping
+    with the number of edges.
+
+    If a task fails before its dependents could start, these dependents are
+    marked as failed without being launched.
+
+    On shutdown, tasks are stopped in reverse dependency order: a task is
+    stopped as soon as all its dependents are down, so independent tasks are
+    stopped in parallel, and no task outlives what it depends on.
+    """
+
+    def __init__(self, graph, executor=None):
+        """
+        Args:
+            graph: a Graph, or an iterable of tasks to build one from
+            executor: the JobExecutor running the tasks launched by start(), default_executor if None
+        """
+
+        if not isinstance(graph, Graph):
+            graph = Graph(graph)
+
+        self.graph = graph
+        self.log = log
+
+        self.executor = default_executor if executor is None else executor
+
+        self.running = {}
+        self.done = None
+
+        # Names of the dependencies each waiting task is still waiting for:
+        # a dependency ready again after a restart is not counted twice
+        self.remaining = {}
+
+        # Tasks launched by start() and not admitted by the executor yet
+        self.queued = set()
+
+        # Shutdown future, and duration of the last shutdown in seconds
+        self.stopping = None
+        self.shutdown_time = None
+
+        # Number of graph updates and subtree restarts going on, see update()
+        # and restart(): run() does not return meanwhile
+        self.updating = 0
+
+    def __launch(self, task, priority=None, group=None):
+        # With a priority, the run goes through the executor
+        self.log.debug(
+            f"Launch task '{task.name}' (level {self.graph.level_of[task]})"
+        )
+        runner = asyncio.create_task(self.__run_task(task, priority, group))
+        runner.add_done_callback(self.__check_done)
+        self.running[task] = runner
+
+    async def __run_task(self, task, priority, group):
+        try:
+            if priority is None:
+                await task.run()
+            else:
+                self.queued.add(task)
+                try:
+                    await self.executor.run(_QueuedRun(task, self.queued), priority, group)
+                finally:
+                    self.queued.discard(task)
+
+        except JobDropped:
+            # Do not leave dependents waiting on a run that never started
+            task.set_failed()
+
+        except Exception:
+            self.log.error(f"Task '{task.name}' failed: {traceback.format_exc()}")
+
+    def __skip(self, task, dep, reason):
+        self.log.error(
+            f"Task '{task.name}' not started: dependency '{dep.name}' {reason}"
+        )
+        del self.remaining[task]
+        task.set_failed()
+
+    def __on_state(self, task, state):
+        if self.stopping is not None:
+            return
+
+        if state == "ready":
+            for dependent in self.graph.dependents[task]:
+                if dependent not in self.remaining:
+                    continue
+
+                self.remaining[dependent].discard(task.name)
+                if not self.remaining[dependent]:
+                    del self.remaining[dependent]
+                    self.__launch(dependent)
+
+        elif state in ("failed", "ended"):
+            # Dependents that are still waiting would never start
+            reason = "has failed" if state == "failed" else "has ended"
+            for dependent in self.graph.dependents[task]:
+                if dependent in self.remaining:
+                    self.__skip(dependent, task, reason)
+
+            self.__check_done()
+
+    def __check_done(self, *args):
+        if self.done is None or self.done.done() or self.remaining or self.updating:
+            return
+
+        if all(tt.done() for tt in self.running.values()):
+            self.done.set_result(None)
+
+    async def run(self):
+        """Run the graph until all tasks have ended
+
+        Tasks can only be started or restarted on demand while this is going
+        on, see start() and restart(). Cancelling this coroutine shuts the
+        graph down, see shutdown().
+        """
+
+        self.done = asyncio.get_running_loop().create_future()
+        self.stopping = None
+        self.running = {}
+        self.remaining = {
+            tt: {dep.name for dep in tt.dependencies}
+            for tt in self.graph.tasks
+            if tt.dependencies
+        }
+
+        for tt in self.graph.tasks:
+            tt.watch(self.__on_state)
+
+        try:
+            if self.graph.levels:
+                for tt in self.graph.levels[0]:
+                    self.__launch(tt)
+
+            self.__check_done()
+            await self.done
+
+        finally:
+            if self.stopping is not None or not all(
+                tt.done() for tt in self.running.values()
+            ):
+                await self.shutdown()
+
+            for tt in self.graph.tasks:
+                tt.unwatch(self.__on_state)
+
+    async def shutdown(self):
+        """Stop every running task, in reverse dependency order
+
+        Tasks not started yet are not started anymore. Each task is stopped
+        with its own stop signal and grace period, see Task.stop(). Calling
+        this while a shutdown is going on waits for it.
+
+        Returns:
+            the shutdown duration, in seconds
+        """
+
+        if self.stopping is None:
+            self.stopping = asyncio.ensure_future(self.__shutdown())
+
+        return await asyncio.shield(self.stopping)
+
+    async def __shutdown(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        self.remaining.clear()
+        self.log.info("Stopping task graph")
+
+        await self.__stop_tasks(self.graph.tasks)
+
+        self.shutdown_time = loop.time() - start
+        self.log.info(f"Task graph stopped in {self.shutdown_time:.3f}s")
+        self.__check_done()
+
+        return self.shutdown_time
+
+    async def __stop_tasks(self, tasks):
+        tasks = set(tasks)
+
+        # Dependents are in later levels, so their stoppers exist first
+        stoppers = {}
+        for level in reversed(self.graph.levels):
+            for tt in level:
+                if tt not in tasks:
+                    continue
+
+                after = [
+                    stoppers[dependent]
+                    for dependent in self.graph.dependents[tt]
+                    if dependent in stoppers
+                ]
+                stoppers[tt] = asyncio.create_task(self.__stop_task(tt, after))
+
+        if stoppers:
+            await asyncio.wait(stoppers.values())
+
+    async def __stop_task(self, task, after):
+        if after:
+            await asyncio.wait(after)
+
+        runner = self.running.get(task)
+        if runner is None or runner.done():
+            return
+
+        try:
+            if task.process is None or task in self.queued:
+                # Not launched yet
+                runner.cancel()
+            else:
+                await task.stop()
+
+        except Exception:
+            self.log.error(f"Failed to stop task '{task.name}': {traceback.format_exc()}")
+            runner.cancel()
+
+        await asyncio.wait((runner,))
+
+    def subtree(self, task):
+        """Get a task and all the tasks depending on it, directly or not
+
+        Args:
+            task: the root task
+
+        Returns:
+            the tasks, in topological order
+        """
+
+        found = {task}
+        pending = [task]
+        while pending:
+            for dependent in self.graph.dependents[pending.pop()]:
+                if dependent not in found:
+                    found.add(dependent)
+                    pending.append(dependent)
+
+        return [tt for tt in self.graph.tasks if tt in found]
+
+    def is_running(self, task):
+        """Check if a task has been launched, and has not ended yet
+
+        Args:
+            task: a task of the graph
+        """
+
+        runner = self.running.get(task)
+        return runner is not None and not runner.done()
+
+    def __check_running(self):
+        # Tasks launched once run() returned would not be supervised
+        if self.stopping is not None:
+            raise RuntimeError("Task graph is shutting down")
+
+        if self.done is None or self.done.done():
+            raise RuntimeError("Task graph is not running")
+
+    def start(self, task, subtree=False, priority=0, group=None):
+        """Launch a task that is not running, even if its dependencies are not ready yet
+
+        The task waits for its dependencies by itself, see Task.run(). Runs
+        started on demand go through the executor, and count against its
+        limits while they run.
+
+        Args:
+            task: a task of the graph
+            subtree: also launch the tasks depending on it, see subtree()
+            priority: priority of the runs in the executor
+            group: executor group of the runs, see JobExecutor
+
+        Returns:
+            the launched tasks
+
+        Raises:
+            RuntimeError: run() is not going on, or the graph is shutting down
+        """
+
+        self.__check_running()
+
+        started = []
+        for tt in self.subtree(task) if subtree else (task,):
+            if self.is_running(tt):
+                continue
+
+            self.remaining.pop(tt, None)
+            self.__launch(tt, priority, group)
+            started.append(tt)
+
+        return started
+
+    async def stop(self, task, subtree=False):
+        """Stop a running task, see Task.stop()
+
+        Tasks depending on it are left running, unless subtree is set: they
+        are then stopped first, in reverse dependency order, as on shutdown.
+
+        Args:
+            task: a task of the graph
+            subtree: also stop the tasks depending on it, see subtree()
+        """
+
+        await self.__stop_tasks(self.subtree(task) if subtree else (task,))
+
+    async def restart(self, task, subtree=False, priority=0, group=None):
+        """Restart a task, or start it if not running
+
+        A running task is restarted in place, see Task.restart(). With subtree
+        set, the task and its dependents are stopped in reverse dependency
+        order, then launched again. Launched tasks go through the executor,
+        see start().
+
+        Args:
+            task: a task of the graph
+            subtree: also restart the tasks depending on it, see subtree()
+            priority: priority of the launched runs in the executor
+            group: executor group of the launched runs, see JobExecutor
+
+        Raises:
+            RuntimeError: run() is not going on, or the graph is shutting down
+        """
+
+        self.__check_running()
+
+        if subtree:
+            # Keep run() going while the whole subtree is down
+            self.updating += 1
+            try:
+                await self.stop(task, subtree=True)
+                self.start(task, True, priority, group)
+            finally:
+                self.updating -= 1
+                self.__check_done()
+
+        elif self.is_running(task) and task.process is not None:
+            await task.restart()
+
+        elif not self.is_running(task):
+            self.start(task, False, priority, group)
+
+    async def update(self, graph):
+        """Switch to a new version of the graph
+
+        Tasks are matched by name. Tasks that are not part of the new graph,
+        or that are replaced by another Task object, are stopped in reverse
+        dependency order. Tasks new to the graph are then launched as their
+        dependencies get ready. Other tasks are left running.
+
+        Args:
+            graph: a Graph, or an iterable of tasks to build one from
+
+        Returns:
+            (stopped tasks, new tasks)
+        """
+
+        if not isinstance(graph, Graph):
+            graph = Graph(graph)
+
+        if self.stopping is not None:
+            raise RuntimeError("Task graph is shutting down")
+
+        kept = {tt.name: tt for tt in graph.tasks}
+        outgoing = [tt for tt in self.graph.tasks if kept.get(tt.name) is not tt]
+
+        current = {id(tt) for tt in self.graph.tasks}
+        incoming = [tt for tt in graph.tasks if id(tt) not in current]
+
+        # Keep run() going while the graph has no running task
+        self.updating += 1
+        try:
+            await self.__stop_tasks(outgoing)
+
+            for tt in outgoing:
+                tt.unwatch(self.__on_state)
+                self.running.pop(tt, None)
+                self.remaining.pop(tt, None)
+
+            self.graph = graph
+
+            # Not running: tasks are launched by run()
+            if self.done is None or self.done.done():
+                return outgoing, incoming
+
+            for tt in incoming:
+                tt.watch(self.__on_state)
+
+            for tt in incoming:
+                dead = [
+                    dep
+                    for dep in tt.dependencies
+                    if dep.failed.is_set() or (dep.ended.is_set() and not dep.ready.is_set())
+                ]
+                waiting = {dep.name for dep in tt.dependencies if not dep.ready.is_set()}
+                if dead:
+                    self.remaining[tt] = waiting
+                    self.__skip(tt, dead[0], "is down")
+                elif waiting:
+                    self.remaining[tt] = waiting
+                else:
+                    self.__launch(tt)
+
+        finally:
+            self.updating -= 1
+            self.__check_done()
+
+        return outgoing, incoming
+
+    def install_signal_handlers(self, signals=(signal.SIGINT, signal.SIGTERM)):
+        """Shut the graph down when one of the given signals is received
+
+        Args:
+            signals: the signals to handle
+        """
+
+        loop = asyncio.get_running_loop()
+        for sig in signals:
+            loop.add_signal_handler(
+                sig, lambda: asyncio.ensure_future(self.shutdown())
+            )
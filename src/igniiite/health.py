@@ -0,0 +1,387 @@
+"""
+Task health checks
+==================
+
+Liveness checks of ready tasks. Every check of every task runs from a
+single HealthMonitor: checks are ordered in a heap by due time, and a
+semaphore caps the number of checks running at once, so that a lot of
+tasks checked often never pile up processes or connections.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import heapq
+import asyncio
+import logging
+import itertools
+
+import traceback
+
+from dataclasses import dataclass
+
+
+log = logging.getLogger(__name__)
+
+HEALTH_ACTIONS = ("none", "fail")
+
+
+##################################
+
+
+class ExecProbe:
+    """Healthy when a command exits with a zero return code"""
+
+    def __init__(self, command):
+        """
+        Args:
+            command: the command to run
+        """
+
+        self.command = list(command)
+
+    def __repr__(self):
+        return f"ExecProbe({self.command!r})"
+
+    async def __call__(self, task):
+        process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+
+        try:
+            return await process.wait() == 0
+
+        except asyncio.CancelledError:
+            # Timed out: don't leave the command behind
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            raise
+
+
+class TcpProbe:
+    """Healthy when a TCP port accepts connections"""
+
+    def __init__(self, port, host="127.0.0.1"):
+        """
+        Args:
+            port: the port to connect to
+            host: the host to connect to
+        """
+
+        self.port = port
+        self.host = host
+
+    def __repr__(self):
+        return f"TcpProbe({self.port!r}, {self.host!r})"
+
+    async def __call__(self, task):
+        _, writer = await asyncio.open_connection(self.host, self.port)
+        writer.close()
+        await writer.wait_closed()
+
+        return True
+
+
+class HttpProbe:
+    """Healthy when a HTTP GET request gets a successful status"""
+
+    def __init__(self, port, path="/", host="127.0.0.1", statuses=range(200, 400)):
+        """
+        Args:
+            port: the port to connect to
+            path: the requested path
+            host: the host to connect to
+            statuses: the status codes considered healthy
+        """
+
+        self.port = port
+        self.path = path
+        self.host = host
+        self.statuses = statuses
+
+    def __repr__(self):
+        return f"HttpProbe({self.port!r}, {self.path!r}, {self.host!r})"
+
+    async def __call__(self, task):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+
+        try:
+            writer.write(
+                f"GET {self.path} HTTP/1.0\r\nHost: {self.host}\r\n"
+                f"Connection: close\r\n\r\n".encode("ascii")
+            )
+            await writer.drain()
+
+            status = await reader.readline()
+            parts = status.split()
+            return (
+                len(parts) >= 2
+                and parts[0].startswith(b"HTTP/")
+                and int(parts[1]) in self.statuses
+            )
+
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+@dataclass
+class HealthCheck:
+    """Health check settings of a task"""
+
+    """The probe: ExecProbe, TcpProbe, HttpProbe, or a coroutine function called with the task and returning True when healthy"""
+    probe: object
+
+    """Time between the start of two checks, in seconds"""
+    interval: float = 10.0
+
+    """Time after which a check is considered failed"""
+    timeout: float = 5.0
+
+    """Consecutive failed checks after which the task is unhealthy"""
+    failure_threshold: int = 3
+
+    """Consecutive successful checks after which the task is healthy"""
+    success_threshold: int = 1
+
+    """Delay between the task process start and the first check"""
+    start_period: float = 0.0
+
+    """What to do with an unhealthy task: none, or fail (stop it as failed, see Task.fail)"""
+    action: str = "none"
+
+    def __post_init__(self):
+        if self.interval <= 0 or self.timeout <= 0:
+            raise ValueError(
+                f"interval = {self.interval!r} and timeout = {self.timeout!r} must be positive"
+            )
+
+        if self.failure_threshold < 1 or self.success_threshold < 1:
+            raise ValueError(
+                f"failure_threshold = {self.failure_threshold!r} and success_threshold = {self.success_threshold!r} must be at least 1"
+            )
+
+        if self.action not in HEALTH_ACTIONS:
+            raise ValueError(f"action = {self.action!r} is not one of {HEALTH_ACTIONS}")
+
+
+class HealthState:
+    """Health check results of a task"""
+
+    __slots__ = ("successes", "failures", "checks", "last_duration", "last_error")
+
+    def __init__(self):
+        # Consecutive successful and failed checks
+        self.successes = 0
+        self.failures = 0
+
+        # Total number of checks, duration and error of the last one
+        self.checks = 0
+        self.last_duration = None
+        self.last_error = None
+
+
+##################################
+
+
+class HealthMonitor:
+    """Run the health checks of all the tasks
+
+    A task is checked once ready, every interval, and never with two checks
+    at once. Its health goes from "starting" to "healthy" after
+    success_threshold successful checks, and to "unhealthy" after
+    failure_threshold failed ones. Each change is notified to the task
+    watchers as a "healthy" or "unhealthy" state.
+    """
+
+    def __init__(self, max_concurrency: int = 16):
+        """
+        Args:
+            max_concurrency: maximum number of checks running at once
+        """
+
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+        # Heap of (due time, sequence, task). A task entry is valid as long
+        # as its sequence is the one kept in self.tasks
+        self.heap = []
+        self.counter = itertools.count()
+        self.tasks = {}
+        self.states = {}
+
+        self.runner = None
+        self.wakeup = None
+        self.checks = set()
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def add(self, task):
+        """Start checking a task, according to its health_check settings
+
+        Args:
+            task: the task, with health_check set
+        """
+
+        self.states[task] = HealthState()
+        task.set_health("starting")
+
+        loop = asyncio.get_running_loop()
+        self.__push(task, loop.time() + task.health_check.start_period)
+
+    def remove(self, task):
+        """Stop checking a task. A check going on is left to complete
+
+        Args:
+            task: the checked task
+        """
+
+        self.tasks.pop(task, None)
+        self.states.pop(task, None)
+
+        # Keep the heap from growing with removed entries
+        if len(self.heap) > 2 * len(self.tasks) + 16:
+            self.heap = [entry for entry in self.heap if self.tasks.get(entry[2]) == entry[1]]
+            heapq.heapify(self.heap)
+
+    def state(self, task):
+        """Get the health check results of a task
+
+        Args:
+            task: the checked task
+        """
+
+        return self.states[task]
+
+    def __push(self, task, when):
+        seq = next(self.counter)
+        self.tasks[task] = seq
+        heapq.heappush(self.heap, (when, seq, task))
+
+        # Wake the runner up if this check is now the earliest one
+        if self.runner is None:
+            self.runner = asyncio.get_running_loop().create_task(self.run())
+        elif self.heap[0][1] == seq:
+            self.__wake()
+
+    def __wake(self):
+        if self.wakeup is not None and not self.wakeup.done():
+            self.wakeup.set_result(None)
+
+    def __head(self):
+        while self.heap:
+            _, seq, task = self.heap[0]
+            if self.tasks.get(task) == seq:
+                return self.heap[0]
+            heapq.heappop(self.heap)
+
+        return None
+
+    async def run(self):
+        """Run the due checks, until no check is planned
+
+        The runner is started again as soon as a check is planned.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        try:
+            while True:
+                head = self.__head()
+                if head is None:
+                    break
+
+                delay = head[0] - loop.time()
+                if delay > 0:
+                    self.wakeup = loop.create_future()
+                    timer = loop.call_later(delay, self.__wake)
+                    try:
+                        await self.wakeup
+                    finally:
+                        timer.cancel()
+                    continue
+
+                _, seq, task = heapq.heappop(self.heap)
+                check = loop.create_task(self.__check(task, seq))
+                self.checks.add(check)
+                check.add_done_callback(self.checks.discard)
+
+        finally:
+            self.runner = None
+            self.wakeup = None
+
+    async def __check(self, task, seq):
+        loop = asyncio.get_running_loop()
+        settings = task.health_check
+
+        # Not ready yet: try again later, without checking
+        if not task.ready.is_set():
+            self.__reschedule(task, seq, loop.time() + settings.interval)
+            return
+
+        async with self.semaphore:
+            start = loop.time()
+            error = None
+            try:
+                healthy = await asyncio.wait_for(settings.probe(task), settings.timeout)
+                if not healthy:
+                    error = "probe failed"
+
+            except asyncio.TimeoutError:
+                error = f"timed out after {settings.timeout}s"
+
+            except Exception as exc:
+                error = str(exc) or type(exc).__name__
+                log.debug(traceback.format_exc())
+
+            duration = loop.time() - start
+
+        if self.tasks.get(task) != seq:
+            return
+
+        self.__record(task, settings, error, duration)
+        self.__reschedule(task, seq, start + settings.interval)
+
+    def __reschedule(self, task, seq, when):
+        if self.tasks.get(task) == seq:
+            self.__push(task, max(when, asyncio.get_running_loop().time()))
+
+    def __record(self, task, settings, error, duration):
+        state = self.states[task]
+        state.checks += 1
+        state.last_duration = duration
+        state.last_error = error
+
+        if error is None:
+            state.successes += 1
+            state.failures = 0
+            if task.health != "healthy" and state.successes >= settings.success_threshold:
+                task.set_health("healthy")
+
+        else:
+            state.failures += 1
+            state.successes = 0
+            task.log.warning(
+                f"Health check of '{task.name}' failed ({state.failures}/{settings.failure_threshold}): {error}"
+            )
+
+            if task.health != "unhealthy" and state.failures >= settings.failure_threshold:
+                task.set_health("unhealthy")
+
+                if settings.action == "fail":
+                    failing = asyncio.create_task(task.fail("health check failed"))
+                    self.checks.add(failing)
+                    failing.add_done_callback(self.checks.discard)
+
+
+# Monitor running the checks of the tasks with a health_check
+default_monitor = HealthMonitor()
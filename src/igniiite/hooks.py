@@ -6,43 +6,62 @@ Hooks factory for various behaviours
 - April 2024
 """
 
+import os
 import re
+import errno
 import asyncio
+import logging
 
 from functools import partial
 
+
+log = logging.getLogger(__name__)
+
+# Adaptive polling: first interval, growth factor, default maximum interval
+POLL_FIRST = 0.005
+POLL_FACTOR = 1.5
+POLL_MAX = 0.5
+
+# Socket states in /proc/<pid>/net files
+TCP_LISTEN = "0A"
+UNIX_ACCEPTCON = 0x10000
+
+# inotify constants
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+
 ###########################################
 
 
-def wait_for_str_re(regex):
+def wait_for_str_re(regex, stream="stderr"):
     """Wait for a output line matching a pattern to indicate task is ready
 
+    All patterns waited on a task share the task matcher, so each output
+    line is scanned once whatever the number of hooks.
+
     Args:
         regex: the regex to match on
+        stream: the output to match on: "stdout", "stderr" or "both"
     """
 
     # Ensure regex is a compiled regex
     if not isinstance(regex, re.Pattern):
         regex = re.compile(regex)
 
-    async def wait_for_str_re_impl(task, regex):
+    async def wait_for_str_re_impl(task, regex, stream):
         task.log.info(f"Waiting for '{task.name}' to be ready!")
 
-        ready = False
-        queue = asyncio.Queue()
-
-        try:
-            await task.stderr_listeners.register(queue)
-            while not ready:
-                line = await queue.get()
-                if regex.search(line):
-                    ready = True
-                    task.set_ready()
-
-        finally:
-            await task.stderr_listeners.unregister(queue)
+        await task.matcher.wait_for(regex, stream)
+        task.set_ready()
 
-    return partial(wait_for_str_re_impl, regex=regex)
+    return partial(wait_for_str_re_impl, regex=regex, stream=stream)
 
 
 def wait_for_seconds(nseconds):
@@ -58,3 +77,427 @@ def wait_for_seconds(nseconds):
         task.set_ready()
 
     return partial(wait_for_seconds_impl, seconds=nseconds)
+
+
+###########################################
+
+
+def poll_intervals(first=POLL_FIRST, maximum=POLL_MAX, factor=POLL_FACTOR):
+    """Adaptive polling intervals: short at first, then growing up to a maximum
+
+    Services are usually either ready very quickly or after a while, so early
+    checks are frequent to catch fast starts, and get sparser to avoid busy
+    looping on slow ones.
+
+    Args:
+        first: first interval, in seconds
+        maximum: maximum interval, in seconds
+        factor: growth factor between two intervals
+    """
+
+    interval = first
+    while True:
+        yield interval
+        interval = min(interval * factor, maximum)
+
+
+async def _poll(check, max_interval):
+    for interval in poll_intervals(maximum=max_interval):
+        if await check():
+            return
+
+        await asyncio.sleep(interval)
+
+
+def wait_for_tcp(port, host="127.0.0.1", max_interval=POLL_MAX):
+    """Indicate task is ready once a TCP port accepts connections
+
+    Args:
+        port: the port to connect to
+        host: the host to connect to
+        max_interval: maximum time between two connection attempts
+    """
+
+    async def wait_for_tcp_impl(task, port, host, max_interval):
+        task.log.info(f"Waiting for '{task.name}' to accept connections on {host}:{port}")
+
+        async def check():
+            return await _try_connect(asyncio.open_connection(host, port))
+
+        await _poll(check, max_interval)
+        task.set_ready()
+
+    return partial(wait_for_tcp_impl, port=port, host=host, max_interval=max_interval)
+
+
+def wait_for_unix(path, max_interval=POLL_MAX):
+    """Indicate task is ready once a Unix socket accepts connections
+
+    Args:
+        path: the socket path
+        max_interval: maximum time between two connection attempts
+    """
+
+    async def wait_for_unix_impl(task, path, max_interval):
+        task.log.info(f"Waiting for '{task.name}' to accept connections on {path}")
+
+        async def check():
+            return await _try_connect(asyncio.open_unix_connection(path))
+
+        await _poll(check, max_interval)
+        task.set_ready()
+
+    return partial(wait_for_unix_impl, path=path, max_interval=max_interval)
+
+
+async def _try_connect(connection):
+    try:
+        _, writer = await asyncio.wait_for(connection, timeout=1.0)
+    except (OSError, asyncio.TimeoutError):
+        return False
+
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+    return True
+
+
+###########################################
+
+
+def _read_text(path):
+    try:
+        with open(path) as fhandle:
+            return fhandle.read()
+    except OSError:
+        return ""
+
+
+def listening_inodes(pid, port=None, path=None):
+    """Inodes of the listening sockets seen from the network namespace of a process
+
+    Args:
+        pid: the process
+        port: only TCP sockets listening on this port
+        path: only Unix sockets listening on this path, "@name" for abstract sockets
+
+    Returns:
+        set of socket inodes
+    """
+
+    inodes = set()
+
+    if path is None:
+        for name in ("tcp", "tcp6"):
+            for line in _read_text(f"/proc/{pid}/net/{name}").splitlines()[1:]:
+                fields = line.split()
+                if len(fields) < 10 or fields[3] != TCP_LISTEN:
+                    continue
+
+                if port is None or int(fields[1].rsplit(":", 1)[1], 16) == port:
+                    inodes.add(int(fields[9]))
+
+    if port is None:
+        for line in _read_text(f"/proc/{pid}/net/unix").splitlines()[1:]:
+            fields = line.split()
+            if len(fields) < 7 or not int(fields[3], 16) & UNIX_ACCEPTCON:
+                continue
+
+            if path is None or (len(fields) >= 8 and fields[7] == path):
+                inodes.add(int(fields[6]))
+
+    return inodes
+
+
+def socket_inodes(pid):
+    """Inodes of the sockets opened by a process
+
+    Args:
+        pid: the process
+    """
+
+    inodes = set()
+    try:
+        names = os.listdir(f"/proc/{pid}/fd")
+    except OSError:
+        return inodes
+
+    for name in names:
+        try:
+            target = os.readlink(f"/proc/{pid}/fd/{name}")
+        except OSError:
+            continue
+
+        if target.startswith("socket:["):
+            inodes.add(int(target[8:-1]))
+
+    return inodes
+
+
+def _children(pid):
+    # None if the kernel has no children files, see proc(5)
+    try:
+        threads = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return []
+
+    children = []
+    for tid in threads:
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children") as fhandle:
+                children.extend(int(child) for child in fhandle.read().split())
+        except FileNotFoundError:
+            if not os.path.exists(f"/proc/{pid}/task/{tid}"):
+                continue
+            return None
+        except OSError:
+            continue
+
+    return children
+
+
+def _process_tree(pid):
+    # Only the tree is read, unless the kernel has no children files
+    tree = [pid]
+    for current in tree:
+        children = _children(current)
+        if children is None:
+            break
+        tree.extend(children)
+    else:
+        return tree
+
+    from igniiite.metrics import scan_processes
+
+    stats = scan_processes()
+    tree = [pid]
+    for current in tree:
+        tree.extend(child for child, stat in stats.items() if stat["ppid"] == current)
+
+    return tree
+
+
+def _descendant_listening(pid, listening):
+    return any(socket_inodes(child) & listening for child in _process_tree(pid)[1:])
+
+
+def is_listening(pid, port=None, path=None):
+    """Tell if a process, or one of its children, listens on a socket
+
+    Args:
+        pid: the process
+        port: TCP port to look for, any socket if both port and path are None
+        path: Unix socket path to look for
+
+    Returns:
+        True if a matching listening socket is opened by the process tree
+    """
+
+    listening = listening_inodes(pid, port, path)
+    if not listening:
+        return False
+
+    if socket_inodes(pid) & listening:
+        return True
+
+    # The socket may belong to a child, such as a worker or a daemonized process
+    return _descendant_listening(pid, listening)
+
+
+def wait_for_listen(port=None, path=None, max_interval=POLL_MAX):
+    """Indicate task is ready once its process listens on a socket
+
+    The sockets of the process are looked up in /proc, so no connection is
+    made to the service. The process, or one of its children, must own the
+    listening socket.
+
+    Args:
+        port: TCP port to look for
+        path: Unix socket path to look for
+        max_interval: maximum time between two checks
+
+    If both port and path are None, any listening socket will do.
+    """
+
+    async def wait_for_listen_impl(task, port, path, max_interval):
+        what = path if path is not None else (f"port {port}" if port is not None else "any socket")
+        task.log.info(f"Waiting for '{task.name}' to listen on {what}")
+
+        async def check():
+            if task.process is None:
+                return False
+
+            # As is_listening(), the process tree is only walked if needed
+            pid = task.process.pid
+            listening = listening_inodes(pid, port, path)
+            if not listening:
+                return False
+            if socket_inodes(pid) & listening:
+                return True
+
+            # Out of the event loop, there may be many processes to read
+            return await asyncio.to_thread(_descendant_listening, pid, listening)
+
+        await _poll(check, max_interval)
+        task.set_ready()
+
+    return partial(wait_for_listen_impl, port=port, path=path, max_interval=max_interval)
+
+
+###########################################
+
+
+class Inotify:
+    """Minimal inotify wrapper, waking asyncio waiters on any event"""
+
+    def __init__(self):
+        """
+        Raises:
+            OSError: inotify is not available
+        """
+
+        import ctypes
+
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+        self.event = asyncio.Event()
+        asyncio.get_running_loop().add_reader(self.fd, self.__on_readable)
+
+    def __on_readable(self):
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        self.event.set()
+
+    def add_watch(self, path, mask):
+        """Watch a path
+
+        Args:
+            path: the watched path
+            mask: inotify events mask
+
+        Raises:
+            OSError: the path can't be watched
+        """
+
+        import ctypes
+
+        if self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+
+    async def wait(self, timeout):
+        """Wait for an event, or for the timeout to expire
+
+        Args:
+            timeout: maximum wait time, in seconds
+        """
+
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        self.event.clear()
+
+    def close(self):
+        asyncio.get_running_loop().remove_reader(self.fd)
+        os.close(self.fd)
+
+
+def _pidfile_alive(path):
+    try:
+        pid = int(_read_text(path).strip())
+        os.kill(pid, 0)
+    except ValueError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+
+    return True
+
+
+async def _wait_for_path(check, path, max_interval):
+    # Wake up on changes in the parent directory, polling until it exists
+    try:
+        notifier = Inotify()
+    except OSError as exc:
+        log.debug(f"inotify not available, polling {path}: {exc}")
+        await _poll(check, max_interval)
+        return
+
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        watched = False
+        intervals = poll_intervals(maximum=max_interval)
+
+        while not await check():
+            if not watched:
+                try:
+                    notifier.add_watch(
+                        directory,
+                        IN_CREATE | IN_MOVED_TO | IN_CLOSE_WRITE | IN_MODIFY | IN_ATTRIB
+                        | IN_DELETE_SELF | IN_MOVE_SELF,
+                    )
+                    watched = True
+
+                    # The file may have appeared before the watch was set
+                    continue
+                except OSError as exc:
+                    if exc.errno not in (errno.ENOENT, errno.ENOTDIR):
+                        raise
+
+            # Events are only a hint, keep a slow poll as safety net
+            await notifier.wait(max_interval if watched else next(intervals))
+
+    finally:
+        notifier.close()
+
+
+def wait_for_file(path, pidfile=False, max_interval=POLL_MAX):
+    """Indicate task is ready once a file exists
+
+    Changes are watched with inotify when available, with polling as
+    fallback.
+
+    Args:
+        path: the file path
+        pidfile: the file must also contain the pid of a running process
+        max_interval: maximum time between two checks
+    """
+
+    async def wait_for_file_impl(task, path, pidfile, max_interval):
+        task.log.info(f"Waiting for '{task.name}' to create {path}")
+
+        async def check():
+            if pidfile:
+                return _pidfile_alive(path)
+            return os.path.exists(path)
+
+        await _wait_for_path(check, path, max_interval)
+        task.set_ready()
+
+    return partial(wait_for_file_impl, path=path, pidfile=pidfile, max_interval=max_interval)
+
+
+def wait_for_pidfile(path, max_interval=POLL_MAX):
+    """Indicate task is ready once a pidfile names a running process
+
+    Args:
+        path: the pidfile path
+        max_interval: maximum time between two checks
+    """
+
+    return wait_for_file(path, pidfile=True, max_interval=max_interval)
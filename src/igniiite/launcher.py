@@ -0,0 +1,436 @@
+"""
+Process launch backends
+=======================
+
+A launcher creates the process of a task. Launchers expose a single
+coroutine, spawn(command, env=None, cwd=None, pass_fds=(), setup=None),
+returning an object behaving like asyncio.subprocess.Process, with stdout
+and stderr piped. setup, when given, holds limits applied by the child
+before exec: through igniiite.limits.setup_child(), if the launcher forks
+from a single threaded process, or by wrapping the command with
+igniiite.limits.limits_command() if it forks the supervisor itself.
+
+Processes may also have an exited future, resolved with the return code
+as soon as the process exits, and a close() method closing the pipes.
+Unlike wait(), the exited future does not wait for the outputs to be
+closed, which a leftover grandchild may keep open.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import json
+import shutil
+import signal
+import socket
+import asyncio
+import logging
+
+from igniiite import forkserver
+
+
+log = logging.getLogger(__name__)
+
+
+##################################
+
+
+# Stream buffer limit, as asyncio.create_subprocess_exec() uses
+STREAM_LIMIT = 64 * 1024
+
+
+class _ExecProtocol(asyncio.subprocess.SubprocessStreamProtocol):
+    def __init__(self, limit, loop):
+        super().__init__(limit, loop)
+        self.exited = loop.create_future()
+
+    def process_exited(self):
+        # The transport is dropped once the pipes are closed too
+        returncode = self._transport.get_returncode()
+        super().process_exited()
+        if not self.exited.done():
+            self.exited.set_result(returncode)
+
+
+class ExecProcess(asyncio.subprocess.Process):
+    """A process launched by ExecLauncher, the leader of its own process group
+
+    Signals are sent to the whole process group.
+    """
+
+    def __init__(self, transport, protocol, loop):
+        super().__init__(transport, protocol, loop)
+        self.exited = protocol.exited
+
+    def send_signal(self, sig):
+        try:
+            os.killpg(self.pid, sig)
+        except ProcessLookupError:
+            if self.returncode is None:
+                raise
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+    def close(self):
+        """Close the pipes, even if still held open by other processes"""
+
+        self._transport.close()
+
+
+class ExecLauncher:
+    """Default launcher: fork and exec each command from the current process
+
+    Each command runs in its own session, so that stopping it also stops
+    the processes it started.
+    """
+
+    async def spawn(self, command, env=None, cwd=None, pass_fds=(), setup=None):
+        """Launch a command
+
+        Args:
+            command: the command to launch
+            env: the process environment, inherited if None
+            cwd: the process working directory, inherited if None
+            pass_fds: file descriptors kept open in the process
+            setup: limits applied by the process before exec, see igniiite.limits.prepare_limits()
+        """
+
+        if setup is not None:
+            from igniiite.limits import limits_command
+
+            command = limits_command(command, setup)
+
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.subprocess_exec(
+            lambda: _ExecProtocol(STREAM_LIMIT, loop),
+            *command,
+            stdin=None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            cwd=cwd,
+            pass_fds=pass_fds,
+            start_new_session=True,
+        )
+
+        return ExecProcess(transport, protocol, loop)
+
+
+# Launcher used by tasks with no explicit launcher
+default_launcher = ExecLauncher()
+
+
+##################################
+
+
+async def _pipe_reader(fd):
+    # Returns the stream reader, and the pipe transport closing it
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    transport, _ = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, "rb", 0)
+    )
+
+    return reader, transport
+
+
+def _close_pipes(transports):
+    for transport in transports:
+        transport.close()
+
+
+class ForkServerProcess:
+    """A process forked by a fork server, mimics asyncio.subprocess.Process
+
+    The process is the leader of its own process group, signals are sent to
+    the whole process group.
+    """
+
+    def __init__(self, pid, stdout, stderr, exited):
+        self.pid = pid
+        self.stdout, stdout_transport = stdout
+        self.stderr, stderr_transport = stderr
+        self.returncode = None
+        self.exited = exited
+        self.transports = (stdout_transport, stderr_transport)
+
+        # Set as soon as the process exits, whether or not wait() is called
+        exited.add_done_callback(self.__on_exit)
+
+    def __on_exit(self, exited):
+        if not exited.cancelled():
+            self.returncode = exited.result()
+
+    async def wait(self):
+        """Wait for the process to exit, and return its return code"""
+
+        if self.returncode is None:
+            await asyncio.shield(self.exited)
+            # The exit callback is not run yet if exited was already done
+            self.__on_exit(self.exited)
+
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.returncode is not None or self.exited.done():
+            return
+
+        try:
+            os.killpg(self.pid, sig)
+        except ProcessLookupError:
+            # Forked but setsid() not called yet: the group is the process
+            os.kill(self.pid, sig)
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+    def close(self):
+        """Close the pipes, even if still held open by other processes"""
+
+        _close_pipes(self.transports)
+
+
+class ForkServerLauncher:
+    """Launch tasks from a pre-warmed fork server
+
+    The fork server is a small Python process started once, which imports the
+    preload modules then forks a child per launched task. Commands running
+    a Python module or script with the current interpreter, such as
+    (sys.executable, "-m", "package.job"), run directly in the forked child:
+    interpreter startup and the import of preloaded modules are skipped.
+    Other commands are exec'd from the child of the small server, instead of
+    forking the (possibly large) supervisor process.
+
+    Children standard input is /dev/null. As the server is single threaded,
+    resource limits are applied by the children before exec.
+    """
+
+    def __init__(self, preload=()):
+        """
+        Args:
+            preload: names of modules imported by the server before forking
+        """
+
+        self.preload = tuple(preload)
+
+        self.server = None
+        self.sock = None
+        self.ready = None
+        self.requests = {}
+        self.exits = {}
+        self.next_id = 0
+
+        self.__pythons = {}
+
+    async def start(self):
+        """Start the fork server, if not already started"""
+
+        if self.ready is None:
+            self.ready = asyncio.get_running_loop().create_future()
+            try:
+                await self.__start()
+            except BaseException:
+                self.ready = None
+                raise
+
+        await self.ready
+
+    async def __start(self):
+        loop = asyncio.get_running_loop()
+        ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+
+        try:
+            config = json.dumps({"paths": sys.path, "preload": self.preload})
+            self.server = await asyncio.create_subprocess_exec(
+                sys.executable,
+                forkserver.__file__,
+                str(theirs.fileno()),
+                config,
+                stdin=asyncio.subprocess.DEVNULL,
+                pass_fds=(theirs.fileno(),),
+            )
+        finally:
+            theirs.close()
+
+        ours.setblocking(False)
+        self.sock = ours
+        loop.add_reader(ours.fileno(), self.__on_readable)
+
+        log.debug(f"Fork server started with pid {self.server.pid}")
+
+    async def close(self):
+        """Stop the fork server. Already launched processes are left running"""
+
+        if self.sock is not None:
+            asyncio.get_running_loop().remove_reader(self.sock.fileno())
+            self.sock.close()
+            self.sock = None
+            self.__lost()
+
+        if self.server is not None:
+            await self.server.wait()
+            self.server = None
+
+        self.ready = None
+
+    def __lost(self):
+        error = RuntimeError("Fork server is gone")
+
+        if self.ready is not None and not self.ready.done():
+            self.ready.set_exception(error)
+
+        for future in self.requests.values():
+            if not future.done():
+                future.set_exception(error)
+
+        # Exit status of remaining processes is unknown
+        for future in self.exits.values():
+            if not future.done():
+                future.set_result(255)
+
+        self.requests.clear()
+        self.exits.clear()
+
+    def __on_readable(self):
+        while True:
+            try:
+                data = self.sock.recv(forkserver.MAX_PACKET)
+            except BlockingIOError:
+                return
+            except OSError:
+                data = b""
+
+            if not data:
+                log.error("Fork server has exited")
+                asyncio.get_running_loop().remove_reader(self.sock.fileno())
+                self.sock.close()
+                self.sock = None
+                self.__lost()
+                return
+
+            message = json.loads(data)
+
+            if "exit" in message:
+                future = self.exits.pop(message["exit"], None)
+                if future is not None and not future.done():
+                    future.set_result(message["returncode"])
+
+            elif "id" in message:
+                future = self.requests.pop(message["id"], None)
+                if "error" in message:
+                    error = OSError(message["error"])
+                    if future is not None and not future.done():
+                        future.set_exception(error)
+                    continue
+
+                # Register the exit before anything else can be received
+                exited = asyncio.get_running_loop().create_future()
+                self.exits[message["pid"]] = exited
+                if future is not None and not future.done():
+                    future.set_result((message["pid"], exited))
+
+            elif "ready" in message:
+                if not self.ready.done():
+                    self.ready.set_result(message["ready"])
+
+    async def __send(self, data, fds):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                socket.send_fds(self.sock, [data], fds)
+                return
+            except BlockingIOError:
+                writable = loop.create_future()
+                loop.add_writer(self.sock.fileno(), writable.set_result, None)
+                try:
+                    await writable
+                finally:
+                    loop.remove_writer(self.sock.fileno())
+
+    def __is_python(self, name):
+        if name not in self.__pythons:
+            path = shutil.which(name)
+            self.__pythons[name] = (path is not None) and (
+                os.path.realpath(path) == os.path.realpath(sys.executable)
+            )
+
+        return self.__pythons[name]
+
+    def mode(self, command):
+        """Tell how a command is run: "python" in the forked child, or "exec"
+
+        Args:
+            command: the command to launch
+        """
+
+        if len(command) >= 2 and self.__is_python(command[0]):
+            if command[1] == "-m" and len(command) >= 3:
+                return "python"
+            if command[1].endswith(".py") and not command[1].startswith("-"):
+                return "python"
+
+        return "exec"
+
+    async def spawn(self, command, env=None, cwd=None, pass_fds=(), setup=None):
+        """Launch a command through the fork server
+
+        Args:
+            command: the command to launch
+            env: the process environment, inherited from the server if None
+            cwd: the process working directory, inherited if None
+            pass_fds: file descriptors given to the process, with the same numbers
+            setup: limits applied by the child before exec, see igniiite.limits.prepare_limits()
+        """
+
+        if len(pass_fds) > forkserver.MAX_FDS - 2:
+            raise ValueError(f"pass_fds: at most {forkserver.MAX_FDS - 2} descriptors can be passed")
+
+        await self.start()
+
+        command = [str(arg) for arg in command]
+        request_id = self.next_id
+        self.next_id += 1
+
+        request = {
+            "id": request_id,
+            "argv": command,
+            "mode": self.mode(command),
+            "env": None if env is None else dict(env),
+            "cwd": None if cwd is None else str(cwd),
+            "pass_fds": list(pass_fds),
+            "setup": setup,
+        }
+
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+
+        try:
+            future = asyncio.get_running_loop().create_future()
+            self.requests[request_id] = future
+            await self.__send(
+                json.dumps(request).encode("utf-8"), [stdout_w, stderr_w, *pass_fds]
+            )
+            pid, exited = await future
+
+        except BaseException:
+            self.requests.pop(request_id, None)
+            os.close(stdout_r)
+            os.close(stderr_r)
+            raise
+
+        finally:
+            os.close(stdout_w)
+            os.close(stderr_w)
+
+        return ForkServerProcess(
+            pid, await _pipe_reader(stdout_r), await _pipe_reader(stderr_r), exited
+        )
@@ -0,0 +1,611 @@
+"""
+Task resource limits
+====================
+
+Limits are prepared by the supervisor before the process of a task is
+launched, and applied by the child before exec (see setup_child()), so
+that the command never runs unlimited. Launchers forking a single threaded
+process, such as the fork server, apply them between fork and exec.
+
+Code run between fork and exec of a threaded process (subprocess
+preexec_fn) may deadlock, and the supervisor runs threads, such as the
+output sink writer. Launchers forking the supervisor thus wrap the command
+instead (see limits_command()): this module is run as a script, applies
+the limits to itself, then execs the command.
+
+The supervisor still checks the launched process right after spawn, and
+applies from outside the limits that are not in effect, writing the pid to
+the cgroup.procs of the task cgroup and using prlimit().
+
+When the cgroup v2 hierarchy is writable, each limited task is placed in
+its own sub-group. Limits whose controller is not available fall back to
+rlimits or scheduling priorities.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import json
+import math
+import signal
+import logging
+import platform
+import resource
+
+from dataclasses import dataclass
+from typing import Set
+
+
+log = logging.getLogger(__name__)
+
+IO_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+
+# ioprio_set syscall number per architecture
+SYSCALL_IOPRIO_SET = {
+    "x86_64": 251,
+    "i386": 289,
+    "i686": 289,
+    "aarch64": 30,
+    "riscv64": 30,
+    "armv7l": 314,
+    "ppc64le": 273,
+}
+
+# ioprio_get syscall number per architecture
+SYSCALL_IOPRIO_GET = {
+    "x86_64": 252,
+    "i386": 290,
+    "i686": 290,
+    "aarch64": 31,
+    "riscv64": 31,
+    "armv7l": 315,
+    "ppc64le": 274,
+}
+
+# Period of the cpu.max quota, in microseconds
+CPU_PERIOD = 100_000
+
+# Controllers enabled for the task sub-groups
+CONTROLLERS = ("cpu", "memory", "pids")
+
+
+##################################
+
+
+@dataclass
+class ResourceLimits:
+    """Resource limits of a task"""
+
+    """CPU time quota, in number of cores (0.5 is half a core)"""
+    cpu_quota: float = None
+
+    """CPU weight relative to the other tasks, 1..10000, 100 being the default"""
+    cpu_weight: int = None
+
+    """Maximum memory, in bytes"""
+    memory_max: int = None
+
+    """Maximum number of processes and threads"""
+    pids_max: int = None
+
+    """Nice value, -20..19"""
+    nice: int = None
+
+    """I/O scheduling class, one of realtime, best-effort or idle"""
+    io_class: str = None
+
+    """I/O priority level inside the class, 0 (highest) to 7"""
+    io_level: int = 4
+
+    """CPUs the task may run on"""
+    cpu_affinity: Set[int] = None
+
+    def __post_init__(self):
+        if self.cpu_quota is not None and self.cpu_quota <= 0:
+            raise ValueError(f"cpu_quota = {self.cpu_quota!r} must be positive")
+
+        if self.cpu_weight is not None and not 1 <= self.cpu_weight <= 10000:
+            raise ValueError(f"cpu_weight = {self.cpu_weight!r} is out of 1..10000 range")
+
+        if self.memory_max is not None and self.memory_max <= 0:
+            raise ValueError(f"memory_max = {self.memory_max!r} must be positive")
+
+        if self.pids_max is not None and self.pids_max <= 0:
+            raise ValueError(f"pids_max = {self.pids_max!r} must be positive")
+
+        if self.nice is not None and not -20 <= self.nice <= 19:
+            raise ValueError(f"nice = {self.nice!r} is out of -20..19 range")
+
+        if self.io_class is not None and self.io_class not in IO_CLASSES:
+            raise ValueError(
+                f"io_class = {self.io_class!r} is not one of {tuple(IO_CLASSES)}"
+            )
+
+        if not 0 <= self.io_level <= 7:
+            raise ValueError(f"io_level = {self.io_level!r} is out of 0..7 range")
+
+        if self.cpu_affinity is not None and not self.cpu_affinity:
+            raise ValueError("cpu_affinity must not be empty")
+
+
+def nice_from_weight(weight: int) -> int:
+    """Nice value giving about the same CPU share as a cgroup cpu.weight
+
+    Each nice step is a 1.25 factor of CPU share, nice 0 being weight 100.
+
+    Args:
+        weight: the cgroup cpu.weight
+    """
+
+    nice = -round(math.log(weight / 100, 1.25))
+    return min(max(nice, -20), 19)
+
+
+_libc = None
+
+
+def _ioprio_syscall(table, *args):
+    global _libc
+
+    number = table.get(platform.machine())
+    if number is None:
+        raise OSError(f"I/O priorities are not known on {platform.machine()}")
+
+    import ctypes
+
+    if _libc is None:
+        _libc = ctypes.CDLL(None, use_errno=True)
+
+    result = _libc.syscall(number, IOPRIO_WHO_PROCESS, *args)
+    if result < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+    return result
+
+
+def set_ioprio(pid: int, io_class: str, level: int):
+    """Set the I/O scheduling class and priority of a process
+
+    Args:
+        pid: the process, 0 for the calling one
+        io_class: "realtime", "best-effort" or "idle"
+        level: priority inside the class, 0..7
+
+    Raises:
+        OSError: the priority could not be set
+    """
+
+    _ioprio_syscall(SYSCALL_IOPRIO_SET, pid, (IO_CLASSES[io_class] << IOPRIO_CLASS_SHIFT) | level)
+
+
+def get_ioprio(pid: int):
+    """Get the I/O scheduling class and priority of a process
+
+    Args:
+        pid: the process, 0 for the calling one
+
+    Returns:
+        (class number, level), see IO_CLASSES. Class 0 means none was set
+
+    Raises:
+        OSError: the priority could not be read
+    """
+
+    prio = _ioprio_syscall(SYSCALL_IOPRIO_GET, pid)
+    return prio >> IOPRIO_CLASS_SHIFT, prio & ((1 << IOPRIO_CLASS_SHIFT) - 1)
+
+
+##################################
+
+
+class CgroupManager:
+    """Create one cgroup v2 sub-group per limited task
+
+    Sub-groups are created next to the supervisor, in the cgroup it runs in.
+    As processes can't live in a cgroup that distributes resources to its
+    children, the supervisor moves itself to a "supervisor" leaf if needed.
+    """
+
+    def __init__(self, root="/sys/fs/cgroup", prefix="igniiite-"):
+        """
+        Args:
+            root: mount point of the cgroup v2 hierarchy
+            prefix: prefix of the created sub-groups names
+        """
+
+        self.root = root
+        self.prefix = prefix
+
+        # Base cgroup directory, None if not usable, False if not checked yet
+        self.base = False
+        self.controllers = set()
+
+    def available(self):
+        """Tell if sub-groups can be created, setting up the base group once"""
+
+        if self.base is False:
+            try:
+                self.base = self.__setup()
+            except OSError as exc:
+                log.debug(f"cgroup v2 is not usable: {exc}")
+                self.base = None
+
+        return self.base is not None
+
+    def __setup(self):
+        if not os.path.exists(os.path.join(self.root, "cgroup.controllers")):
+            return None
+
+        with open("/proc/self/cgroup") as fhandle:
+            for line in fhandle:
+                if line.startswith("0::"):
+                    path = line[3:].strip()
+                    break
+            else:
+                return None
+
+        base = os.path.normpath(os.path.join(self.root, path.lstrip("/")))
+        if not os.access(base, os.W_OK):
+            return None
+
+        with open(os.path.join(base, "cgroup.controllers")) as fhandle:
+            wanted = set(fhandle.read().split()) & set(CONTROLLERS)
+
+        if wanted:
+            try:
+                self.__enable(base, wanted)
+            except OSError:
+                # No internal process rule: leave the group to our children
+                leaf = os.path.join(base, "supervisor")
+                os.makedirs(leaf, exist_ok=True)
+                with open(os.path.join(leaf, "cgroup.procs"), "w") as fhandle:
+                    fhandle.write(str(os.getpid()))
+                self.__enable(base, wanted)
+
+        self.controllers = wanted
+        log.debug(f"Task cgroups created in {base}, controllers: {sorted(wanted)}")
+
+        return base
+
+    def __enable(self, base, controllers):
+        with open(os.path.join(base, "cgroup.subtree_control"), "w") as fhandle:
+            fhandle.write(" ".join(f"+{name}" for name in sorted(controllers)))
+
+    def create(self, name: str, limits: ResourceLimits):
+        """Create, or reuse, the sub-group of a task and write its limits
+
+        Args:
+            name: the task name
+            limits: the task limits
+
+        Returns:
+            (path, set of limits names that could not be applied)
+        """
+
+        # Percent encoded, so that two tasks never share a sub-group
+        group = name.replace("%", "%25").replace("/", "%2F")
+        if group.startswith("."):
+            group = "%2E" + group[1:]
+
+        path = os.path.join(self.base, self.prefix + group)
+        os.makedirs(path, exist_ok=True)
+
+        values = {}
+        if limits.cpu_quota is not None:
+            values["cpu_quota"] = ("cpu.max", f"{int(limits.cpu_quota * CPU_PERIOD)} {CPU_PERIOD}")
+        if limits.cpu_weight is not None:
+            values["cpu_weight"] = ("cpu.weight", str(limits.cpu_weight))
+        if limits.memory_max is not None:
+            values["memory_max"] = ("memory.max", str(limits.memory_max))
+        if limits.pids_max is not None:
+            values["pids_max"] = ("pids.max", str(limits.pids_max))
+
+        missing = set()
+        for key, (filename, value) in values.items():
+            try:
+                with open(os.path.join(path, filename), "w") as fhandle:
+                    fhandle.write(value)
+            except OSError:
+                missing.add(key)
+
+        return path, missing
+
+    def contains(self, path: str, pid: int):
+        """Tell if a process is in a sub-group
+
+        Args:
+            path: the sub-group
+            pid: the process
+
+        Raises:
+            OSError: the process is gone
+        """
+
+        with open(f"/proc/{pid}/cgroup") as fhandle:
+            for line in fhandle:
+                if line.startswith("0::"):
+                    current = os.path.join(self.root, line[3:].strip().lstrip("/"))
+                    return os.path.normpath(current) == os.path.normpath(path)
+
+        return False
+
+    def attach(self, path: str, pid: int):
+        """Move a process to a sub-group
+
+        Args:
+            path: the sub-group
+            pid: the process
+        """
+
+        with open(os.path.join(path, "cgroup.procs"), "w") as fhandle:
+            fhandle.write(str(pid))
+
+    def remove(self, path: str):
+        """Remove a sub-group, once its processes are gone
+
+        Args:
+            path: the sub-group
+        """
+
+        try:
+            os.rmdir(path)
+        except OSError as exc:
+            log.warning(f"Could not remove cgroup {path}: {exc}")
+
+
+# Cgroup manager used by apply_limits() by default
+default_cgroups = CgroupManager()
+
+
+##################################
+
+
+def prepare_limits(limits: ResourceLimits, name: str, cgroups=None):
+    """Prepare the limits of a task before launching its process
+
+    Creates the task cgroup, if any, and computes what the child has to set
+    up before exec, see setup_child().
+
+    Args:
+        limits: the task limits
+        name: the task name
+        cgroups: the CgroupManager to use, default_cgroups if None
+
+    Returns:
+        (path of the task cgroup or None, setup), setup being a JSON
+        serializable dict given to the launcher
+    """
+
+    cgroups = cgroups or default_cgroups
+    task_log = logging.getLogger(name)
+
+    path = None
+    missing = {
+        key
+        for key in ("cpu_quota", "cpu_weight", "memory_max", "pids_max")
+        if getattr(limits, key) is not None
+    }
+
+    if missing and cgroups.available():
+        try:
+            path, missing = cgroups.create(name, limits)
+        except OSError as exc:
+            task_log.warning(f"Could not create the task cgroup: {exc}")
+            if path is not None:
+                cgroups.remove(path)
+            path = None
+
+    # Fallbacks for limits not handled by a cgroup
+    rlimits = []
+    if "memory_max" in missing:
+        rlimits.append((resource.RLIMIT_AS, limits.memory_max))
+
+    if "pids_max" in missing:
+        # Counted for the whole user instead of the task
+        rlimits.append((resource.RLIMIT_NPROC, limits.pids_max))
+
+    nice = limits.nice
+    if nice is None and "cpu_weight" in missing:
+        nice = nice_from_weight(limits.cpu_weight)
+
+    if "cpu_quota" in missing:
+        task_log.warning("CPU quota needs the cgroup v2 cpu controller, not applied")
+
+    setup = {
+        "cgroup": path,
+        "rlimits": rlimits,
+        "nice": nice,
+        "ioprio": None if limits.io_class is None else (limits.io_class, limits.io_level),
+        "affinity": None if limits.cpu_affinity is None else sorted(limits.cpu_affinity),
+    }
+
+    return path, setup
+
+
+def setup_child(setup: dict):
+    """Apply prepared limits to the calling process, between fork and exec
+
+    Only safe in a child forked from a single threaded process. Errors are
+    ignored, as nothing can be reported from there: check_limits()
+    finds the limits that are not in effect once the process is launched.
+
+    Args:
+        setup: the setup returned by prepare_limits()
+    """
+
+    def attempt(func, *args):
+        try:
+            func(*args)
+        except OSError:
+            pass
+
+    # First, so that the cgroup accounts for everything the process does
+    if setup["cgroup"] is not None:
+
+        def attach():
+            with open(os.path.join(setup["cgroup"], "cgroup.procs"), "w") as fhandle:
+                fhandle.write(str(os.getpid()))
+
+        attempt(attach)
+
+    for which, value in setup["rlimits"]:
+        attempt(resource.setrlimit, which, (value, value))
+
+    if setup["nice"] is not None:
+        attempt(os.setpriority, os.PRIO_PROCESS, 0, setup["nice"])
+
+    if setup["ioprio"] is not None:
+        attempt(set_ioprio, 0, *setup["ioprio"])
+
+    if setup["affinity"] is not None:
+        attempt(os.sched_setaffinity, 0, setup["affinity"])
+
+
+def limits_command(command, setup: dict):
+    """Wrap a command so that its process applies its limits before exec
+
+    The wrapper is a Python interpreter running this module, without site
+    packages: it only relies on the standard library.
+
+    Args:
+        command: the command to launch
+        setup: the setup returned by prepare_limits()
+
+    Returns:
+        the wrapped command
+    """
+
+    return [
+        sys.executable, "-I", "-S", __file__, json.dumps(setup), *[str(arg) for arg in command]
+    ]
+
+
+def check_limits(pid: int, setup: dict, name: str, cgroups=None):
+    """Check the limits of a launched process, and apply those not in effect
+
+    Limits are not in effect when the launcher leaves the setup step out,
+    or when the child could not apply them. They are applied from the
+    supervisor then, with the command already running. Limits that can't be
+    applied are logged, and never prevent the task from running.
+
+    Args:
+        pid: the task process
+        setup: the setup returned by prepare_limits()
+        name: the task name
+        cgroups: the CgroupManager given to prepare_limits()
+    """
+
+    cgroups = cgroups or default_cgroups
+    task_log = logging.getLogger(name)
+
+    def attempt(what, check, func, *args):
+        try:
+            if check():
+                return
+            task_log.debug(f"{what} not set by the launcher, setting it now")
+            func(*args)
+        except (ProcessLookupError, FileNotFoundError):
+            # Already exited
+            pass
+        except OSError as exc:
+            task_log.warning(f"Could not set {what}: {exc}")
+
+    path = setup["cgroup"]
+    if path is not None:
+        attempt(
+            "cgroup", lambda: cgroups.contains(path, pid), cgroups.attach, path, pid
+        )
+
+    for which, value in setup["rlimits"]:
+        what = "memory limit" if which == resource.RLIMIT_AS else "processes limit"
+        attempt(
+            what,
+            lambda which=which, value=value: resource.prlimit(pid, which) == (value, value),
+            resource.prlimit, pid, which, (value, value),
+        )
+
+    nice = setup["nice"]
+    if nice is not None:
+        attempt(
+            "nice value",
+            lambda: os.getpriority(os.PRIO_PROCESS, pid) == nice,
+            os.setpriority, os.PRIO_PROCESS, pid, nice,
+        )
+
+    if setup["ioprio"] is not None:
+        io_class, level = setup["ioprio"]
+        attempt(
+            "I/O priority",
+            lambda: get_ioprio(pid) == (IO_CLASSES[io_class], level),
+            set_ioprio, pid, io_class, level,
+        )
+
+    affinity = setup["affinity"]
+    if affinity is not None:
+        attempt(
+            "CPU affinity",
+            lambda: os.sched_getaffinity(pid) == set(affinity),
+            os.sched_setaffinity, pid, affinity,
+        )
+
+
+def apply_limits(pid: int, limits: ResourceLimits, name: str, cgroups=None):
+    """Apply the limits of a task to an already launched process
+
+    The command runs unlimited until then: tasks prepare their limits before
+    launching their process instead, see prepare_limits().
+
+    Args:
+        pid: the task process
+        limits: the task limits
+        name: the task name
+        cgroups: the CgroupManager to use, default_cgroups if None
+
+    Returns:
+        the path of the task cgroup, None if the task was not placed in one
+    """
+
+    path, setup = prepare_limits(limits, name, cgroups)
+    check_limits(pid, setup, name, cgroups)
+
+    return path
+
+
+def release_limits(path: str, cgroups=None):
+    """Remove the cgroup of a task once its process has exited
+
+    Args:
+        path: the cgroup returned by prepare_limits()
+        cgroups: the CgroupManager used by prepare_limits()
+    """
+
+    (cgroups or default_cgroups).remove(path)
+
+
+##################################
+
+
+def main():
+    # Run by limits_command(): apply the limits, then exec the command
+    setup_child(json.loads(sys.argv[1]))
+
+    # Set by the interpreter, and kept across exec
+    for sig in (signal.SIGPIPE, signal.SIGXFSZ):
+        signal.signal(sig, signal.SIG_DFL)
+
+    try:
+        os.execvp(sys.argv[2], sys.argv[2:])
+    except OSError as exc:
+        # As a shell would
+        print(f"{sys.argv[2]}: {exc.strerror}", file=sys.stderr)
+        sys.exit(127 if isinstance(exc, FileNotFoundError) else 126)
+
+
+if __name__ == "__main__":
+    main()
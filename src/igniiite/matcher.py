@@ -0,0 +1,209 @@
+"""
+Shared output pattern matcher
+=============================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import re
+import asyncio
+import logging
+
+import traceback
+
+from igniiite.task import decode_lines
+
+
+log = logging.getLogger(__name__)
+
+STREAMS = {
+    "stdout": ("stdout",),
+    "stderr": ("stderr",),
+    "both": ("stdout", "stderr"),
+}
+
+# Patterns using back references or named groups can't be safely merged in
+# an alternation (group numbers shift, names may clash)
+_UNMERGEABLE_RE = re.compile(r"\\[1-9]|\(\?P[<=]")
+
+
+##################################
+
+
+class MatchEntry:
+    """A pattern registered on an OutputMatcher"""
+
+    __slots__ = ("regex", "callback", "streams")
+
+    def __init__(self, regex, callback, streams):
+        self.regex = regex
+        self.callback = callback
+        self.streams = streams
+
+
+class StreamMatcher:
+    """Match the lines of one output stream against a set of patterns
+
+    Patterns sharing the same flags are compiled in a single alternation, so
+    each line is scanned once whatever the number of patterns. Only when this
+    combined pattern hits, individual patterns are checked to dispatch the
+    line to the right entries.
+
+    Registered as a raw listener on the task outputs: matching is done
+    synchronously when output is published, with no queue in between.
+    """
+
+    maxsize = 0
+
+    def __init__(self):
+        self.entries = {}
+        self.combined = []
+        self.separate = []
+
+    def full(self):
+        return False
+
+    def add(self, entry):
+        self.entries[entry] = None
+        self.__compile()
+
+    def remove(self, entry):
+        self.entries.pop(entry, None)
+        self.__compile()
+
+    def __compile(self):
+        by_flags = {}
+        self.separate = []
+
+        for entry in self.entries:
+            if _UNMERGEABLE_RE.search(entry.regex.pattern):
+                self.separate.append(entry)
+            else:
+                by_flags.setdefault(entry.regex.flags, []).append(entry)
+
+        self.combined = []
+        for flags, entries in by_flags.items():
+            try:
+                pattern = "|".join(f"(?:{entry.regex.pattern})" for entry in entries)
+                self.combined.append((re.compile(pattern, flags), entries))
+            except re.error:
+                self.separate.extend(entries)
+
+    def put_nowait(self, lines):
+        if not self.entries:
+            return
+
+        for line in decode_lines(lines):
+            for combined, entries in self.combined:
+                if combined.search(line):
+                    self.__dispatch(entries, line)
+
+            if self.separate:
+                self.__dispatch(self.separate, line)
+
+    def __dispatch(self, entries, line):
+        for entry in tuple(entries):
+            match = entry.regex.search(line)
+            if match is None or entry not in self.entries:
+                continue
+
+            try:
+                entry.callback(match)
+            except Exception:
+                log.error(traceback.format_exc())
+
+
+class OutputMatcher:
+    """Per task pattern matcher, on stdout, stderr or both"""
+
+    def __init__(self, task):
+        """
+        Args:
+            task: the task whose output is matched
+        """
+
+        self.task = task
+        self.streams = {"stdout": StreamMatcher(), "stderr": StreamMatcher()}
+
+    async def add(self, regex, callback, stream="stderr", backlog=False):
+        """Call a function for each output line matching a pattern
+
+        Args:
+            regex: the pattern to match, str or compiled
+            callback: called with the re.Match object
+            stream: "stdout", "stderr" or "both"
+            backlog: also match the lines the current process printed before, kept in the task output history
+
+        Returns:
+            the entry to give to remove()
+        """
+
+        if stream not in STREAMS:
+            raise ValueError(f"stream = {stream!r} is not one of {tuple(STREAMS)}")
+
+        if not isinstance(regex, re.Pattern):
+            regex = re.compile(regex)
+
+        entry = MatchEntry(regex, callback, STREAMS[stream])
+        for name in entry.streams:
+            matcher = self.streams[name]
+            if not matcher.entries:
+                await self.__listeners(name).register(matcher, raw=True)
+
+        for name in entry.streams:
+            self.streams[name].add(entry)
+
+        # The entry went live on all its streams at once, so the history holds
+        # exactly the lines it missed
+        if backlog and self.task.output is not None:
+            for line in self.task.output.since(self.task.output_start):
+                if line.stream in entry.streams:
+                    match = regex.search(line.text())
+                    if match is not None:
+                        try:
+                            callback(match)
+                        except Exception:
+                            log.error(traceback.format_exc())
+
+        return entry
+
+    async def remove(self, entry):
+        """Remove a pattern
+
+        Args:
+            entry: the entry returned by add()
+        """
+
+        for name in entry.streams:
+            matcher = self.streams[name]
+            matcher.remove(entry)
+            if not matcher.entries:
+                await self.__listeners(name).unregister(matcher)
+
+    async def wait_for(self, regex, stream="stderr", backlog=True):
+        """Wait for an output line matching a pattern
+
+        Args:
+            regex: the pattern to match, str or compiled
+            stream: "stdout", "stderr" or "both"
+            backlog: also match the lines the current process printed before
+
+        Returns:
+            the re.Match object
+        """
+
+        found = asyncio.get_running_loop().create_future()
+
+        def on_match(match):
+            if not found.done():
+                found.set_result(match)
+
+        entry = await self.add(regex, on_match, stream, backlog)
+        try:
+            return await found
+        finally:
+            await self.remove(entry)
+
+    def __listeners(self, name):
+        return getattr(self.task, f"{name}_listeners")
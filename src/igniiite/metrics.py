@@ -0,0 +1,359 @@
+"""
+Task resource accounting
+========================
+
+Samples the resources used by running tasks, from /proc, including the
+whole process tree of each task.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import time
+import asyncio
+import logging
+import collections
+
+import traceback
+
+from typing import NamedTuple
+
+
+log = logging.getLogger(__name__)
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+##################################
+
+
+class ResourceSample(NamedTuple):
+    """Resources used by the process tree of a task at a given time"""
+
+    """Monotonic timestamp of the sample"""
+    time: float
+
+    """Number of processes in the tree"""
+    processes: int
+
+    """Number of threads in the tree"""
+    threads: int
+
+    """User CPU time, in seconds"""
+    cpu_user: float
+
+    """System CPU time, in seconds"""
+    cpu_system: float
+
+    """Resident memory, in bytes"""
+    rss: int
+
+    """Bytes read from storage"""
+    read_bytes: int
+
+    """Bytes written to storage"""
+    write_bytes: int
+
+    """Open file descriptors"""
+    fds: int
+
+    """Voluntary and non voluntary context switches"""
+    ctx_switches: int
+
+
+def _read(path):
+    try:
+        with open(path, "rb") as fhandle:
+            return fhandle.read()
+    except OSError:
+        return None
+
+
+def _parse_stat(data):
+    # The command name may contain spaces and parenthesis
+    fields = data[data.rfind(b")") + 2 :].split()
+    return {
+        "ppid": int(fields[1]),
+        "utime": int(fields[11]),
+        "stime": int(fields[12]),
+        "threads": int(fields[17]),
+        "rss": int(fields[21]),
+    }
+
+
+def _parse_keys(data, keys):
+    values = {}
+    if data is None:
+        return values
+
+    for line in data.splitlines():
+        key, _, value = line.partition(b":")
+        if key in keys:
+            values[key] = int(value.split()[0])
+
+    return values
+
+
+def scan_processes(proc="/proc"):
+    """Read the stat file of every process
+
+    Returns:
+        dict pid -> parsed stat fields
+    """
+
+    stats = {}
+    for name in os.listdir(proc):
+        if not name.isdigit():
+            continue
+
+        data = _read(f"{proc}/{name}/stat")
+        if data is not None:
+            try:
+                stats[int(name)] = _parse_stat(data)
+            except (IndexError, ValueError):
+                pass
+
+    return stats
+
+
+def sample_trees(roots, proc="/proc"):
+    """Sample the process trees of a set of processes, with a single /proc scan
+
+    Args:
+        roots: dict key -> pid of the tree root
+        proc: mount point of procfs
+
+    Returns:
+        dict key -> ResourceSample, for roots that still exist
+    """
+
+    now = time.monotonic()
+    stats = scan_processes(proc)
+
+    children = collections.defaultdict(list)
+    for pid, stat in stats.items():
+        children[stat["ppid"]].append(pid)
+
+    samples = {}
+    for key, root in roots.items():
+        if root not in stats:
+            continue
+
+        tree = [root]
+        for pid in tree:
+            tree.extend(children.get(pid, ()))
+
+        threads = utime = stime = rss = read = write = fds = switches = 0
+        for pid in tree:
+            stat = stats[pid]
+            threads += stat["threads"]
+            utime += stat["utime"]
+            stime += stat["stime"]
+            rss += stat["rss"]
+
+            io = _parse_keys(_read(f"{proc}/{pid}/io"), (b"read_bytes", b"write_bytes"))
+            read += io.get(b"read_bytes", 0)
+            write += io.get(b"write_bytes", 0)
+
+            status = _parse_keys(
+                _read(f"{proc}/{pid}/status"),
+                (b"voluntary_ctxt_switches", b"nonvoluntary_ctxt_switches"),
+            )
+            switches += sum(status.values())
+
+            try:
+                fds += len(os.listdir(f"{proc}/{pid}/fd"))
+            except OSError:
+                pass
+
+        samples[key] = ResourceSample(
+            time=now,
+            processes=len(tree),
+            threads=threads,
+            cpu_user=utime / CLOCK_TICKS,
+            cpu_system=stime / CLOCK_TICKS,
+            rss=rss * PAGE_SIZE,
+            read_bytes=read,
+            write_bytes=write,
+            fds=fds,
+            ctx_switches=switches,
+        )
+
+    return samples
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class ResourceSampler:
+    """Periodically sample the resources used by a set of tasks
+
+    Each sampling round reads /proc once for all tasks, in a worker thread,
+    and keeps the latest samples of each task in a fixed size ring buffer.
+    """
+
+    def __init__(self, tasks=(), interval: float = 1.0, history: int = 300):
+        """
+        Args:
+            tasks: the tasks to sample
+            interval: time between two samples, in seconds
+            history: number of samples kept per task
+        """
+
+        self.interval = interval
+        self.history = history
+        self.buffers = {}
+
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task):
+        """Start sampling a task
+
+        Args:
+            task: the task to sample
+        """
+
+        self.buffers.setdefault(task, collections.deque(maxlen=self.history))
+
+    def remove(self, task):
+        """Stop sampling a task, and drop its samples
+
+        Args:
+            task: the sampled task
+        """
+
+        self.buffers.pop(task, None)
+
+    def samples(self, task):
+        """Get the samples of a task, oldest first
+
+        Args:
+            task: the sampled task
+        """
+
+        return list(self.buffers.get(task, ()))
+
+    def latest(self, task):
+        """Get the latest sample of a task, None if none
+
+        Args:
+            task: the sampled task
+        """
+
+        buffer = self.buffers.get(task)
+        return buffer[-1] if buffer else None
+
+    def cpu_usage(self, task):
+        """CPU usage of a task between its two latest samples, 1.0 is one core
+
+        Args:
+            task: the sampled task
+        """
+
+        buffer = self.buffers.get(task)
+        if not buffer or len(buffer) < 2:
+            return None
+
+        old, new = buffer[-2], buffer[-1]
+        elapsed = new.time - old.time
+        if elapsed <= 0:
+            return None
+
+        used = (new.cpu_user + new.cpu_system) - (old.cpu_user + old.cpu_system)
+        return max(used, 0.0) / elapsed
+
+    async def sample(self):
+        """Sample all the running tasks once"""
+
+        roots = {}
+        for task in self.buffers:
+            process = task.process
+            if process is not None and process.returncode is None:
+                roots[task] = process.pid
+
+        if not roots:
+            return
+
+        samples = await asyncio.to_thread(sample_trees, roots)
+        for task, sample in samples.items():
+            buffer = self.buffers.get(task)
+            if buffer is not None:
+                buffer.append(sample)
+
+    async def run(self):
+        """Sample the tasks periodically, until cancelled"""
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+
+        while True:
+            try:
+                await self.sample()
+            except Exception:
+                log.error(traceback.format_exc())
+
+            # Keep a steady rate, whatever the time spent sampling
+            deadline = max(deadline + self.interval, loop.time())
+            await asyncio.sleep(deadline - loop.time())
+
+    def dump_text(self):
+        """Latest samples of all the tasks, as a text table"""
+
+        lines = [
+            f"{'task':<24}{'procs':>6}{'threads':>8}{'cpu%':>8}{'rss MiB':>10}"
+            f"{'read MiB':>10}{'write MiB':>10}{'fds':>6}"
+        ]
+
+        for task in self.buffers:
+            sample = self.latest(task)
+            if sample is None:
+                continue
+
+            usage = self.cpu_usage(task)
+            cpu = "-" if usage is None else f"{usage * 100:.1f}"
+            lines.append(
+                f"{task.name:<24}{sample.processes:>6}{sample.threads:>8}{cpu:>8}"
+                f"{sample.rss / 2**20:>10.1f}{sample.read_bytes / 2**20:>10.1f}"
+                f"{sample.write_bytes / 2**20:>10.1f}{sample.fds:>6}"
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def dump_prometheus(self):
+        """Latest samples of all the tasks, in Prometheus text exposition format"""
+
+        metrics = (
+            ("cpu_seconds_total", "counter", "CPU time used by the task process tree", None),
+            ("resident_memory_bytes", "gauge", "Resident memory of the task process tree", "rss"),
+            ("read_bytes_total", "counter", "Bytes read from storage by the task process tree", "read_bytes"),
+            ("write_bytes_total", "counter", "Bytes written to storage by the task process tree", "write_bytes"),
+            ("open_fds", "gauge", "Open file descriptors of the task process tree", "fds"),
+            ("threads", "gauge", "Threads of the task process tree", "threads"),
+            ("processes", "gauge", "Processes in the task process tree", "processes"),
+            ("context_switches_total", "counter", "Context switches of the task process tree", "ctx_switches"),
+        )
+
+        latest = {
+            task: sample
+            for task, sample in ((task, self.latest(task)) for task in self.buffers)
+            if sample is not None
+        }
+
+        lines = []
+        for name, kind, help_text, field in metrics:
+            lines.append(f"# HELP igniiite_task_{name} {help_text}")
+            lines.append(f"# TYPE igniiite_task_{name} {kind}")
+
+            for task, sample in latest.items():
+                label = f'task="{_label(task.name)}"'
+                if field is None:
+                    lines.append(f'igniiite_task_{name}{{{label},mode="user"}} {sample.cpu_user}')
+                    lines.append(f'igniiite_task_{name}{{{label},mode="system"}} {sample.cpu_system}')
+                else:
+                    lines.append(f"igniiite_task_{name}{{{label}}} {getattr(sample, field)}")
+
+        return "\n".join(lines) + "\n"
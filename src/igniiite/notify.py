@@ -0,0 +1,258 @@
+"""
+Service notification socket
+===========================
+
+Support of the systemd service notification protocol (sd_notify): a single
+datagram socket receives the notifications of every task. Senders are
+identified from their credentials, so no per-task socket or polling is
+needed.
+
+Supported notifications: READY=1, STATUS=, STOPPING=1, RELOADING=1,
+WATCHDOG=1, WATCHDOG=trigger, WATCHDOG_USEC= and ERRNO=.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import socket
+import struct
+import asyncio
+import logging
+import tempfile
+
+import traceback
+
+
+log = logging.getLogger(__name__)
+
+# Maximum size of a notification datagram
+MAX_DATAGRAM = 4096
+
+# pid, uid, gid of struct ucred
+UCRED = struct.Struct("iII")
+
+# Number of parent processes looked up to find the task of a sender
+MAX_ANCESTORS = 8
+
+
+##################################
+
+
+def _parent_pid(pid):
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as fhandle:
+            data = fhandle.read()
+    except OSError:
+        return None
+
+    return int(data[data.rfind(b")") + 2 :].split()[1])
+
+
+class Notifier:
+    """Receive sd_notify notifications for all the tasks
+
+    The socket is created on first use. Tasks with notify set are given its
+    path in NOTIFY_SOCKET, and WATCHDOG_USEC when they have a watchdog
+    timeout. Notifications sent by a task process, or by one of its
+    children, are applied to the task.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: socket path, a file in a new temporary directory if None
+        """
+
+        self.path = path
+        self.sock = None
+        self.directory = None
+
+        # pid -> task, task -> watchdog timer, task -> watchdog timeout
+        self.pids = {}
+        self.watchdogs = {}
+        self.timeouts = {}
+
+        # Keep references on the tasks failing hung processes
+        self.failing = set()
+
+    async def start(self):
+        """Create the notification socket, if not already done"""
+
+        if self.sock is not None:
+            return
+
+        if self.path is None:
+            self.directory = tempfile.mkdtemp(prefix="igniiite-")
+            self.path = os.path.join(self.directory, "notify.sock")
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC)
+        try:
+            sock.setblocking(False)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_PASSCRED, 1)
+            sock.bind(self.path)
+        except BaseException:
+            sock.close()
+            raise
+
+        self.sock = sock
+        asyncio.get_running_loop().add_reader(sock.fileno(), self.__on_readable)
+
+        log.debug(f"Notification socket listening on {self.path}")
+
+    def close(self):
+        """Close the notification socket"""
+
+        for task in tuple(self.watchdogs):
+            self.__disarm(task)
+        self.pids.clear()
+
+        if self.sock is not None:
+            asyncio.get_running_loop().remove_reader(self.sock.fileno())
+            self.sock.close()
+            self.sock = None
+
+        if self.directory is not None:
+            try:
+                os.unlink(self.path)
+                os.rmdir(self.directory)
+            except OSError:
+                pass
+            self.directory = None
+            self.path = None
+
+    def environment(self, task):
+        """Environment variables telling a task process how to notify
+
+        Args:
+            task: the task
+        """
+
+        env = {"NOTIFY_SOCKET": self.path}
+        if task.watchdog_timeout is not None:
+            env["WATCHDOG_USEC"] = str(int(task.watchdog_timeout * 1_000_000))
+
+        return env
+
+    def register(self, task, pid):
+        """Start receiving the notifications of a launched task process
+
+        Args:
+            task: the task
+            pid: the process of the task
+        """
+
+        self.pids[pid] = task
+        if task.watchdog_timeout is not None:
+            self.__arm(task, task.watchdog_timeout)
+
+    def unregister(self, task):
+        """Stop receiving the notifications of a task
+
+        Args:
+            task: the task
+        """
+
+        for pid in [pid for pid, tt in self.pids.items() if tt is task]:
+            del self.pids[pid]
+
+        self.__disarm(task)
+
+    def __arm(self, task, timeout):
+        self.__disarm(task)
+
+        self.timeouts[task] = timeout
+        self.watchdogs[task] = asyncio.get_running_loop().call_later(
+            timeout, self.__expired, task
+        )
+
+    def __disarm(self, task):
+        timer = self.watchdogs.pop(task, None)
+        if timer is not None:
+            timer.cancel()
+
+        self.timeouts.pop(task, None)
+
+    def __expired(self, task):
+        self.__disarm(task)
+
+        restart = task.watchdog_action == "restart"
+        task.log.error(
+            f"Process '{task.name}' missed its watchdog deadline, "
+            + ("restarting it" if restart else "failing it")
+        )
+
+        failing = asyncio.create_task(task.fail("watchdog timeout", restart=restart))
+        self.failing.add(failing)
+        failing.add_done_callback(self.failing.discard)
+
+    def __find_task(self, pid):
+        for _ in range(MAX_ANCESTORS):
+            task = self.pids.get(pid)
+            if task is not None or pid is None or pid <= 1:
+                return task
+
+            pid = _parent_pid(pid)
+
+        return None
+
+    def __on_readable(self):
+        while True:
+            try:
+                data, ancdata, _, _ = self.sock.recvmsg(
+                    MAX_DATAGRAM, socket.CMSG_SPACE(UCRED.size)
+                )
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                log.error(traceback.format_exc())
+                return
+
+            pid = None
+            for level, kind, value in ancdata:
+                if level == socket.SOL_SOCKET and kind == socket.SCM_CREDENTIALS:
+                    pid, _, _ = UCRED.unpack(value[: UCRED.size])
+
+            task = self.__find_task(pid)
+            if task is None:
+                log.warning(f"Notification from unknown process {pid} ignored")
+                continue
+
+            try:
+                self.__apply(task, data.decode("utf-8", errors="replace"))
+            except Exception:
+                task.log.error(traceback.format_exc())
+
+    def __apply(self, task, message):
+        for line in message.splitlines():
+            key, _, value = line.partition("=")
+
+            if key == "READY" and value == "1":
+                if not task.ready.is_set():
+                    task.set_ready()
+
+            elif key == "STATUS":
+                task.status = value
+                task.log.info(f"Status: {value}")
+
+            elif key == "STOPPING" and value == "1":
+                task.log.info(f"Process '{task.name}' is stopping")
+
+            elif key == "RELOADING" and value == "1":
+                task.log.info(f"Process '{task.name}' is reloading")
+
+            elif key == "ERRNO":
+                task.log.error(f"Process '{task.name}' reported errno {value}")
+
+            elif key == "WATCHDOG":
+                if value == "1" and task in self.watchdogs:
+                    self.__arm(task, self.timeouts[task])
+                elif value == "trigger":
+                    self.__expired(task)
+
+            elif key == "WATCHDOG_USEC":
+                self.__arm(task, int(value) / 1_000_000)
+
+
+# Notifier used by the tasks with notify set
+default_notifier = Notifier()
@@ -0,0 +1,390 @@
+"""
+Child reaper
+============
+
+PID 1 mode: each task runs in its own session, so that its whole process
+group is signalled on stop, and every child exit is collected from the
+event loop with no watcher thread:
+
+- task processes are watched through a pidfd (pidfd_open) registered as a
+  loop reader, woken once when the process exits;
+- a single SIGCHLD handler reaps the processes left over by task groups,
+  and any other stray zombie;
+- as a plain process, the supervisor becomes a child subreaper, so that
+  orphaned grandchildren are reparented to it instead of to init.
+
+Enable it for all tasks with enable_pid1_mode(), or for some of them with
+Task(launcher=ReaperLauncher()).
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import signal
+import asyncio
+import logging
+import subprocess
+
+import traceback
+
+from igniiite import launcher
+from igniiite.launcher import _pipe_reader, _close_pipes
+
+
+log = logging.getLogger(__name__)
+
+PR_SET_CHILD_SUBREAPER = 36
+
+
+##################################
+
+
+def set_child_subreaper(enable: bool = True):
+    """Make the current process the reaper of its orphaned descendants
+
+    Args:
+        enable: False to give the orphans back to init
+
+    Raises:
+        OSError: the prctl call failed
+    """
+
+    import ctypes
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.prctl(PR_SET_CHILD_SUBREAPER, int(enable), 0, 0, 0) < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+def _returncode(info):
+    # Negative signal number for killed processes, as asyncio does
+    if info.si_code == os.CLD_EXITED:
+        return info.si_status
+    return -info.si_status
+
+
+class ChildReaper:
+    """Collect the exit of task processes, and reap stray zombies
+
+    Tracked processes are session leaders: their pid is their process group
+    id. Once a leader exited, the group is swept for exited members on each
+    SIGCHLD, until it is empty. SIGCHLD sweeps are coalesced to one per loop
+    iteration, so a burst of exits costs a single pass.
+
+    As PID 1 or as a child subreaper, orphaned descendants are reparented to
+    the supervisor, so any exited child is reaped: every process of such a
+    supervisor should be started through a ReaperLauncher, as
+    enable_pid1_mode() does.
+    """
+
+    def __init__(self, kill_remaining: bool = True, reap_all: bool = None, subreaper: bool = True):
+        """
+        Args:
+            kill_remaining: kill the processes left in the group of a task once its main process exited
+            reap_all: reap any exited child, not only members of task groups. Default is to do it when running as PID 1 or as a child subreaper
+            subreaper: become a child subreaper when not PID 1
+        """
+
+        self.kill_remaining = kill_remaining
+        # Resolved by start() if None, once known whether orphans are reparented to the supervisor
+        self.reap_all = reap_all
+        self.subreaper = subreaper
+
+        # Whether start() made the process a child subreaper
+        self.is_subreaper = False
+
+        self.loop = None
+        self.sweeping = False
+
+        # pid -> exit future of tracked processes
+        self.exits = {}
+        # pid -> pidfd of tracked processes watched through a pidfd
+        self.pidfds = {}
+        # Groups of exited leaders which may still have members
+        self.groups = set()
+
+        # Number of processes reaped which were not tracked
+        self.strays = 0
+
+    def start(self):
+        """Install the SIGCHLD handler on the running loop, if not already done"""
+
+        loop = asyncio.get_running_loop()
+        if self.loop is loop:
+            return
+
+        if self.subreaper and os.getpid() != 1 and not self.is_subreaper:
+            try:
+                set_child_subreaper()
+            except OSError as exc:
+                log.warning(f"Could not become a child subreaper: {exc}")
+            else:
+                self.is_subreaper = True
+
+        # Adopted orphans would stay zombies otherwise
+        if self.reap_all is None:
+            self.reap_all = os.getpid() == 1 or self.is_subreaper
+
+        loop.add_signal_handler(signal.SIGCHLD, self.__on_sigchld)
+        self.loop = loop
+
+        # Children may have exited before the handler was installed
+        self.__on_sigchld()
+
+    def close(self):
+        """Remove the SIGCHLD handler and stop watching processes"""
+
+        if self.loop is None:
+            return
+
+        self.loop.remove_signal_handler(signal.SIGCHLD)
+        for pid in tuple(self.pidfds):
+            self.__unwatch(pid)
+
+        # Nothing would reap the orphans adopted from now on
+        if self.is_subreaper:
+            try:
+                set_child_subreaper(False)
+            except OSError as exc:
+                log.warning(f"Could not stop being a child subreaper: {exc}")
+            else:
+                self.is_subreaper = False
+
+        self.loop = None
+
+    def track(self, pid: int):
+        """Watch a process started by the supervisor
+
+        Args:
+            pid: the process id, the leader of its own group
+
+        Returns:
+            a future resolved with the process return code once it exited
+        """
+
+        exited = self.loop.create_future()
+        self.exits[pid] = exited
+
+        try:
+            pidfd = os.pidfd_open(pid)
+        except (AttributeError, OSError):
+            # No pidfd support: the SIGCHLD sweep polls the process
+            return exited
+
+        self.pidfds[pid] = pidfd
+        self.loop.add_reader(pidfd, self.__on_pidfd, pid)
+
+        return exited
+
+    def __unwatch(self, pid):
+        pidfd = self.pidfds.pop(pid, None)
+        if pidfd is not None:
+            self.loop.remove_reader(pidfd)
+            os.close(pidfd)
+
+    def __on_pidfd(self, pid):
+        try:
+            info = os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG)
+        except ChildProcessError:
+            # Already reaped by a sweep
+            self.__unwatch(pid)
+            return
+
+        if info is not None:
+            self.__collected(info.si_pid, _returncode(info))
+
+    def __on_sigchld(self):
+        if not self.sweeping:
+            self.sweeping = True
+            self.loop.call_soon(self.__sweep)
+
+    def __sweep(self):
+        self.sweeping = False
+
+        try:
+            # Tracked processes with no pidfd
+            for pid in [pid for pid in self.exits if pid not in self.pidfds]:
+                self.__reap(os.P_PID, pid)
+
+            for pgid in tuple(self.groups):
+                self.__reap(os.P_PGID, pgid)
+                try:
+                    os.killpg(pgid, 0)
+                except ProcessLookupError:
+                    self.groups.discard(pgid)
+                except PermissionError:
+                    pass
+
+            if self.reap_all:
+                self.__reap(os.P_ALL, 0)
+
+        except Exception:
+            log.error(traceback.format_exc())
+
+    def __reap(self, idtype, ident):
+        while True:
+            try:
+                info = os.waitid(idtype, ident, os.WEXITED | os.WNOHANG)
+            except ChildProcessError:
+                return
+
+            if info is None:
+                return
+
+            self.__collected(info.si_pid, _returncode(info))
+
+    def __collected(self, pid, returncode):
+        exited = self.exits.pop(pid, None)
+        if exited is None:
+            self.strays += 1
+            log.debug(f"Reaped stray process {pid} with return code {returncode}")
+            return
+
+        self.__unwatch(pid)
+        if not exited.done():
+            exited.set_result(returncode)
+
+        self.groups.add(pid)
+        if self.kill_remaining:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+                log.debug(f"Killed the processes left in the group of {pid}")
+            except (ProcessLookupError, PermissionError):
+                pass
+
+        # Members of the group may have exited already
+        self.__on_sigchld()
+
+
+##################################
+
+
+class ReapedProcess:
+    """A process watched by a ChildReaper, mimics asyncio.subprocess.Process
+
+    Signals are sent to the whole process group.
+    """
+
+    def __init__(self, popen, stdout, stderr, exited):
+        self.pid = popen.pid
+        self.stdout, stdout_transport = stdout
+        self.stderr, stderr_transport = stderr
+        self.returncode = None
+        self.exited = exited
+        self.transports = (stdout_transport, stderr_transport)
+
+        # Kept so that subprocess never polls the process itself
+        self.popen = popen
+        exited.add_done_callback(self.__on_exit)
+
+    def __on_exit(self, exited):
+        if not exited.cancelled():
+            self.returncode = self.popen.returncode = exited.result()
+
+    async def wait(self):
+        """Wait for the process to exit, and return its return code"""
+
+        if self.returncode is None:
+            await asyncio.shield(self.exited)
+            # The exit callback is not run yet if exited was already done
+            self.__on_exit(self.exited)
+
+        return self.returncode
+
+    def send_signal(self, sig):
+        try:
+            os.killpg(self.pid, sig)
+        except ProcessLookupError:
+            if self.returncode is None and not self.exited.done():
+                raise
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+    def close(self):
+        """Close the pipes, even if still held open by other processes"""
+
+        _close_pipes(self.transports)
+
+
+class ReaperLauncher:
+    """Launch each command in its own session, its exit collected by a ChildReaper"""
+
+    def __init__(self, reaper: ChildReaper = None):
+        """
+        Args:
+            reaper: the reaper of the launched processes, default_reaper if None
+        """
+
+        self.reaper = reaper or default_reaper
+
+    async def spawn(self, command, env=None, cwd=None, pass_fds=(), setup=None):
+        """Launch a command
+
+        Args:
+            command: the command to launch
+            env: the process environment, inherited if None
+            cwd: the process working directory, inherited if None
+            pass_fds: file descriptors kept open in the process
+            setup: limits applied by the process before exec, see igniiite.limits.prepare_limits()
+        """
+
+        if setup is not None:
+            from igniiite.limits import limits_command
+
+            command = limits_command(command, setup)
+
+        self.reaper.start()
+
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+
+        try:
+            popen = subprocess.Popen(
+                command,
+                stdout=stdout_w,
+                stderr=stderr_w,
+                env=env,
+                cwd=cwd,
+                pass_fds=pass_fds,
+                start_new_session=True,
+            )
+
+        except BaseException:
+            os.close(stdout_r)
+            os.close(stderr_r)
+            raise
+
+        finally:
+            os.close(stdout_w)
+            os.close(stderr_w)
+
+        # Tracked before the loop can run the SIGCHLD sweep
+        exited = self.reaper.track(popen.pid)
+
+        return ReapedProcess(
+            popen, await _pipe_reader(stdout_r), await _pipe_reader(stderr_r), exited
+        )
+
+
+# Reaper used by ReaperLauncher and enable_pid1_mode()
+default_reaper = ChildReaper()
+
+
+def enable_pid1_mode(reaper: ChildReaper = None):
+    """Launch the tasks with no explicit launcher through a ReaperLauncher
+
+    Args:
+        reaper: the reaper of the launched processes, default_reaper if None
+
+    Returns:
+        the installed launcher
+    """
+
+    launcher.default_launcher = ReaperLauncher(reaper)
+    return launcher.default_launcher
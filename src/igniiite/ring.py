@@ -0,0 +1,291 @@
+"""
+Task output history
+===================
+
+Keeps the last output lines of a task in a fixed amount of memory, so that
+what a task printed can be read, or followed, after the fact.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import bisect
+import asyncio
+
+from array import array
+from typing import NamedTuple
+
+
+RING_STREAMS = ("stdout", "stderr")
+
+
+##################################
+
+
+class OutputLine(NamedTuple):
+    """An output line kept in an OutputRing"""
+
+    """Cursor of the line: its offset in the whole task output"""
+    cursor: int
+
+    """Stream of the line: stdout or stderr"""
+    stream: str
+
+    """Raw line, without the trailing newline"""
+    line: bytes
+
+    @property
+    def next(self):
+        """Cursor of the line after this one"""
+        return self.cursor + len(self.line) + 1
+
+    def text(self):
+        """The line decoded, as done for text listeners"""
+        return self.line.decode("utf-8", errors="replace").strip()
+
+
+class OutputRing:
+    """Last output lines of a task
+
+    Lines are stored newline terminated, back to back in a single bytearray,
+    along with the start offset and stream of each appended batch. Appending
+    a batch is a mere copy: lines are only split when read.
+
+    Cursors are offsets in the whole output of the task, newlines included,
+    so they keep growing while old lines are evicted. Only the lines within
+    the last max_bytes bytes, and the last max_lines lines, are kept.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024, max_lines: int = 1000):
+        """
+        Args:
+            max_bytes: maximum number of bytes kept, newlines included
+            max_lines: maximum number of lines kept
+        """
+
+        if max_bytes < 1 or max_lines < 1:
+            raise ValueError(
+                f"max_bytes = {max_bytes!r} and max_lines = {max_lines!r} must be at least 1"
+            )
+
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+
+        self.data = bytearray()
+        # Cursor of data[0], and of the end of data
+        self.base = 0
+        self.total = 0
+
+        # Start cursor and stream id of each batch. Batches before head are
+        # out of the limits, and wait for the next compaction
+        self.block_starts = array("q")
+        self.block_streams = bytearray()
+        self.head = 0
+
+        self.closed = False
+        self.waiter = None
+
+    def __len__(self):
+        return self.data.count(b"\n", self.first - self.base)
+
+    @property
+    def first(self):
+        """Cursor of the oldest line kept"""
+        return self.__limit(self.base)
+
+    @property
+    def cursor(self):
+        """Cursor of the next line"""
+        return self.total
+
+    def append(self, stream: str, data):
+        """Add output lines
+
+        Args:
+            stream: "stdout" or "stderr"
+            data: a list of raw lines, or a block of lines separated by newlines
+        """
+
+        block = b"\n".join(data) if isinstance(data, list) else data
+        size = len(block) + 1
+
+        # A batch larger than max_bytes evicts every line before it, and only
+        # its own lines within max_bytes are kept
+        skip = 0
+        if size > self.max_bytes:
+            skip = block.find(b"\n", size - self.max_bytes - 1) + 1 or size
+
+            self.data.clear()
+            del self.block_starts[:]
+            del self.block_streams[:]
+            self.base = self.total + skip
+            self.head = 0
+
+        self.block_starts.append(self.total + skip)
+        self.block_streams.append(RING_STREAMS.index(stream))
+
+        self.data += memoryview(block)[skip:]
+        if skip < size:
+            self.data += b"\n"
+        self.total += size
+
+        self.__evict()
+        self.__wake()
+
+    def close(self):
+        """Mark the end of the output: followers stop once they caught up"""
+
+        self.closed = True
+        self.__wake()
+
+    def reopen(self):
+        """Accept output again after close(), keeping the kept lines"""
+
+        self.closed = False
+
+    def tail(self, n: int = 10, stream: str = None):
+        """Get the last lines
+
+        Args:
+            n: number of lines
+            stream: only lines of this stream if set, "stdout" or "stderr"
+
+        Returns:
+            a list of OutputLine, oldest first
+        """
+
+        if n <= 0:
+            return []
+
+        if stream is None:
+            # Start of the n-th last line
+            start = self.total
+            first = self.first
+            for _ in range(n):
+                if start <= first:
+                    break
+                start = self.data.rfind(b"\n", first - self.base, start - 1 - self.base) + 1 + self.base
+                start = max(start, first)
+            return self.since(start)
+
+        return self.since(self.first, stream)[-n:]
+
+    def since(self, cursor: int, stream: str = None):
+        """Get the lines from a cursor on
+
+        Lines evicted since the cursor was taken are skipped.
+
+        Args:
+            cursor: cursor of the first line to get, see OutputLine.cursor, OutputLine.next and the cursor property
+            stream: only lines of this stream if set, "stdout" or "stderr"
+
+        Returns:
+            a list of OutputLine, oldest first
+        """
+
+        if cursor >= self.total:
+            return []
+
+        cursor = self.__limit(cursor)
+        stream_id = None if stream is None else RING_STREAMS.index(stream)
+        index = max(bisect.bisect_right(self.block_starts, cursor, self.head) - 1, self.head)
+
+        lines = []
+        for index in range(index, len(self.block_starts)):
+            if stream_id is not None and self.block_streams[index] != stream_id:
+                continue
+
+            start = max(self.block_starts[index], cursor)
+            end = (
+                self.block_starts[index + 1]
+                if index + 1 < len(self.block_starts)
+                else self.total
+            )
+            if start >= end:
+                continue
+
+            name = RING_STREAMS[self.block_streams[index]]
+            for line in bytes(self.data[start - self.base : end - self.base - 1]).split(b"\n"):
+                lines.append(OutputLine(start, name, line))
+                start += len(line) + 1
+
+        return lines
+
+    async def follow(self, cursor: int = None, stream: str = None):
+        """Iterate over the kept lines, then over the new ones as they come
+
+        Iteration stops once the ring is closed and every line was given.
+
+        Args:
+            cursor: cursor of the first line, the oldest line kept if None
+            stream: only lines of this stream if set, "stdout" or "stderr"
+        """
+
+        if cursor is None:
+            cursor = self.first
+
+        while True:
+            lines = self.since(cursor, stream)
+            cursor = max(cursor, self.total)
+            closed = self.closed
+
+            for line in lines:
+                yield line
+
+            if closed and cursor == self.total:
+                return
+
+            if cursor == self.total and self.closed == closed:
+                if self.waiter is None:
+                    self.waiter = asyncio.get_running_loop().create_future()
+                await asyncio.shield(self.waiter)
+
+    def __limit(self, cursor):
+        # First line start at or after cursor, within the limits
+        start = max(cursor, self.base, self.total - self.max_bytes)
+        if start >= self.total:
+            return self.total
+
+        if start > self.base and self.data[start - 1 - self.base] != 0x0A:
+            start = self.data.find(b"\n", start - self.base) + 1 + self.base
+
+        # Skip the lines over max_lines, walking from the closest end
+        extra = self.data.count(b"\n", start - self.base) - self.max_lines
+        if extra <= 0:
+            return start
+
+        if extra <= self.max_lines:
+            for _ in range(extra):
+                start = self.data.find(b"\n", start - self.base) + 1 + self.base
+            return start
+
+        end = self.total
+        for _ in range(self.max_lines):
+            end = self.data.rfind(b"\n", 0, end - 1 - self.base) + 1 + self.base
+
+        return end
+
+    def __evict(self):
+        # Drop the batches entirely out of max_bytes
+        limit = self.total - self.max_bytes
+        count = len(self.block_starts)
+        head = self.head
+        while head + 1 < count and self.block_starts[head + 1] <= limit:
+            head += 1
+        self.head = head
+
+        # Drop evicted data once it takes as much room as the kept data, so
+        # that memory stays within a few times max_bytes
+        start = self.block_starts[head]
+        if start - self.base >= self.max_bytes:
+            del self.data[: start - self.base]
+            del self.block_starts[:head]
+            del self.block_streams[:head]
+            self.base = start
+            self.head = 0
+
+    def __wake(self):
+        if self.waiter is not None:
+            if not self.waiter.done():
+                self.waiter.set_result(None)
+            self.waiter = None
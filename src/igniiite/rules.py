@@ -0,0 +1,382 @@
+"""
+Scheduling rules
+================
+
+Rules compute the next run datetime after a given datetime. They are
+callables, and can be given as next_run to igniiite.scheduler.Scheduler.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import calendar
+
+from datetime import datetime, timedelta
+
+
+# Cron field: (name, lowest value, highest value, value names)
+FIELDS = (
+    ("minute", 0, 59, {}),
+    ("hour", 0, 23, {}),
+    ("day of month", 1, 31, {}),
+    (
+        "month",
+        1,
+        12,
+        {
+            name: index
+            for index, name in enumerate(
+                (
+                    "jan", "feb", "mar", "apr", "may", "jun",
+                    "jul", "aug", "sep", "oct", "nov", "dec",
+                ),
+                start=1,
+            )
+        },
+    ),
+    (
+        "day of week",
+        0,
+        7,
+        {
+            name: index
+            for index, name in enumerate(
+                ("sun", "mon", "tue", "wed", "thu", "fri", "sat")
+            )
+        },
+    ),
+)
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# Number of months whose matching days are kept by each rule
+MONTH_CACHE_SIZE = 512
+
+# Years scanned before giving up on a rule that can't match (Feb 30th, ...)
+MAX_YEARS = 28
+
+
+##################################
+
+
+def next_bit(mask: int, start: int) -> int:
+    """Index of the lowest set bit of mask at or above start, -1 if none
+
+    Args:
+        mask: the bitset
+        start: lowest index to consider
+    """
+
+    mask >>= start
+    if not mask:
+        return -1
+
+    return start + (mask & -mask).bit_length() - 1
+
+
+def _parse_value(text, low, high, names, field):
+    value = names.get(text.lower())
+    if value is None:
+        try:
+            value = int(text)
+        except ValueError:
+            raise ValueError(f"Invalid {field} value: {text!r}") from None
+
+    if not low <= value <= high:
+        raise ValueError(f"{field} value {value} is out of {low}..{high} range")
+
+    return value
+
+
+def _parse_field(text, low, high, names, field):
+    # Returns the bitset of values, and whether the field was restricted
+    mask = 0
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = _parse_value(step_text, 1, high - low + 1, {}, f"{field} step")
+
+        if part == "*":
+            first, last = low, high
+        elif "-" in part:
+            first, last = part.split("-", 1)
+            first = _parse_value(first, low, high, names, field)
+            last = _parse_value(last, low, high, names, field)
+        else:
+            first = _parse_value(part, low, high, names, field)
+            last = high if step > 1 else first
+
+        if first > last:
+            raise ValueError(f"Invalid {field} range: {part!r}")
+
+        for value in range(first, last + 1, step):
+            mask |= 1 << value
+
+    return mask, text != "*"
+
+
+class CronRule:
+    """Cron expression rule
+
+    Standard 5 fields expressions (minute, hour, day of month, month, day of
+    week) are supported, with lists, ranges, steps, month and week day names,
+    the @hourly, @daily, ... macros, and the "nth week day of the month"
+    syntax, such as "mon#1" for the first monday. As for cron, when both day
+    fields are restricted, a day matching either of them matches.
+
+    The expression is compiled once into one bitset per field, so that the
+    next run is found with a few bit scans.
+    """
+
+    def __init__(self, expression: str):
+        """
+        Args:
+            expression: the cron expression
+
+        Raises:
+            ValueError: the expression is invalid
+        """
+
+        self.expression = expression
+
+        fields = MACROS.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression {expression!r} must have 5 fields")
+
+        # Extract nth week day entries: bit (n - 1) * 7 + week day
+        nth = 0
+        dow_parts = []
+        for part in fields[4].split(","):
+            if "#" in part:
+                day, index = part.split("#", 1)
+                day = _parse_value(day, 0, 7, FIELDS[4][3], "day of week") % 7
+                index = _parse_value(index, 1, 5, {}, "week day index")
+                nth |= 1 << ((index - 1) * 7 + day)
+            else:
+                dow_parts.append(part)
+
+        masks = []
+        for text, (name, low, high, names) in zip(fields[:4], FIELDS[:4]):
+            masks.append(_parse_field(text, low, high, names, name))
+
+        name, low, high, names = FIELDS[4]
+        if dow_parts:
+            dow, dow_restricted = _parse_field(",".join(dow_parts), low, high, names, name)
+        else:
+            dow, dow_restricted = 0, True
+
+        # Sunday is both 0 and 7
+        if dow & (1 << 7):
+            dow = (dow | 1) & 0x7F
+
+        self.minutes = masks[0][0]
+        self.hours = masks[1][0]
+        self.days, self.dom_restricted = masks[2]
+        self.months = masks[3][0]
+        self.weekdays = dow
+        self.nth = nth
+        self.dow_restricted = dow_restricted or bool(nth)
+
+        # (year, month) -> bitset of matching days
+        self.month_cache = {}
+
+    def __repr__(self):
+        return f"CronRule({self.expression!r})"
+
+    def __call__(self, now: datetime) -> datetime:
+        return self.next_after(now)
+
+    def month_days(self, year: int, month: int) -> int:
+        """Bitset of the matching days of a month, bit n for day n
+
+        Args:
+            year: the year
+            month: the month, 1..12
+        """
+
+        days = self.month_cache.get((year, month))
+        if days is None:
+            if len(self.month_cache) >= MONTH_CACHE_SIZE:
+                self.month_cache.clear()
+
+            days = self.__month_days(year, month)
+            self.month_cache[(year, month)] = days
+
+        return days
+
+    def __month_days(self, year, month):
+        first_weekday, ndays = calendar.monthrange(year, month)
+        valid = ((1 << ndays) - 1) << 1
+
+        # Week days, cron numbering (0 is sunday), of each day of the month
+        first = (first_weekday + 1) % 7
+        dow_days = 0
+        if self.weekdays:
+            week = 0
+            for day in range(7):
+                if self.weekdays & (1 << ((first + day) % 7)):
+                    week |= 1 << (day + 1)
+
+            for offset in range(0, 35, 7):
+                dow_days |= week << offset
+
+        nth = self.nth
+        while nth:
+            bit = (nth & -nth).bit_length() - 1
+            nth &= nth - 1
+            index, weekday = divmod(bit, 7)
+            dow_days |= 1 << (1 + (weekday - first) % 7 + index * 7)
+
+        if self.dom_restricted and self.dow_restricted:
+            days = self.days | dow_days
+        elif self.dow_restricted:
+            days = dow_days
+        else:
+            days = self.days
+
+        return days & valid
+
+    def next_after(self, now: datetime) -> datetime:
+        """Compute the next run strictly after a datetime
+
+        Args:
+            now: reference datetime
+
+        Raises:
+            ValueError: the rule never matches
+        """
+
+        now = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        year, month, day, hour, minute = now.year, now.month, now.day, now.hour, now.minute
+        last_year = year + MAX_YEARS
+
+        while year <= last_year:
+            found = next_bit(self.months, month)
+            if found < 0:
+                year, month, day, hour, minute = year + 1, 1, 1, 0, 0
+                continue
+
+            if found != month:
+                month, day, hour, minute = found, 1, 0, 0
+
+            found = next_bit(self.month_days(year, month), day)
+            if found < 0:
+                year, month, day, hour, minute = year + (month == 12), month % 12 + 1, 1, 0, 0
+                continue
+
+            if found != day:
+                day, hour, minute = found, 0, 0
+
+            found = next_bit(self.hours, hour)
+            if found < 0:
+                then = datetime(year, month, day) + timedelta(days=1)
+                year, month, day, hour, minute = then.year, then.month, then.day, 0, 0
+                continue
+
+            if found != hour:
+                hour, minute = found, 0
+
+            found = next_bit(self.minutes, minute)
+            if found < 0:
+                then = datetime(year, month, day, hour) + timedelta(hours=1)
+                year, month, day, hour, minute = then.year, then.month, then.day, then.hour, 0
+                continue
+
+            return datetime(year, month, day, hour, found)
+
+        raise ValueError(f"{self!r} never matches")
+
+
+class IntervalRule:
+    """Fixed interval rule
+
+    Runs happen at anchor + k * interval, so that they don't drift with the
+    time spent computing or running them.
+    """
+
+    def __init__(self, interval: timedelta, anchor: datetime = None):
+        """
+        Args:
+            interval: the interval between runs, a timedelta or a number of seconds
+            anchor: reference run datetime, defaults to the rule creation
+        """
+
+        if not isinstance(interval, timedelta):
+            interval = timedelta(seconds=interval)
+
+        if interval <= timedelta(0):
+            raise ValueError(f"interval = {interval} must be positive")
+
+        self.interval = interval
+        self.anchor = anchor if anchor is not None else datetime.now()
+
+    def __repr__(self):
+        return f"IntervalRule({self.interval!r}, {self.anchor!r})"
+
+    def __call__(self, now: datetime) -> datetime:
+        return self.next_after(now)
+
+    def next_after(self, now: datetime) -> datetime:
+        """Compute the next run strictly after a datetime
+
+        Args:
+            now: reference datetime
+        """
+
+        count = (now - self.anchor) // self.interval + 1
+        return self.anchor + count * self.interval
+
+
+class LaterPeriodRule:
+    """Wrap a rule so that runs never happen in the same period as the reference
+
+    Used by the scheduling helpers in_same_* options.
+    """
+
+    PERIODS = ("hour", "day", "week", "month")
+
+    def __init__(self, rule, period: str):
+        """
+        Args:
+            rule: the wrapped rule
+            period: "hour", "day", "week" or "month"
+        """
+
+        if period not in self.PERIODS:
+            raise ValueError(f"period = {period!r} is not one of {self.PERIODS}")
+
+        self.rule = rule
+        self.period = period
+
+    def __repr__(self):
+        return f"LaterPeriodRule({self.rule!r}, {self.period!r})"
+
+    def __call__(self, now: datetime) -> datetime:
+        return self.next_after(now)
+
+    def next_after(self, now: datetime) -> datetime:
+        """Compute the first run in a later period than a datetime
+
+        Args:
+            now: reference datetime
+        """
+
+        if self.period == "hour":
+            start = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        elif self.period == "day":
+            start = datetime(now.year, now.month, now.day) + timedelta(days=1)
+        elif self.period == "week":
+            start = datetime(now.year, now.month, now.day) + timedelta(days=7 - now.weekday())
+        else:
+            start = datetime(now.year + (now.month == 12), now.month % 12 + 1, 1)
+
+        return self.rule.next_after(start - timedelta(microseconds=1))
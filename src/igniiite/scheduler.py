@@ -8,126 +8,659 @@ Scheduling utilities
 
 import asyncio
 import calendar
+import collections
+import copy
+import dataclasses
+import heapq
+import itertools
+import logging
 
+import traceback
+
+from typing import NamedTuple
 
 from igniiite.task import Task
+from igniiite.executor import JobExecutor, JobDropped, default_executor
+from igniiite.rules import CronRule, LaterPeriodRule
 
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Inspired from https://stackoverflow.com/questions/51292027/how-to-schedule-a-task-in-asyncio-so-it-runs-at-a-certain-date
 
 
+log = logging.getLogger(__name__)
+
+# Maximum number of missed runs replayed by the catch-up policy
+MAX_CATCH_UP = 1000
+
+# Difference between wall clock and monotonic clock reported as a clock step
+CLOCK_STEP_THRESHOLD = 1.0
+
+
 ##################################
 
 
-async def wait_until(then: datetime):
+async def wait_until(then: datetime, max_sleep: float = 60.0):
     """Wait until a specified timestamp before running
-    
+
+    Sleeps on the monotonic clock by steps of at most max_sleep seconds,
+    checking the wall clock between steps, so that wall clock steps are
+    caught up.
+
     Args:
         then: target timestamp
+        max_sleep: Maximum time slept before checking the wall clock again
     """
 
-    now = datetime.now()
-    await asyncio.sleep((then - now).total_seconds())
+    while True:
+        delay = (then - datetime.now()).total_seconds()
+        if delay <= 0:
+            return
+
+        await asyncio.sleep(min(delay, max_sleep))
 
 
-async def run_at(then: datetime, what: Task):
+async def run_at(
+    then: datetime,
+    what: Task,
+    executor: JobExecutor = None,
+    priority: int = 0,
+    group: str = None,
+):
     """Run a specific task at a specified timestamp
 
-    This utility allows to run a task multiple times
+    This utility allows to run a task multiple times. The run goes through
+    the executor, as scheduled runs do.
 
     Args:
         then: target timestamp
         what: the task to run
+        executor: the JobExecutor running the task, default_executor if None
+        priority: priority of the run in the executor
+        group: executor group of the run, see JobExecutor
+
+    Raises:
+        JobDropped: the run was dropped from the full executor queue
     """
 
     await wait_until(then)
-    return await what.run()
+
+    executor = default_executor if executor is None else executor
+    return await executor.run(what, priority, group)
 
 
 ##################################
 
 
-async def monthly(
+OVERLAP_POLICIES = ("skip", "queue", "concurrent")
+MISSED_POLICIES = ("catch-up", "coalesce", "drop")
+
+
+class Firing(NamedTuple):
+    """Record of a schedule firing"""
+
+    """Planned run datetime"""
+    scheduled: datetime
+
+    """Actual firing datetime"""
+    fired: datetime
+
+    """Delay between planned and actual firing, in seconds"""
+    lateness: float
+
+    """What was done: run, queued, concurrent, skipped or dropped"""
+    action: str
+
+
+class Schedule:
+    """A task registered on a Scheduler"""
+
+    def __init__(
+        self,
+        what: Task,
+        next_run,
+        label: str = "",
+        overlap: str = "skip",
+        missed: str = "coalesce",
+        grace: float = 1.0,
+        history: int = 100,
+        priority: int = 0,
+        group: str = None,
+    ):
+        """
+        Args:
+            what: the task to run
+            next_run: callable giving the next run datetime after a given datetime
+            label: name of the schedule kind, for logging
+            overlap: What to do when due while the previous run is going on: "skip", "queue" or "concurrent"
+            missed: What to do with runs missed by more than grace seconds: "catch-up", "coalesce" or "drop"
+            grace: Lateness in seconds after which a run is considered missed
+            history: Number of firing records to keep
+            priority: Priority of the runs in the scheduler executor, higher runs first
+            group: Concurrency group of the runs in the scheduler executor, see JobExecutor
+        """
+
+        if overlap not in OVERLAP_POLICIES:
+            raise ValueError(f"overlap = {overlap!r} is not one of {OVERLAP_POLICIES}")
+
+        if missed not in MISSED_POLICIES:
+            raise ValueError(f"missed = {missed!r} is not one of {MISSED_POLICIES}")
+
+        if overlap == "concurrent" and getattr(what, "sockets", None):
+            raise ValueError("overlap = 'concurrent' can't be used by tasks with sockets")
+
+        self.what = what
+        self.next_run = next_run
+        self.label = label
+        self.overlap = overlap
+        self.missed = missed
+        self.grace = grace
+        self.priority = priority
+        self.group = group
+
+        # Next planned run, None when removed from its scheduler
+        self.when = None
+
+        # asyncio tasks of the current runs
+        self.running = set()
+
+        # Numbers of the task copies running concurrently, see Scheduler
+        self.copies = set()
+
+        # Number of runs waiting for the current one to end, for the queue policy
+        self.queued = 0
+
+        # Latest firings, see Firing
+        self.history = collections.deque(maxlen=history)
+
+    def lateness(self):
+        """Lateness statistics over the firing history
+
+        Returns:
+            (mean, max) lateness in seconds, None if never fired
+        """
+
+        if not self.history:
+            return None
+
+        values = [firing.lateness for firing in self.history]
+        return sum(values) / len(values), max(values)
+
+
+class Scheduler:
+    """Central scheduler for periodic task runs
+
+    All upcoming runs are kept in a single heap, and one coroutine sleeps
+    until the earliest of them is due. Every schedule due at that moment is
+    then fired, and planned again. Adding and removing schedules is done in
+    O(log n), and may happen while the scheduler runs.
+
+    Run datetimes are wall clock datetimes, but the scheduler sleeps on the
+    event loop monotonic clock, by steps of at most max_sleep seconds: wall
+    clock steps (NTP, suspend and resume, ...) are caught up within a step.
+    How runs that were missed meanwhile, and runs overlapping a previous one,
+    are handled is set per schedule.
+
+    Runs go through a JobExecutor, which bounds how many of them run at once
+    when many schedules are due together. A run waiting in the executor
+    counts as going on for the overlap policy. Runs caught up at once run
+    one after the other.
+
+    Concurrent runs each get a fresh copy of the task, named after it with a
+    "#<number>" suffix: its state, cgroup and output file are its own.
+    """
+
+    def __init__(self, max_sleep: float = 60.0, executor: JobExecutor = None):
+        """
+        Args:
+            max_sleep: Maximum time slept before checking the wall clock again
+            executor: executor of the runs, the shared default_executor if None
+        """
+
+        self.max_sleep = max_sleep
+        self.executor = default_executor if executor is None else executor
+
+        self.heap = []
+        self.counter = itertools.count()
+        self.schedules = set()
+
+        self.runner = None
+        self.wakeup = None
+
+    def __len__(self):
+        return len(self.schedules)
+
+    def __push(self, schedule, now):
+        schedule.when = schedule.next_run(now)
+        heapq.heappush(self.heap, (schedule.when, next(self.counter), schedule))
+
+        label = f"{schedule.label} scheduling: " if schedule.label else ""
+        schedule.what.log.info(f"{label}scheduled to run task at {schedule.when}")
+
+        # Wake the runner up if this run is now the earliest one
+        if self.heap[0][2] is schedule:
+            self.__wake()
+
+    def __wake(self):
+        if self.wakeup is not None and not self.wakeup.done():
+            self.wakeup.set_result(None)
+
+    def __head(self):
+        # Removed schedules are dropped from the heap lazily
+        while self.heap:
+            when, _, schedule = self.heap[0]
+            if schedule.when == when and schedule in self.schedules:
+                return self.heap[0]
+            heapq.heappop(self.heap)
+
+        return None
+
+    def add(self, what: Task, next_run, label: str = "", **policy) -> Schedule:
+        """Schedule a task
+
+        Args:
+            what: the task to run
+            next_run: callable giving the next run datetime after a given datetime
+            label: name of the schedule kind, for logging
+            policy: overlap, missed, grace, history, priority and group settings, see Schedule
+
+        Returns:
+            the Schedule object, to give to remove()
+        """
+
+        schedule = Schedule(what, next_run, label, **policy)
+        self.schedules.add(schedule)
+        self.__push(schedule, datetime.now())
+
+        return schedule
+
+    def remove(self, schedule: Schedule):
+        """Remove a schedule. Runs of it already going on are not stopped
+
+        Args:
+            schedule: the schedule returned by add()
+        """
+
+        self.schedules.discard(schedule)
+        schedule.when = None
+        schedule.queued = 0
+
+        # Keep the heap from growing with removed entries
+        if len(self.heap) > 2 * len(self.schedules) + 16:
+            self.heap = [entry for entry in self.heap if entry[2] in self.schedules]
+            heapq.heapify(self.heap)
+
+    def next_runs(self, n: int = 10):
+        """List the next planned runs
+
+        Args:
+            n: number of runs to list
+
+        Returns:
+            list of (datetime, task) tuples, in chronological order
+        """
+
+        heap = [
+            entry
+            for entry in self.heap
+            if entry[2] in self.schedules and entry[0] == entry[2].when
+        ]
+        heapq.heapify(heap)
+
+        runs = []
+        while heap and len(runs) < n:
+            when, seq, schedule = heapq.heappop(heap)
+            runs.append((when, schedule.what))
+            heapq.heappush(heap, (schedule.next_run(when), seq, schedule))
+
+        return runs
+
+    def __due(self, schedule, when, now):
+        # All the slots of a schedule due at now, starting from when
+        slots = [when]
+        while len(slots) < MAX_CATCH_UP:
+            then = schedule.next_run(slots[-1])
+            if then > now:
+                break
+            slots.append(then)
+
+        return slots
+
+    def __fire(self, schedule, when, now):
+        slots = self.__due(schedule, when, now)
+        late = [slot for slot in slots if (now - slot).total_seconds() > schedule.grace]
+
+        if late and schedule.missed == "drop":
+            for slot in late:
+                self.__record(schedule, slot, now, "dropped")
+            slots = slots[len(late) :]
+
+        elif late and schedule.missed == "coalesce":
+            for slot in slots[:-1]:
+                self.__record(schedule, slot, now, "dropped")
+            slots = slots[-1:]
+
+        if len(slots) > 1 or late:
+            schedule.what.log.warning(
+                f"Schedule of '{schedule.what.name}' missed {len(late)} run(s),"
+                f" {schedule.missed} policy: running {len(slots)}"
+            )
+
+        for index, slot in enumerate(slots):
+            if index == 0:
+                action = self.__start(schedule)
+            elif action != "skipped":
+                # Caught up runs follow the first one, whatever the overlap policy
+                schedule.queued += 1
+                action = "queued"
+            self.__record(schedule, slot, now, action)
+
+        return slots[-1] if slots else when
+
+    def __record(self, schedule, slot, now, action):
+        schedule.history.append(
+            Firing(slot, now, (now - slot).total_seconds(), action)
+        )
+
+    def __start(self, schedule):
+        if schedule.running:
+            if schedule.overlap == "skip":
+                schedule.what.log.warning(
+                    f"Previous run of '{schedule.what.name}' still going on, skipping"
+                )
+                return "skipped"
+
+            if schedule.overlap == "queue":
+                schedule.queued += 1
+                return "queued"
+
+            self.__spawn(schedule, *self.__copy(schedule))
+            return "concurrent"
+
+        self.__spawn(schedule, schedule.what)
+        return "run"
+
+    def __copy(self, schedule):
+        # Concurrent runs each need their own task: the lowest free number
+        # keeps the names, and so the output files, from piling up
+        number = 1
+        while number in schedule.copies:
+            number += 1
+        schedule.copies.add(number)
+
+        what = schedule.what
+        changes = {"name": f"{what.name}#{number}"}
+
+        # Nor do they share the containers of the settings
+        for field in dataclasses.fields(what):
+            value = getattr(what, field.name)
+            if field.init and isinstance(value, (set, dict)):
+                changes[field.name] = copy.copy(value)
+
+        return dataclasses.replace(what, **changes), number
+
+    def __spawn(self, schedule, what, number=None):
+        run = asyncio.create_task(self.__run(schedule, what, number))
+        schedule.running.add(run)
+
+    async def __run(self, schedule, what, number):
+        try:
+            while True:
+                try:
+                    await self.executor.run(what, schedule.priority, schedule.group)
+                except JobDropped:
+                    pass  # Logged by the executor
+                except Exception:
+                    log.error(f"Task '{what.name}' failed: {traceback.format_exc()}")
+
+                if schedule.queued <= 0:
+                    break
+                schedule.queued -= 1
+
+        finally:
+            schedule.running.discard(asyncio.current_task())
+            schedule.copies.discard(number)
+
+    async def run(self):
+        """Run the scheduler until cancelled
+
+        Cancelling the scheduler also cancels the runs going on.
+        """
+
+        loop = asyncio.get_running_loop()
+        self.runner = asyncio.current_task()
+
+        wall, mono = datetime.now(), loop.time()
+
+        try:
+            while True:
+                self.wakeup = loop.create_future()
+                head = self.__head()
+
+                timer = None
+                if head is not None:
+                    delay = (head[0] - datetime.now()).total_seconds()
+                    if delay > 0:
+                        timer = loop.call_later(
+                            min(delay, self.max_sleep), self.__wake
+                        )
+                    else:
+                        self.__wake()
+
+                try:
+                    await self.wakeup
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+
+                # Report wall clock steps
+                now, now_mono = datetime.now(), loop.time()
+                drift = (now - wall).total_seconds() - (now_mono - mono)
+                if abs(drift) > CLOCK_STEP_THRESHOLD:
+                    log.warning(f"Wall clock stepped by {drift:+.3f}s")
+                wall, mono = now, now_mono
+
+                # Fire every due schedule
+                while True:
+                    head = self.__head()
+                    if head is None or head[0] > now:
+                        break
+
+                    when, _, schedule = heapq.heappop(self.heap)
+                    last = self.__fire(schedule, when, now)
+                    self.__push(schedule, max(now, last))
+
+        finally:
+            self.runner = None
+            self.wakeup = None
+
+            runs = []
+            for schedule in self.schedules:
+                schedule.queued = 0
+                runs.extend(schedule.running)
+
+            for run in runs:
+                run.cancel()
+
+            if runs:
+                await asyncio.gather(*runs, return_exceptions=True)
+
+    def start(self):
+        """Run the scheduler in the background, if it is not already running
+
+        Returns:
+            the asyncio task running the scheduler
+        """
+
+        if self.runner is None:
+            self.runner = asyncio.get_running_loop().create_task(self.run())
+
+        return self.runner
+
+
+# Scheduler shared by the monthly, weekly, daily and hourly helpers
+default_scheduler = Scheduler()
+
+
+async def run_scheduled(
     what: Task,
+    next_run,
+    run_at_start: bool = False,
+    label: str = "",
+    scheduler: Scheduler = None,
+    **policy,
+):
+    """Run a task on a scheduler, until cancelled
+
+    Args:
+        what: the task to run
+        next_run: callable giving the next run datetime after a given datetime
+        run_at_start: Run once before waiting for the first schedule
+        label: name of the schedule kind, for logging
+        scheduler: the scheduler to use, defaults to the shared one
+        policy: overlap, missed, grace, history, priority and group settings, see Schedule
+    """
+
+    scheduler = default_scheduler if scheduler is None else scheduler
+
+    try:
+        if run_at_start:
+            what.log.info(f"{label} scheduling: run at least the task once")
+            try:
+                await scheduler.executor.run(what, policy.get("priority", 0), policy.get("group"))
+            except JobDropped:
+                pass  # Logged by the executor
+
+        entry = scheduler.add(what, next_run, label, **policy)
+        try:
+            scheduler.start()
+            await asyncio.get_running_loop().create_future()
+        finally:
+            scheduler.remove(entry)
+
+    except asyncio.CancelledError:
+        pass
+
+
+##################################
+
+
+def _in_period(rule, in_same: bool, period: str):
+    return rule if in_same else LaterPeriodRule(rule, period)
+
+
+def _cron_weekday(day: calendar.Day) -> int:
+    # Cron week days start on sunday
+    return (day.value + 1) % 7
+
+
+def monthly_rule(
     week: int = 0,
     day: calendar.Day = calendar.MONDAY,
     hour: int = 0,
-    run_at_start: bool = False,
     in_same_month: bool = True,
 ):
-    """Run a task monthly
+    """Rule running on the week-th given week day of each month, at a given hour
 
     Args:
-        what: The task to run
         week: Target week number, 0..3
         day: Target week day, see Weekday enum
-        run_at_start: Run once when starting the scheduler
+        hour: Target hour, 0..23
         in_same_month: Next scheduling can be in same month
     """
 
-    # Check arguments
-    if (week < 0) or (week >= 4):
-        raise ValueError(f"week = {week} is out of 0..4 range")
+    rule = CronRule(f"0 {hour} * * {_cron_weekday(day)}#{week + 1}")
+    return _in_period(rule, in_same_month, "month")
 
-    if not isinstance(day, calendar.Day):
-        raise TypeError(f"type(day)={type(day)} is not of calendar.Day type")
 
-    # Run once if needed
-    try:
-        if run_at_start:
-            what.log.info("Monthly scheduling: run at least the task once")
-            await what.run()
+def weekly_rule(day: calendar.Day, hour: int = 0, in_same_week: bool = True):
+    """Rule running on a given week day, at a given hour
 
-        while not asyncio.current_task().cancelled():
-            now = datetime.now()
-            target_year = now.year
-            target_month = now.month
+    Args:
+        day: Target week day
+        hour: Target hour, 0..23
+        in_same_week: Next scheduling can be in same week
+    """
 
-            start_weekday, last_monthday = calendar.monthrange(
-                target_year, target_month
-            )
+    rule = CronRule(f"0 {hour} * * {_cron_weekday(day)}")
+    return _in_period(rule, in_same_week, "week")
 
-            # Compute month day target
-            days_offset = week * 7 + (day.value - start_weekday) + 1
 
-            # Target next week if target week day already gone for current week
-            if days_offset <= 0:
-                days_offset += 7
+def daily_rule(hour: int = 0, in_same_day: bool = True):
+    """Rule running each day at a given hour
+
+    Args:
+        hour: Target hour, 0..23
+        in_same_day: Next scheduling can be in same day
+    """
 
-            # Check if target day is valid
-            # -> Day is out of range for month
-            # -> User requested for the next month
-            # -> Day is already gone in month
-            if (
-                (days_offset >= last_monthday)
-                or (not in_same_month)
-                or (days_offset <= now.day)
-            ):
+    return _in_period(CronRule(f"0 {hour} * * *"), in_same_day, "day")
 
-                target_month += 1
 
-                # Happy new year!
-                if target_month > calendar.DECEMBER.value:
-                    target_month = calendar.JANUARY.value
-                    target_year += 1
+def hourly_rule(minutes: int = 0, in_same_hour: bool = True):
+    """Rule running each hour at a given number of minutes
 
-                start_weekday, last_monthday = calendar.monthrange(
-                    target_year, target_month
-                )
-                days_offset = week * 7 + (day.value - start_weekday) + 1
+    Args:
+        minutes: Target minutes, 0..59
+        in_same_hour: Next scheduling can be in same hour
+    """
 
-                if days_offset <= 0:
-                    days_offset += 7
+    return _in_period(CronRule(f"{minutes} * * * *"), in_same_hour, "hour")
 
-            then = datetime(target_year, target_month, days_offset, 0, 0, 0)
 
-            what.log.info(f"Monthly scheduling: scheduled to run task at {then}")
+##################################
 
-            await run_at(then, what)
 
-    except asyncio.CancelledError:
-        pass
+async def monthly(
+    what: Task,
+    week: int = 0,
+    day: calendar.Day = calendar.MONDAY,
+    hour: int = 0,
+    run_at_start: bool = False,
+    in_same_month: bool = True,
+    overlap: str = "skip",
+    missed: str = "coalesce",
+    grace: float = 1.0,
+    priority: int = 0,
+    group: str = None,
+):
+    """Run a task monthly
+
+    Args:
+        what: The task to run
+        week: Target week number, 0..3: the task runs on the (week + 1)-th given week day of the month
+        day: Target week day, see Weekday enum
+        hour: Target hour, 0..23
+        run_at_start: Run once when starting the scheduler
+        in_same_month: Next scheduling can be in same month
+        overlap: What to do when due while the previous run is going on, see Schedule
+        missed: What to do with runs missed by more than grace seconds, see Schedule
+        grace: Lateness in seconds after which a run is considered missed
+        priority: Priority of the runs in the scheduler executor, higher runs first
+        group: Concurrency group of the runs in the scheduler executor, see JobExecutor
+    """
+
+    # Check arguments
+    if (week < 0) or (week >= 4):
+        raise ValueError(f"week = {week} is out of 0..4 range")
+
+    if not isinstance(day, calendar.Day):
+        raise TypeError(f"type(day)={type(day)} is not of calendar.Day type")
+
+    if (hour < 0) or (hour >= 24):
+        raise ValueError(f"hour = {hour} is out of 0..23 range")
+
+    await run_scheduled(
+        what,
+        monthly_rule(week, day, hour, in_same_month),
+        run_at_start=run_at_start,
+        label="Monthly",
+        overlap=overlap,
+        missed=missed,
+        grace=grace,
+        priority=priority,
+        group=group,
+    )
 
 
 async def weekly(
@@ -136,11 +669,21 @@ async def weekly(
     hour: int = 0,
     run_at_start: bool = False,
     in_same_week: bool = True,
+    overlap: str = "skip",
+    missed: str = "coalesce",
+    grace: float = 1.0,
+    priority: int = 0,
+    group: str = None,
 ):
     """Run task weekly.
 
     Args:
         what: The task to run
+        overlap: What to do when due while the previous run is going on, see Schedule
+        missed: What to do with runs missed by more than grace seconds, see Schedule
+        grace: Lateness in seconds after which a run is considered missed
+        priority: Priority of the runs in the scheduler executor, higher runs first
+        group: Concurrency group of the runs in the scheduler executor, see JobExecutor
     """
 
     # Check arguments
@@ -150,43 +693,29 @@ async def weekly(
     if (hour < 0) or (hour >= 24):
         raise ValueError(f"hour = {hour} is not in range 0..23")
 
-    try:
-        # Run at start?
-        if run_at_start:
-            what.log.info("Weekly scheduling: run at least the task once")
-            await what.run()
-
-        while not asyncio.current_task().cancelled():
-            now = datetime.now()
-
-            # Compute next timestamp
-            then = now
-            delta_days = day.value - then.weekday()
-
-            if (
-                (not in_same_week)
-                or (delta_days < 0)
-                or ((delta_days == 0) and (then.hour >= hour))
-            ):
-                then += timedelta(days=7)
-
-            then += timedelta(days=delta_days)
-            then = datetime(then.year, then.month, then.day, hour, 0, 0)
-
-            what.log.info(f"Weekly scheduling: scheduled to run task at {then}")
-
-            # Run the task
-            await run_at(then, what)
-
-    except asyncio.CancelledError:
-        pass
+    await run_scheduled(
+        what,
+        weekly_rule(day, hour, in_same_week),
+        run_at_start=run_at_start,
+        label="Weekly",
+        overlap=overlap,
+        missed=missed,
+        grace=grace,
+        priority=priority,
+        group=group,
+    )
 
 
 async def daily(
     what: Task,
     hour: int = 0,
     run_at_start: bool = False,
-    in_same_day: bool = True
+    in_same_day: bool = True,
+    overlap: str = "skip",
+    missed: str = "coalesce",
+    grace: float = 1.0,
+    priority: int = 0,
+    group: str = None,
 ):
     """Run a task daily.
 
@@ -198,77 +727,67 @@ async def daily(
         hour: Hour to run, defaults to 0, should range from 0-23 (24h format)
         run_at_start: Run the task one time when starting?
         in_same_day: Allow next schedule to be in same day when starting
+        overlap: What to do when due while the previous run is going on, see Schedule
+        missed: What to do with runs missed by more than grace seconds, see Schedule
+        grace: Lateness in seconds after which a run is considered missed
+        priority: Priority of the runs in the scheduler executor, higher runs first
+        group: Concurrency group of the runs in the scheduler executor, see JobExecutor
     """
 
     # Check arguments
     if (hour < 0) or (hour >= 24):
         raise ValueError(f"hour = {hour} is out of 0..23 range")
 
-    try:
-        # Run at start?
-        if run_at_start:
-            what.log.info("Daily scheduling: run at least the task once")
-            await what.run()
-
-        while not asyncio.current_task().cancelled():
-            now = datetime.now()
-
-            # Compute next execution timestamp
-            then = now
-            if not in_same_day or now.hour >= hour:
-                # Get the next day
-                then += timedelta(days=1)
-
-            # Set timestamp to target hour
-            then = datetime(then.year, then.month, then.day, hour, 0, 0)
-
-            what.log.info(f"Daily scheduling: scheduled to run task at {then}")
-
-            await run_at(then, what)
-
-    except asyncio.CancelledError:
-        pass
+    await run_scheduled(
+        what,
+        daily_rule(hour, in_same_day),
+        run_at_start=run_at_start,
+        label="Daily",
+        overlap=overlap,
+        missed=missed,
+        grace=grace,
+        priority=priority,
+        group=group,
+    )
 
 
 async def hourly(
     what: Task,
     minutes: int = 0,
     run_at_start: bool = False,
-    in_same_hour: bool = True
+    in_same_hour: bool = True,
+    overlap: str = "skip",
+    missed: str = "coalesce",
+    grace: float = 1.0,
+    priority: int = 0,
+    group: str = None,
 ):
     """Run a task hourly
 
     Args:
         what: the task to run
         minutes: At which number of minutes each hour the task should be scheduled?
-        run_at_start: Run one time before next waiting for next schedule? 
+        run_at_start: Run one time before next waiting for next schedule?
         in_same_hour: Allow next schedule to be in same hour when starting
+        overlap: What to do when due while the previous run is going on, see Schedule
+        missed: What to do with runs missed by more than grace seconds, see Schedule
+        grace: Lateness in seconds after which a run is considered missed
+        priority: Priority of the runs in the scheduler executor, higher runs first
+        group: Concurrency group of the runs in the scheduler executor, see JobExecutor
     """
 
     # Check arguments
     if (minutes < 0) or (minutes >= 60):
         raise ValueError(f"minutes = {minutes} is out of 0..59 range")
 
-    try:
-        # Run at start?
-        if run_at_start:
-            what.log.info("Hourly scheduling: run at least the task once")
-            await what.run()
-
-        while not asyncio.current_task().cancelled():
-            now = datetime.now()
-
-            # Compute next execution timestamp
-            then = now
-            if (not in_same_hour) or (then.minute >= minutes):
-                then += timedelta(hours=1)
-
-            then = datetime(then.year, then.month, then.day, then.hour, minutes, 0)
-
-            what.log.info(f"Hourly scheduling: scheduled to run task at {then}")
-
-            # Run task
-            await run_at(then, what)
-
-    except asyncio.CancelledError:
-        pass
+    await run_scheduled(
+        what,
+        hourly_rule(minutes, in_same_hour),
+        run_at_start=run_at_start,
+        label="Hourly",
+        overlap=overlap,
+        missed=missed,
+        grace=grace,
+        priority=priority,
+        group=group,
+    )
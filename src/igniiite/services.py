@@ -0,0 +1,847 @@
+"""
+Service files
+=============
+
+Declarative task definitions, in YAML files holding a "tasks" mapping of
+task names to definitions:
+
+    tasks:
+      mosquitto:
+        command: mosquitto -v
+        ready: {regex: "mosquitto version .* running"}
+        restart_policy: on-failure
+        limits: {memory_max: 256M, nice: 5}
+
+      mosquitto_sub:
+        command: [mosquitto_sub, -t, test]
+        dependencies: [mosquitto]
+        ready: {seconds: 1}
+
+      cleanup:
+        command: [find, /tmp, -mtime, "+7", -delete]
+        schedule: {cron: "@daily"}
+
+Each file is compiled to a validated, normalized form, cached under its
+content hash: a service set is only parsed and checked again for the files
+that changed since the last start. On reload, only the tasks whose
+definition changed are restarted.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import shlex
+import signal
+import asyncio
+import hashlib
+import logging
+import marshal
+import tempfile
+import importlib
+
+import traceback
+
+from datetime import timedelta
+
+from igniiite import hooks
+from igniiite.task import Task, null_hook, default_ready_hook
+from igniiite.graph import Graph, Supervisor
+from igniiite.rules import CronRule, IntervalRule
+from igniiite.limits import ResourceLimits
+from igniiite.executor import JobDropped
+from igniiite.scheduler import default_scheduler
+
+
+log = logging.getLogger(__name__)
+
+# Version of the compiled form, part of the cache keys
+COMPILE_VERSION = 1
+
+SERVICE_SUFFIXES = (".yaml", ".yml")
+
+SIZE_SUFFIXES = {"K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+
+# Task fields given as is, and their accepted types
+TASK_FIELDS = {
+    "log_output": (str,),
+    "chunk_size": (int,),
+    "max_line_size": (int,),
+    "watchdog_timeout": (int, float),
+    "watchdog_action": (str,),
+    "stop_timeout": (int, float),
+    "kill_timeout": (int, float),
+    "restart_policy": (str,),
+    "restart_delay": (int, float),
+    "restart_max_delay": (int, float),
+    "restart_burst": (int,),
+    "restart_window": (int, float),
+    "propagate_restart": (bool,),
+    "output_history_bytes": (int,),
+    "output_history_lines": (int,),
+    "on_demand": (bool,),
+    "idle_timeout": (int, float),
+}
+
+# Hooks given as "module:attribute" import paths
+HOOK_FIELDS = ("pre_hook", "post_hook", "kill_hook")
+
+OTHER_FIELDS = (
+    "command",
+    "dependencies",
+    "environment",
+    "ready",
+    "stop_signal",
+    "limits",
+    "health_check",
+    "schedule",
+    "sockets",
+)
+
+# Ready hooks: key -> accepted types of the value
+READY_KINDS = {
+    "regex": (str,),
+    "seconds": (int, float),
+    "tcp": (int,),
+    "unix": (str,),
+    "listen": (int, str),
+    "file": (str,),
+    "pidfile": (str,),
+    "hook": (str,),
+}
+READY_NAMES = ("immediate", "never", "notify")
+
+LIMIT_FIELDS = {
+    "cpu_quota": (int, float),
+    "cpu_weight": (int,),
+    "memory_max": (int, str),
+    "pids_max": (int,),
+    "nice": (int,),
+    "io_class": (str,),
+    "io_level": (int,),
+    "cpu_affinity": (list,),
+}
+
+SOCKET_FIELDS = {
+    "port": (int,),
+    "path": (str,),
+    "host": (str,),
+    "name": (str,),
+    "backlog": (int,),
+}
+
+HEALTH_PROBES = ("exec", "tcp", "http")
+HEALTH_FIELDS = {
+    "interval": (int, float),
+    "timeout": (int, float),
+    "failure_threshold": (int,),
+    "success_threshold": (int,),
+    "start_period": (int, float),
+    "action": (str,),
+    "path": (str,),
+    "host": (str,),
+}
+
+SCHEDULE_RULES = ("cron", "interval")
+SCHEDULE_FIELDS = {
+    "overlap": (str,),
+    "missed": (str,),
+    "grace": (int, float),
+    "run_at_start": (bool,),
+    "priority": (int,),
+    "group": (str,),
+}
+
+
+##################################
+
+
+def _default_cache_dir():
+    cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.environ.get("IGNIIITE_CACHE_DIR", os.path.join(cache, "igniiite"))
+
+
+def _check_type(where, key, value, types):
+    # bool is an int, but is not accepted as a number
+    if isinstance(value, bool) and bool not in types:
+        ok = False
+    else:
+        ok = isinstance(value, types)
+
+    if not ok:
+        names = " or ".join(tt.__name__ for tt in types)
+        raise ValueError(f"{where}: {key} = {value!r} is not a {names}")
+
+
+def _check_fields(where, spec, fields, allowed=()):
+    if not isinstance(spec, dict):
+        raise ValueError(f"{where}: {spec!r} is not a mapping")
+
+    for key, value in spec.items():
+        if key in fields:
+            _check_type(where, key, value, fields[key])
+        elif key not in allowed:
+            raise ValueError(f"{where}: unknown key {key!r}")
+
+
+def parse_size(value):
+    """Parse a size in bytes, with an optional K, M, G or T binary suffix
+
+    Args:
+        value: an int, or a str like "256M"
+    """
+
+    if isinstance(value, int):
+        return value
+
+    text = value.strip().upper().removesuffix("B").removesuffix("I")
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+
+    return int(text)
+
+
+def import_object(path: str):
+    """Import an object from a "module:attribute" path
+
+    Args:
+        path: the import path
+    """
+
+    module, _, attribute = path.partition(":")
+    if not module or not attribute:
+        raise ValueError(f"{path!r} is not a 'module:attribute' import path")
+
+    target = importlib.import_module(module)
+    for name in attribute.split("."):
+        target = getattr(target, name)
+
+    return target
+
+
+##################################
+
+
+def compile_task(where, name, spec):
+    """Check a task definition, and bring it to its normalized form
+
+    Args:
+        where: location of the definition, for error messages
+        name: the task name
+        spec: the definition, as loaded from YAML
+
+    Returns:
+        the normalized definition, made of plain types only
+
+    Raises:
+        ValueError: the definition is invalid
+    """
+
+    _check_fields(where, spec, TASK_FIELDS, HOOK_FIELDS + OTHER_FIELDS)
+    compiled = {key: spec[key] for key in TASK_FIELDS if key in spec}
+
+    # Command: a list of arguments, or a str split as a shell would do
+    command = spec.get("command")
+    if isinstance(command, str):
+        command = shlex.split(command)
+    if not isinstance(command, list) or not command:
+        raise ValueError(f"{where}: command = {command!r} is not a non-empty str or list")
+    compiled["command"] = [str(arg) for arg in command]
+
+    dependencies = spec.get("dependencies", [])
+    if not isinstance(dependencies, list) or not all(isinstance(dep, str) for dep in dependencies):
+        raise ValueError(f"{where}: dependencies = {dependencies!r} is not a list of task names")
+    compiled["dependencies"] = sorted(set(dependencies))
+
+    environment = spec.get("environment", {})
+    if not isinstance(environment, dict):
+        raise ValueError(f"{where}: environment = {environment!r} is not a mapping")
+    compiled["environment"] = {str(key): str(value) for key, value in environment.items()}
+
+    for key in HOOK_FIELDS:
+        if key in spec:
+            _check_type(where, key, spec[key], (str,))
+            compiled[key] = spec[key]
+
+    if "stop_signal" in spec:
+        compiled["stop_signal"] = _compile_signal(where, spec["stop_signal"])
+
+    compiled["ready"] = _compile_ready(where, spec.get("ready", "immediate"))
+
+    if "limits" in spec:
+        limits = spec["limits"]
+        _check_fields(f"{where}: limits", limits, LIMIT_FIELDS)
+        limits = dict(limits)
+        if "memory_max" in limits:
+            limits["memory_max"] = parse_size(limits["memory_max"])
+        compiled["limits"] = limits
+
+    if "health_check" in spec:
+        compiled["health_check"] = _compile_health(where, spec["health_check"])
+
+    if "schedule" in spec:
+        compiled["schedule"] = _compile_schedule(where, spec["schedule"])
+
+    if "sockets" in spec:
+        compiled["sockets"] = _compile_sockets(where, spec["sockets"])
+
+    # Let the objects check their own settings
+    try:
+        build_task(name, compiled, set())
+    except (ValueError, ImportError, AttributeError) as exc:
+        raise ValueError(f"{where}: {exc}") from exc
+
+    return compiled
+
+
+def _compile_signal(where, value):
+    if isinstance(value, str):
+        name = value.upper()
+        if not name.startswith("SIG"):
+            name = "SIG" + name
+        try:
+            return int(signal.Signals[name])
+        except KeyError:
+            raise ValueError(f"{where}: stop_signal = {value!r} is not a signal") from None
+
+    _check_type(where, "stop_signal", value, (int,))
+    return value
+
+
+def _compile_ready(where, value):
+    if isinstance(value, str):
+        if value not in READY_NAMES:
+            raise ValueError(f"{where}: ready = {value!r} is not one of {READY_NAMES}")
+        return {value: True}
+
+    _check_fields(f"{where}: ready", value, READY_KINDS, ("stream", "host"))
+    kinds = [key for key in value if key in READY_KINDS]
+    if len(kinds) != 1:
+        raise ValueError(f"{where}: ready needs exactly one of {tuple(READY_KINDS)}")
+
+    return dict(value)
+
+
+def _compile_health(where, value):
+    _check_fields(f"{where}: health_check", value, HEALTH_FIELDS, HEALTH_PROBES)
+    probes = [key for key in value if key in HEALTH_PROBES]
+    if len(probes) != 1:
+        raise ValueError(f"{where}: health_check needs exactly one of {HEALTH_PROBES}")
+
+    compiled = dict(value)
+    if isinstance(compiled.get("exec"), str):
+        compiled["exec"] = shlex.split(compiled["exec"])
+
+    return compiled
+
+
+def _compile_sockets(where, value):
+    # A port or path alone is a shorthand for {port: ...} or {path: ...}
+    if not isinstance(value, list):
+        raise ValueError(f"{where}: sockets = {value!r} is not a list")
+
+    sockets = []
+    for item in value:
+        if isinstance(item, int) and not isinstance(item, bool):
+            item = {"port": item}
+        elif isinstance(item, str):
+            item = {"path": item}
+
+        _check_fields(f"{where}: sockets", item, SOCKET_FIELDS)
+        sockets.append(dict(item))
+
+    return sockets
+
+
+def _compile_schedule(where, value):
+    _check_fields(f"{where}: schedule", value, SCHEDULE_FIELDS, SCHEDULE_RULES)
+    rules = [key for key in value if key in SCHEDULE_RULES]
+    if len(rules) != 1:
+        raise ValueError(f"{where}: schedule needs exactly one of {SCHEDULE_RULES}")
+
+    compiled = dict(value)
+    if "cron" in compiled:
+        _check_type(where, "cron", compiled["cron"], (str,))
+        try:
+            CronRule(compiled["cron"])
+        except ValueError as exc:
+            raise ValueError(f"{where}: schedule: {exc}") from exc
+    else:
+        _check_type(where, "interval", compiled["interval"], (int, float))
+
+    return compiled
+
+
+def compile_file(path, data=None):
+    """Compile a service file
+
+    Args:
+        path: path of the file
+        data: content of the file, read from path if None
+
+    Returns:
+        a dict of task name -> normalized definition, see compile_task()
+
+    Raises:
+        ValueError: the file is invalid
+    """
+
+    if data is None:
+        with open(path, "rb") as fhandle:
+            data = fhandle.read()
+
+    # Only needed on a cache miss: an unchanged service set starts without it
+    try:
+        import yaml
+    except ImportError as exc:
+        raise ImportError("Service files need PyYAML, install igniiite[services]") from exc
+
+    try:
+        document = yaml.load(data, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    except yaml.YAMLError as exc:
+        raise ValueError(f"{path}: {exc}") from exc
+
+    if document is None:
+        return {}
+
+    _check_fields(str(path), document, {}, ("tasks",))
+    tasks = document.get("tasks") or {}
+    if not isinstance(tasks, dict):
+        raise ValueError(f"{path}: tasks is not a mapping")
+
+    return {
+        str(name): compile_task(f"{path}: task '{name}'", str(name), spec)
+        for name, spec in tasks.items()
+    }
+
+
+##################################
+
+
+class SpecCache:
+    """Compiled service files, stored under the hash of their content
+
+    Entries are marshal dumps, keyed by the file content, the compiled
+    form version and the Python version, so a stale entry is never used.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: cache directory, created on first write
+        """
+
+        self.directory = directory
+
+    def key(self, data: bytes):
+        digest = hashlib.sha256(data)
+        digest.update(f"{COMPILE_VERSION}:{sys.version_info[:2]}".encode("ascii"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        try:
+            with open(os.path.join(self.directory, key), "rb") as fhandle:
+                return marshal.load(fhandle)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def put(self, key, compiled):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as fhandle:
+                marshal.dump(compiled, fhandle)
+            os.replace(temp, os.path.join(self.directory, key))
+
+        except OSError as exc:
+            log.warning(f"Could not cache compiled services: {exc}")
+
+    def compile(self, path):
+        """Compile a service file, or get it from the cache
+
+        Args:
+            path: path of the file
+        """
+
+        with open(path, "rb") as fhandle:
+            data = fhandle.read()
+
+        key = self.key(data)
+        compiled = self.get(key)
+        if compiled is None:
+            compiled = compile_file(path, data)
+            self.put(key, compiled)
+
+        return compiled
+
+
+def service_files(paths):
+    """List the service files of files and directories
+
+    Args:
+        paths: service files, or directories whose .yaml and .yml files are taken
+    """
+
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+
+    files = []
+    for path in paths:
+        path = os.fspath(path)
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(SERVICE_SUFFIXES)
+            )
+        else:
+            files.append(path)
+
+    return files
+
+
+def load_specs(paths, cache_dir=None):
+    """Compile the service files, using the cache
+
+    Args:
+        paths: service files and directories, see service_files()
+        cache_dir: cache directory, None for the default one, False for no cache
+
+    Returns:
+        a dict of task name -> normalized definition
+
+    Raises:
+        ValueError: a file is invalid, or a task is defined twice
+    """
+
+    cache = None
+    if cache_dir is not False:
+        cache = SpecCache(cache_dir or _default_cache_dir())
+
+    specs = {}
+    origins = {}
+    for path in service_files(paths):
+        compiled = cache.compile(path) if cache is not None else compile_file(path)
+        for name, spec in compiled.items():
+            if name in specs:
+                raise ValueError(f"{path}: task '{name}' is already defined in {origins[name]}")
+            specs[name] = spec
+            origins[name] = path
+
+    return specs
+
+
+##################################
+
+
+def _build_ready(ready):
+    if "regex" in ready:
+        return hooks.wait_for_str_re(ready["regex"], ready.get("stream", "stderr"))
+    if "seconds" in ready:
+        return hooks.wait_for_seconds(ready["seconds"])
+    if "tcp" in ready:
+        return hooks.wait_for_tcp(ready["tcp"], ready.get("host", "127.0.0.1"))
+    if "unix" in ready:
+        return hooks.wait_for_unix(ready["unix"])
+    if "listen" in ready:
+        if isinstance(ready["listen"], int):
+            return hooks.wait_for_listen(port=ready["listen"])
+        return hooks.wait_for_listen(path=ready["listen"])
+    if "file" in ready:
+        return hooks.wait_for_file(ready["file"])
+    if "pidfile" in ready:
+        return hooks.wait_for_pidfile(ready["pidfile"])
+    if "hook" in ready:
+        return import_object(ready["hook"])
+    if "never" in ready:
+        return null_hook
+
+    return default_ready_hook
+
+
+def _build_health(spec):
+    from igniiite.health import ExecProbe, HealthCheck, HttpProbe, TcpProbe
+
+    host = spec.get("host", "127.0.0.1")
+    if "exec" in spec:
+        probe = ExecProbe(spec["exec"])
+    elif "tcp" in spec:
+        probe = TcpProbe(spec["tcp"], host)
+    else:
+        probe = HttpProbe(spec["http"], spec.get("path", "/"), host)
+
+    settings = {key: spec[key] for key in HEALTH_FIELDS if key in spec and key not in ("path", "host")}
+    return HealthCheck(probe, **settings)
+
+
+def build_task(name, spec, dependencies):
+    """Create the Task of a normalized definition
+
+    Args:
+        name: the task name
+        spec: the normalized definition, see compile_task()
+        dependencies: the Task objects of the dependencies
+
+    Returns:
+        the new Task
+    """
+
+    kwargs = {key: spec[key] for key in TASK_FIELDS if key in spec}
+    for key in HOOK_FIELDS:
+        if key in spec:
+            kwargs[key] = import_object(spec[key])
+
+    if "stop_signal" in spec:
+        kwargs["stop_signal"] = signal.Signals(spec["stop_signal"])
+
+    if "limits" in spec:
+        limits = dict(spec["limits"])
+        if "cpu_affinity" in limits:
+            limits["cpu_affinity"] = set(limits["cpu_affinity"])
+        kwargs["limits"] = ResourceLimits(**limits)
+
+    if "health_check" in spec:
+        kwargs["health_check"] = _build_health(spec["health_check"])
+
+    if "sockets" in spec:
+        from igniiite.activation import ListenSocket
+
+        kwargs["sockets"] = [ListenSocket(**sock) for sock in spec["sockets"]]
+
+    ready = spec["ready"]
+    return Task(
+        name=name,
+        command=list(spec["command"]),
+        dependencies=set(dependencies),
+        environment=dict(spec["environment"]) or None,
+        notify="notify" in ready,
+        ready_hook=_build_ready(ready),
+        **kwargs,
+    )
+
+
+def _schedule_rule(schedule):
+    if "cron" in schedule:
+        return CronRule(schedule["cron"]), "cron"
+    return IntervalRule(timedelta(seconds=schedule["interval"])), "interval"
+
+
+class Services:
+    """Tasks defined in service files
+
+    Tasks with a schedule are run by a Scheduler, the other ones by a
+    Supervisor. Scheduled tasks can't be dependencies of other tasks.
+    """
+
+    def __init__(self, paths, cache_dir=None, scheduler=None):
+        """
+        Args:
+            paths: service files and directories, see service_files()
+            cache_dir: cache directory, None for the default one, False for no cache
+            scheduler: scheduler of the scheduled tasks, the shared one if None
+        """
+
+        self.paths = paths
+        self.cache_dir = cache_dir
+        self.scheduler = default_scheduler if scheduler is None else scheduler
+
+        self.specs = {}
+        self.tasks = {}
+        self.graph = Graph([])
+        self.supervisor = None
+
+        # Task name -> Schedule, once running, and runs at start going on
+        self.schedules = {}
+        self.runs = set()
+        self.running = False
+
+    def load(self):
+        """Load the service files, see update()
+
+        Returns:
+            the names of the new or changed tasks
+        """
+
+        return self.__build(load_specs(self.paths, self.cache_dir))
+
+    def __build(self, specs):
+        for name, spec in specs.items():
+            for dep in spec["dependencies"]:
+                if dep not in specs:
+                    raise ValueError(f"Task '{name}' depends on '{dep}' which is not defined")
+                if "schedule" in specs[dep]:
+                    raise ValueError(f"Task '{name}' depends on '{dep}' which is scheduled")
+
+        changed = {name for name, spec in specs.items() if self.specs.get(name) != spec}
+
+        # Dependencies are built first. Unchanged tasks are kept, and only
+        # given the new objects of their dependencies, once all were built
+        tasks = {}
+        relinked = []
+        for name in _dependency_order(specs):
+            dependencies = {tasks[dep] for dep in specs[name]["dependencies"]}
+            if name in changed:
+                tasks[name] = build_task(name, specs[name], dependencies)
+            else:
+                tasks[name] = self.tasks[name]
+                relinked.append((tasks[name], dependencies))
+
+        for task, dependencies in relinked:
+            task.dependencies = dependencies
+
+        graph = Graph(tt for name, tt in tasks.items() if "schedule" not in specs[name])
+
+        self.specs = specs
+        self.tasks = tasks
+        self.graph = graph
+
+        return changed
+
+    async def reload(self):
+        """Load the service files again, and apply the changes
+
+        Tasks that were removed or changed are stopped, then new and changed
+        tasks are started. Unchanged tasks are left running. If the files are
+        invalid, nothing is changed.
+
+        Returns:
+            the names of the new, changed and removed tasks
+        """
+
+        specs = await asyncio.to_thread(load_specs, self.paths, self.cache_dir)
+
+        previous = self.specs
+        changed = self.__build(specs)
+        removed = set(previous) - set(specs)
+
+        log.info(
+            f"Reloading services: {len(changed)} new or changed, {len(removed)} removed"
+        )
+
+        if self.running:
+            for name in changed | removed:
+                schedule = self.schedules.pop(name, None)
+                if schedule is not None:
+                    self.scheduler.remove(schedule)
+
+            await self.supervisor.update(self.graph)
+            self.__schedule(changed)
+
+        return changed | removed
+
+    def __schedule(self, names):
+        for name in names:
+            spec = self.specs[name]
+            if "schedule" not in spec:
+                continue
+
+            settings = dict(spec["schedule"])
+            rule, label = _schedule_rule(settings)
+            policy = {
+                key: settings[key]
+                for key in ("overlap", "missed", "grace", "priority", "group")
+                if key in settings
+            }
+            self.schedules[name] = self.scheduler.add(self.tasks[name], rule, label, **policy)
+
+            if settings.get("run_at_start"):
+                run = asyncio.get_running_loop().create_task(
+                    self.__run_at_start(self.tasks[name], policy)
+                )
+                self.runs.add(run)
+                run.add_done_callback(self.runs.discard)
+
+        if self.schedules:
+            self.scheduler.start()
+
+    async def __run_at_start(self, task, policy):
+        try:
+            await self.scheduler.executor.run(task, policy.get("priority", 0), policy.get("group"))
+        except JobDropped:
+            pass  # Logged by the executor
+
+    async def run(self):
+        """Run the tasks, loading the service files first if not done
+
+        Returns once every supervised task has ended, unless tasks are
+        scheduled: it then runs until cancelled.
+        """
+
+        if not self.specs:
+            self.load()
+
+        self.supervisor = Supervisor(self.graph)
+        self.running = True
+        self.__schedule(self.specs)
+
+        try:
+            await self.supervisor.run()
+            if self.schedules:
+                await asyncio.get_running_loop().create_future()
+
+        finally:
+            self.running = False
+            for schedule in self.schedules.values():
+                self.scheduler.remove(schedule)
+            self.schedules.clear()
+
+    def install_reload_handler(self, sig=signal.SIGHUP):
+        """Reload the service files when a signal is received
+
+        Args:
+            sig: the signal to handle
+        """
+
+        def on_signal():
+            asyncio.ensure_future(self.__safe_reload())
+
+        asyncio.get_running_loop().add_signal_handler(sig, on_signal)
+
+    async def __safe_reload(self):
+        try:
+            await self.reload()
+        except Exception:
+            log.error(f"Reload failed: {traceback.format_exc()}")
+
+
+def _dependency_order(specs):
+    order = []
+    done = set()
+
+    def visit(name, path):
+        if name in done:
+            return
+        if name in path:
+            cycle = " -> ".join(path[path.index(name):] + [name])
+            raise ValueError(f"Dependency cycle found: {cycle}")
+
+        path.append(name)
+        for dep in specs[name]["dependencies"]:
+            visit(dep, path)
+        path.pop()
+
+        done.add(name)
+        order.append(name)
+
+    for name in specs:
+        visit(name, [])
+
+    return order
+
+
+def load_services(paths, cache_dir=None):
+    """Load service files
+
+    Args:
+        paths: service files and directories, see service_files()
+        cache_dir: cache directory, None for the default one, False for no cache
+
+    Returns:
+        the loaded Services
+    """
+
+    services = Services(paths, cache_dir)
+    services.load()
+
+    return services
@@ -0,0 +1,314 @@
+"""
+Task output sink
+================
+
+Writes the raw output of tasks to files, bypassing the logging module.
+The event loop only queues the batches read from the processes; a writer
+thread timestamps, formats and writes them with os.writev, and rotates
+the files by size or age.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import collections
+
+from datetime import datetime
+
+
+log = logging.getLogger(__name__)
+
+SINK_FORMATS = ("text", "json")
+
+# Maximum number of buffers given to a single os.writev call
+IOV_MAX = os.sysconf("SC_IOV_MAX") if hasattr(os, "sysconf") else 1024
+
+# Encoder of the JSON line values
+encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+##################################
+
+
+def task_filename(task_name: str) -> str:
+    """Name of the per-task output file of a task
+
+    Path separators, NUL and "%" characters of the task name are percent
+    encoded, so that the file is always created in the sink directory, and
+    two tasks never share a file.
+
+    Args:
+        task_name: name of the task
+
+    Raises:
+        ValueError: the name is empty or starts with a dot
+    """
+
+    if not task_name or task_name.startswith("."):
+        raise ValueError(f"task_name = {task_name!r} can't be used as a file name")
+
+    # "%" first, so that encoded characters can't be confused with the name
+    for char in ("%", os.sep, os.altsep, "\0"):
+        if char:
+            task_name = task_name.replace(char, f"%{ord(char):02X}")
+
+    return f"{task_name}.log"
+
+
+class _SinkFile:
+    """An open output file and its rotation state"""
+
+    __slots__ = ("path", "fd", "size", "opened")
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC, 0o644)
+        self.size = os.fstat(self.fd).st_size
+        self.opened = time.monotonic()
+
+    def close(self):
+        os.close(self.fd)
+
+
+class OutputSink:
+    """Write task outputs to per-task files, or to a combined file
+
+    Text records are "<timestamp> <stream>: <line>", prefixed with the task
+    name in a combined file. JSON records hold the ts, task, stream and line
+    keys. Lines of a same read batch share a timestamp.
+
+    Writing never blocks the event loop: batches are queued for the writer
+    thread, and dropped, and counted, if more than max_pending bytes are
+    waiting.
+    """
+
+    def __init__(
+        self,
+        path,
+        per_task: bool = True,
+        format: str = "text",
+        max_bytes: int = 0,
+        max_age: float = 0,
+        backups: int = 5,
+        max_pending: int = 64 * 1024 * 1024,
+    ):
+        """
+        Args:
+            path: directory of the per-task files, or path of the combined file
+            per_task: one <task name>.log file per task, instead of a combined file, see task_filename()
+            format: "text" or "json"
+            max_bytes: rotate a file once it is bigger than this, 0 for never
+            max_age: rotate a file once it is older than this, in seconds, 0 for never
+            backups: number of rotated files kept, as <file>.1 to <file>.<backups>
+            max_pending: maximum number of bytes waiting for the writer thread
+        """
+
+        if format not in SINK_FORMATS:
+            raise ValueError(f"format = {format!r} is not one of {SINK_FORMATS}")
+
+        self.path = str(path)
+        self.per_task = per_task
+        self.format = format
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+        self.max_pending = max_pending
+
+        if per_task:
+            os.makedirs(self.path, exist_ok=True)
+
+        self.queue = collections.deque()
+        self.pending = 0
+        self.condition = threading.Condition()
+        self.thread = None
+        self.closing = False
+
+        # Dropped bytes and batches, when the writer can't keep up
+        self.dropped_bytes = 0
+        self.dropped_batches = 0
+
+        self.files = {}
+
+    def check_task(self, task_name: str):
+        """Check that the output of a task can be written to the sink
+
+        Args:
+            task_name: name of the task
+
+        Raises:
+            ValueError: the task name can't be used as a per-task file name
+        """
+
+        if self.per_task:
+            task_filename(task_name)
+
+    def write(self, task_name: str, stream: str, data):
+        """Queue a batch of output lines
+
+        Args:
+            task_name: name of the task
+            stream: "stdout" or "stderr"
+            data: a list of raw lines, or a block of complete lines separated by newlines
+        """
+
+        size = sum(map(len, data)) if isinstance(data, list) else len(data)
+
+        with self.condition:
+            if self.closing:
+                return
+
+            if self.pending + size > self.max_pending:
+                self.dropped_bytes += size
+                self.dropped_batches += 1
+                return
+
+            self.pending += size
+            self.queue.append((time.time(), task_name, stream, data, size))
+
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.__writer, name="igniiite-sink", daemon=True
+                )
+                self.thread.start()
+
+            self.condition.notify()
+
+    def flush(self):
+        """Wait for the queued batches to be written. Blocks the calling thread"""
+
+        with self.condition:
+            self.condition.wait_for(lambda: not self.queue and not self.pending)
+
+    def close(self):
+        """Write the queued batches, then stop the writer thread and close the files"""
+
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+            thread = self.thread
+
+        if thread is not None:
+            thread.join()
+
+        for sink_file in self.files.values():
+            sink_file.close()
+        self.files.clear()
+
+    def __writer(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.queue or self.closing)
+                if not self.queue:
+                    self.pending = 0
+                    self.condition.notify_all()
+                    return
+
+                batches = list(self.queue)
+                self.queue.clear()
+
+            # Group the buffers per file, keeping the order of each file
+            buffers = {}
+            for timestamp, name, stream, data, _ in batches:
+                key = name if self.per_task else None
+                buffers.setdefault(key, []).append(self.__format(timestamp, name, stream, data))
+
+            for key, chunks in buffers.items():
+                try:
+                    self.__write_file(key, chunks)
+                except (OSError, ValueError) as exc:
+                    log.error(f"Could not write output of '{key or self.path}': {exc}")
+
+            with self.condition:
+                self.pending -= sum(batch[4] for batch in batches)
+                self.condition.notify_all()
+
+    def __format(self, timestamp, name, stream, data):
+        if self.format == "json":
+            # Same record head for the whole batch, only lines are encoded one by one
+            head = '{"ts": %s, "task": %s, "stream": %s, "line": ' % (
+                json.dumps(timestamp),
+                json.dumps(name),
+                json.dumps(stream),
+            )
+            block = b"\n".join(data) if isinstance(data, list) else data
+            lines = block.decode("utf-8", errors="replace").split("\n")
+            return "".join(f"{head}{encode(line)}}}\n" for line in lines).encode("utf-8")
+
+        stamp = datetime.fromtimestamp(timestamp).isoformat(timespec="microseconds")
+        if self.per_task:
+            prefix = f"{stamp} {stream}: ".encode("utf-8")
+        else:
+            prefix = f"{stamp} {name} {stream}: ".encode("utf-8")
+
+        block = b"\n".join(data) if isinstance(data, list) else data
+        return prefix + block.replace(b"\n", b"\n" + prefix) + b"\n"
+
+    def __file(self, key):
+        sink_file = self.files.get(key)
+        if sink_file is None:
+            path = os.path.join(self.path, task_filename(key)) if self.per_task else self.path
+            sink_file = _SinkFile(path)
+            self.files[key] = sink_file
+
+        return sink_file
+
+    def __write_file(self, key, chunks):
+        sink_file = self.__file(key)
+
+        if self.max_age and time.monotonic() - sink_file.opened >= self.max_age:
+            sink_file = self.__rotate(key, sink_file)
+
+        group = []
+        size = sink_file.size
+        for chunk in chunks:
+            # Rotate between chunks, a batch is never split across files
+            if self.max_bytes and size >= self.max_bytes:
+                self.__writev(sink_file, group)
+                group = []
+                sink_file = self.__rotate(key, sink_file)
+                size = 0
+
+            group.append(chunk)
+            size += len(chunk)
+            if len(group) >= IOV_MAX:
+                self.__writev(sink_file, group)
+                group = []
+
+        self.__writev(sink_file, group)
+
+    def __writev(self, sink_file, group):
+        if not group:
+            return
+
+        total = sum(map(len, group))
+        written = os.writev(sink_file.fd, group)
+
+        # Partial writes are rare on regular files, finish them anyway
+        if written < total:
+            rest = b"".join(group)[written:]
+            while rest:
+                rest = rest[os.write(sink_file.fd, rest) :]
+
+        sink_file.size += total
+
+    def __rotate(self, key, sink_file):
+        sink_file.close()
+        path = sink_file.path
+
+        if self.backups > 0:
+            for index in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{path}.{index}"):
+                    os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+            os.replace(path, f"{path}.1")
+        else:
+            os.unlink(path)
+
+        sink_file = _SinkFile(path)
+        self.files[key] = sink_file
+
+        return sink_file
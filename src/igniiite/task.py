@@ -6,11 +6,15 @@ Task definition for igniiite init framework
 - April 2024
 """
 
+import os
+import time
+import random
 import asyncio
 import signal
 import logging
 
 import traceback
+import collections
 
 from dataclasses import dataclass, field
 
@@ -32,25 +36,176 @@ async def default_ready_hook(self):
     self.set_ready()
 
 
+def decode_lines(lines):
+    """Decode a batch of raw output lines to text
+
+    Args:
+        lines: list of bytes lines
+    """
+
+    return [line.decode("utf-8", errors="replace").strip() for line in lines]
+
+
+OVERFLOW_POLICIES = ("block", "drop-oldest", "drop-newest", "disconnect")
+
+RESTART_POLICIES = ("never", "on-failure", "always")
+
+WATCHDOG_ACTIONS = ("restart", "fail")
+
+
+class TaskEvent:
+    """Compact asyncio.Event, for the state flags of a task
+
+    Same interface as asyncio.Event, but the list of waiters is only
+    allocated while someone waits: most flags of most tasks are never
+    waited on.
+    """
+
+    __slots__ = ("_value", "_waiters")
+
+    def __init__(self):
+        self._value = False
+        self._waiters = None
+
+    def __repr__(self):
+        return f"<TaskEvent [{'set' if self._value else 'unset'}]>"
+
+    def is_set(self):
+        return self._value
+
+    def set(self):
+        if self._value:
+            return
+
+        self._value = True
+        waiters, self._waiters = self._waiters, None
+        for waiter in waiters or ():
+            if not waiter.done():
+                waiter.set_result(True)
+
+    def clear(self):
+        self._value = False
+
+    def add_waiter(self, waiter):
+        """Resolve a future with True once the flag is set, without a coroutine per waiter
+
+        Args:
+            waiter: the future
+        """
+
+        if self._value:
+            waiter.set_result(True)
+            return
+
+        if self._waiters is None:
+            self._waiters = []
+        self._waiters.append(waiter)
+
+    def remove_waiter(self, waiter):
+        if self._waiters is not None and waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+    async def wait(self):
+        """Wait until the flag is set, returns True"""
+
+        if self._value:
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        if self._waiters is None:
+            self._waiters = []
+        self._waiters.append(waiter)
+
+        try:
+            await waiter
+            return True
+        finally:
+            # Cancelled before being set
+            if self._waiters is not None and waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+
+class ListenerState:
+    """Delivery state of a listener registered on TaskListeners"""
+
+    __slots__ = ("raw", "policy", "block_timeout", "dropped", "backlog", "feeder")
+
+    def __init__(self, raw, policy, block_timeout):
+        self.raw = raw
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        # Number of lines that were not delivered to the listener
+        self.dropped = 0
+
+        # Items waiting for room in a full listener, for the block policy
+        self.backlog = None
+        self.feeder = None
+
+
+def _item_size(item):
+    return len(item) if isinstance(item, list) else 1
+
+
 class TaskListeners:
     """"Utility class to allow listen on standard outputs (stdout and stderr) for a task
 
     This allow to setup listen hooks for task status monitoring.
+
+    Listeners are asyncio.Queue like objects. Output is always delivered
+    without waiting on them, so a slow listener never throttles the process
+    or the other listeners. What happens when a bounded listener is full
+    depends on its overflow policy:
+
+    - block: items are kept aside and delivered as room is made. If the
+      listener does not make progress for block_timeout seconds, or more than
+      maxsize items are kept aside, it is disconnected;
+    - drop-oldest: the oldest queued item is dropped to make room;
+    - drop-newest: the new item is dropped;
+    - disconnect: the listener is unregistered.
+
+    A disconnected listener receives None as last item. Dropped lines are
+    counted per listener and in total.
     """
 
     def __init__(self):
-        self.listeners = set()
+        # listener -> ListenerState
+        self.listeners = {}
         self.semaphore = asyncio.Semaphore()
 
-    async def register(self, listener):
+        # Total number of lines dropped by all listeners
+        self.dropped = 0
+
+    async def register(
+        self, listener=None, raw=False, maxsize=0, policy="block", block_timeout=10.0
+    ):
         """Register a listener
 
+        Text listeners receive each output line as a decoded and stripped str.
+        Raw listeners receive each read batch as a list of bytes lines, with
+        no decoding done.
+
         Args:
-            listener: the listener to add in current task monitoring
+            listener: the listener to add in current task monitoring. A new asyncio.Queue is created if None
+            raw: Receive raw batches instead of text lines
+            maxsize: Capacity of the created queue, if listener is None. 0 means unbounded
+            policy: Overflow policy, one of "block", "drop-oldest", "drop-newest", "disconnect"
+            block_timeout: Time after which a listener stalled with the block policy is disconnected
+
+        Returns:
+            the registered listener
         """
 
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"policy = {policy!r} is not one of {OVERFLOW_POLICIES}")
+
+        if listener is None:
+            listener = asyncio.Queue(maxsize)
+
         async with self.semaphore:
-            self.listeners.add(listener)
+            self.listeners[listener] = ListenerState(raw, policy, block_timeout)
+
+        return listener
 
     async def unregister(self, listener):
         """Remove a listener
@@ -60,7 +215,121 @@ class TaskListeners:
         """
 
         async with self.semaphore:
-            self.listeners.discard(listener)
+            self.__remove(listener)
+
+    def state(self, listener):
+        """Get the delivery state of a registered listener
+
+        Args:
+            listener: the registered listener
+        """
+
+        return self.listeners[listener]
+
+    def __remove(self, listener):
+        state = self.listeners.pop(listener, None)
+        if state is not None and state.feeder is not None:
+            state.feeder.cancel()
+
+        return state
+
+    def __drop(self, state, count):
+        state.dropped += count
+        self.dropped += count
+
+    def __disconnect(self, listener, state, lost=0):
+        self.__remove(listener)
+
+        if state.backlog:
+            lost += sum(_item_size(item) for item in state.backlog)
+            state.backlog.clear()
+
+        # Make room for the end of stream marker
+        try:
+            if listener.full():
+                lost += _item_size(listener.get_nowait())
+            listener.put_nowait(None)
+        except (asyncio.QueueEmpty, asyncio.QueueFull):
+            pass
+
+        self.__drop(state, lost)
+        logging.getLogger(__name__).warning(
+            f"Listener {listener!r} disconnected, {state.dropped} lines dropped"
+        )
+
+    def __deliver(self, listener, state, item):
+        # Keep ordering while the block policy is feeding the listener
+        if state.feeder is not None:
+            self.__enqueue_backlog(listener, state, item)
+            return
+
+        try:
+            listener.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if state.policy == "drop-newest":
+            self.__drop(state, _item_size(item))
+
+        elif state.policy == "drop-oldest":
+            self.__drop(state, _item_size(listener.get_nowait()))
+            listener.put_nowait(item)
+
+        elif state.policy == "disconnect":
+            self.__disconnect(listener, state, _item_size(item))
+
+        else:
+            self.__enqueue_backlog(listener, state, item)
+
+    def __enqueue_backlog(self, listener, state, item):
+        if state.backlog is None:
+            state.backlog = collections.deque()
+
+        if len(state.backlog) >= max(listener.maxsize, 1) and listener.full():
+            self.__disconnect(listener, state, _item_size(item))
+            return
+
+        state.backlog.append(item)
+        if state.feeder is None:
+            state.feeder = asyncio.create_task(self.__feed(listener, state))
+
+    async def __feed(self, listener, state):
+        try:
+            while state.backlog:
+                item = state.backlog.popleft()
+                await asyncio.wait_for(listener.put(item), timeout=state.block_timeout)
+
+            state.feeder = None
+
+        except asyncio.TimeoutError:
+            if self.listeners.get(listener) is state:
+                state.feeder = None
+                self.__disconnect(listener, state, _item_size(item))
+
+    def publish(self, lines, text=None):
+        """Forward a batch of output lines to the listeners
+
+        This never waits on the listeners, see the overflow policies.
+
+        Args:
+            lines: list of raw bytes lines
+            text: the same lines already decoded, if available
+        """
+
+        for listener, state in tuple(self.listeners.items()):
+            if state.raw:
+                self.__deliver(listener, state, lines)
+                continue
+
+            if text is None:
+                text = decode_lines(lines)
+
+            for index, line in enumerate(text):
+                self.__deliver(listener, state, line)
+                if listener not in self.listeners:
+                    self.__drop(state, len(text) - index - 1)
+                    break
 
 
 @dataclass
@@ -89,32 +358,315 @@ class Task:
     """Ready monitoring hook. Indicates task readyness status"""
     ready_hook: Coroutine = default_ready_hook
 
+    """Output logging mode: lines (a record per line), batch (a record per read chunk) or none"""
+    log_output: str = "lines"
+
+    """Output sink writing the raw process outputs to files, see igniiite.sink.OutputSink"""
+    output_sink: object = None
+
+    """Maximum number of bytes of the last output lines kept in memory, see Task.output. 0 to keep nothing"""
+    output_history_bytes: int = 64 * 1024
+
+    """Maximum number of last output lines kept in memory"""
+    output_history_lines: int = 1000
+
+    """Size of the chunks read from the process outputs"""
+    chunk_size: int = 64 * 1024
+
+    """Lines longer than this are split"""
+    max_line_size: int = 1024 * 1024
+
+    """Process launcher, see igniiite.launcher. None for launcher.default_launcher, a plain fork and exec unless changed by igniiite.reaper.enable_pid1_mode()"""
+    launcher: object = None
+
+    """Environment variables added to the supervisor ones for the process"""
+    environment: dict = None
+
+    """Process speaks the sd_notify protocol: it tells when it is ready with READY=1, instead of the ready hook"""
+    notify: bool = False
+
+    """Maximum time between two WATCHDOG=1 notifications before the process is considered hung"""
+    watchdog_timeout: float = None
+
+    """What to do with a process missing its watchdog deadline: restart it whatever the restart policy, or fail it (restarted according to the restart policy)"""
+    watchdog_action: str = "restart"
+
+    """Listening sockets created by the supervisor and passed to the process, see igniiite.activation.ListenSocket. The task is ready once they are bound"""
+    sockets: list = None
+
+    """Launch the process on the first connection to one of its sockets only"""
+    on_demand: bool = False
+
+    """Stop an on demand process once its sockets had no connection for this time, in seconds. None to keep it running"""
+    idle_timeout: float = None
+
+    """Liveness check of the ready task, see igniiite.health.HealthCheck"""
+    health_check: object = None
+
+    """Resource limits applied to the process, see igniiite.limits. None for no limits"""
+    limits: object = None
+
+    """Signal sent to the process to stop it gracefully"""
+    stop_signal: int = signal.SIGINT
+
+    """Grace period given to the process to exit after the stop signal, before killing it"""
+    stop_timeout: float = 10.0
+
+    """Time given to the kill hook, and to the process to exit once killed"""
+    kill_timeout: float = 5.0
+
+    """Restart policy when the process exits: never, on-failure or always"""
+    restart_policy: str = "never"
+
+    """Delay before the first restart. Doubles with each restart within restart_window"""
+    restart_delay: float = 0.1
+
+    """Maximum delay between two restarts"""
+    restart_max_delay: float = 30.0
+
+    """Number of restarts allowed within restart_window before the task is considered crash looping"""
+    restart_burst: int = 5
+
+    """Time window of restart_burst, in seconds"""
+    restart_window: float = 60.0
+
+    """Restart the process when one of its dependencies restarts"""
+    propagate_restart: bool = False
 
     def __post_init__(self):
+        if self.log_output not in ("lines", "batch", "none"):
+            raise ValueError(
+                f"log_output = {self.log_output!r} is not one of 'lines', 'batch', 'none'"
+            )
+
+        if self.stop_timeout < 0 or self.kill_timeout < 0:
+            raise ValueError(
+                f"stop_timeout = {self.stop_timeout!r} and kill_timeout = {self.kill_timeout!r} must not be negative"
+            )
+
+        if self.restart_policy not in RESTART_POLICIES:
+            raise ValueError(
+                f"restart_policy = {self.restart_policy!r} is not one of {RESTART_POLICIES}"
+            )
+
+        if self.output_sink is not None and hasattr(self.output_sink, "check_task"):
+            self.output_sink.check_task(self.name)
+
+        if self.watchdog_action not in WATCHDOG_ACTIONS:
+            raise ValueError(
+                f"watchdog_action = {self.watchdog_action!r} is not one of {WATCHDOG_ACTIONS}"
+            )
+
+        if self.restart_burst < 1:
+            raise ValueError(f"restart_burst = {self.restart_burst!r} must be at least 1")
+
+        if (self.on_demand or self.idle_timeout is not None) and not self.sockets:
+            raise ValueError("on_demand and idle_timeout need sockets")
+
+        if self.idle_timeout is not None and self.idle_timeout <= 0:
+            raise ValueError(f"idle_timeout = {self.idle_timeout!r} must be positive")
+
         self.process = None
         # self.log              = logger.bind(name=self.name)
-        self.log = logging.getLogger(self.name)
-        self.ended = asyncio.Event()
-        self.ready = asyncio.Event()
+        self._log = None
+        self.ended = TaskEvent()
+        self.ready = TaskEvent()
+
+        self.failed = TaskEvent()
+
+        # Set when the task is being stopped on request
+        self.stopping = TaskEvent()
+
+        # Last STATUS= notification of the process
+        self.status = None
+
+        # time.monotonic() when the current process was launched
+        self.start_time = None
+
+        # time.monotonic() of each phase of the latest run, see igniiite.timeline
+        self.timestamps = {}
 
-        self.failed = asyncio.Event()
+        # Health check status: None if not checked, "starting", "healthy" or "unhealthy"
+        self.health = None
 
-        self.stdout_listeners = TaskListeners()
-        self.stderr_listeners = TaskListeners()
+        # Restart bookkeeping, see run()
+        self.restarts = 0
+        self.crash_looping = False
+        self.__restart_times = None
+        self.__restart_requested = False
+        self.__restarter = None
+        self.__failure = None
+        self.__failure_restart = False
+        self.__idle = False
+
+        # Stream name -> TaskListeners, created on first use
+        self._listeners = {}
+
+        # Last output lines, and cursor of the first line of the current process
+        self.output = None
+        if self.output_history_bytes > 0 and self.output_history_lines > 0:
+            from igniiite.ring import OutputRing
+
+            self.output = OutputRing(self.output_history_bytes, self.output_history_lines)
+        self.output_start = 0
+
+        # State change callbacks, see watch()
+        self.watchers = {}
+
+        self._matcher = None
 
     def __hash__(self):
         return hash(self.name)
 
-    async def __stream_data(self, stream, listeners=None):
+    @property
+    def log(self):
+        """Logger of the task, named after it, created on first use"""
+
+        if self._log is None:
+            self._log = logging.getLogger(self.name)
+
+        return self._log
+
+    @property
+    def stdout_listeners(self):
+        """Listeners of the process standard output, see TaskListeners"""
+
+        return self.__stream_listeners("stdout")
+
+    @property
+    def stderr_listeners(self):
+        """Listeners of the process standard error, see TaskListeners"""
+
+        return self.__stream_listeners("stderr")
+
+    def __stream_listeners(self, stream_name):
+        listeners = self._listeners.get(stream_name)
+        if listeners is None:
+            listeners = self._listeners[stream_name] = TaskListeners()
+
+        return listeners
+
+    @property
+    def matcher(self):
+        """Shared pattern matcher on the task outputs, created on first use"""
+
+        if self._matcher is None:
+            from igniiite.matcher import OutputMatcher
+
+            self._matcher = OutputMatcher(self)
+
+        return self._matcher
+
+    def watch(self, callback):
+        """Register a callback called on task state changes
+
+        The callback is called synchronously as callback(task, state), with
+        state being one of "ready", "failed", "ended" (the process is gone,
+        the task is not ready anymore), "restarting" (the process exited and
+        will be started again, the task is not ready anymore), "crash-loop"
+        (the task restarted too often and gave up), "healthy" or "unhealthy"
+        (health check status changes).
+
+        Args:
+            callback: the callable to register
+        """
+
+        self.watchers[callback] = None
+
+    def unwatch(self, callback):
+        """Remove a state change callback
+
+        Args:
+            callback: the callable to remove
+        """
+
+        self.watchers.pop(callback, None)
+
+    def __notify(self, state):
+        for callback in tuple(self.watchers):
+            try:
+                callback(self, state)
+            except Exception:
+                self.log.error(traceback.format_exc())
+
+    async def __wait_dependencies(self):
+        pending = set()
+        for tt in self.dependencies:
+            if tt.failed.is_set():
+                raise RuntimeError(
+                    f"Dependency '{tt.name}' has failed during process start"
+                )
+
+            if not tt.ready.is_set():
+                pending.add(tt)
+
+        if not pending:
+            return
+
+        # One future for all dependencies, resolved from futures registered
+        # on their ready and failed flags: setting a flag directly, and not
+        # through set_ready() or set_failed(), wakes dependents too
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+
+        def on_flag(tt, state, flag):
+            if waiter.done() or flag.cancelled():
+                return
+
+            if state == "failed":
+                waiter.set_exception(
+                    RuntimeError(
+                        f"Dependency '{tt.name}' has failed during process start"
+                    )
+                )
+
+            else:
+                pending.discard(tt)
+                if not pending:
+                    waiter.set_result(None)
+
+        flags = []
+        for tt in tuple(pending):
+            for state, event in (("ready", tt.ready), ("failed", tt.failed)):
+                flag = loop.create_future()
+                flag.add_done_callback(
+                    lambda flag, tt=tt, state=state: on_flag(tt, state, flag)
+                )
+                event.add_waiter(flag)
+                flags.append((event, flag))
+
         try:
-            async for line in stream:
-                line_str = line.decode("utf-8").strip()
-                self.log.info(line_str)
+            await waiter
+        finally:
+            for event, flag in flags:
+                event.remove_waiter(flag)
+                flag.cancel()
+
+    async def __stream_data(self, stream, stream_name):
+        pending = b""
+
+        try:
+            while True:
+                chunk = await stream.read(self.chunk_size)
+                if not chunk:
+                    if pending:
+                        await self.__dispatch_lines([pending], stream_name)
+                    break
+
+                # Keep the incomplete trailing line for the next chunk
+                if pending:
+                    chunk = pending + chunk
 
-                if listeners is not None:
-                    async with listeners.semaphore:
-                        for listener in listeners.listeners:
-                            await listener.put(line_str)
+                end = chunk.rfind(b"\n")
+                if end < 0:
+                    pending = chunk
+                    if len(pending) >= self.max_line_size:
+                        await self.__dispatch_lines([pending], stream_name)
+                        pending = b""
+                    continue
+
+                pending = chunk[end + 1 :]
+                await self.__dispatch_lines(chunk[:end], stream_name)
 
         except asyncio.CancelledError:
             pass
@@ -122,10 +674,52 @@ class Task:
         except Exception:
             self.log.error(traceback.format_exc())
 
+    async def __dispatch_lines(self, data, stream_name):
+        # data is either a block of complete lines, or an already split list
+        if "first_output" not in self.timestamps:
+            self.__mark("first_output")
+
+        if self.output is not None:
+            self.output.append(stream_name, data)
+
+        if self.output_sink is not None:
+            self.output_sink.write(self.name, stream_name, data)
+
+        # Looked up on each batch: listeners are created on first registration
+        listeners = self._listeners.get(stream_name)
+        has_listeners = (listeners is not None) and listeners.listeners
+        log_enabled = (self.log_output != "none") and self.log.isEnabledFor(
+            logging.INFO
+        )
+
+        # Fast path: nobody needs individual lines
+        if (not has_listeners) and not (log_enabled and self.log_output == "lines"):
+            if log_enabled:
+                if isinstance(data, list):
+                    data = b"\n".join(data)
+                self.log.info(data.decode("utf-8", errors="replace").rstrip())
+            return
+
+        lines = data if isinstance(data, list) else data.split(b"\n")
+        text = None
+
+        if log_enabled:
+            text = decode_lines(lines)
+            if self.log_output == "lines":
+                for line in text:
+                    self.log.info(line)
+            else:
+                self.log.info("\n".join(text))
+
+        if has_listeners:
+            listeners.publish(lines, text)
+
     async def __send_stop(self):
         try:
-            self.log.error("Sending process SIGINT signal")
-            self.process.send_signal(signal.SIGINT)
+            self.log.warning(
+                f"Sending process {signal.Signals(self.stop_signal).name} signal"
+            )
+            self.process.send_signal(self.stop_signal)
         except ProcessLookupError:
             pass  # Ignore process if already finished.
 
@@ -136,102 +730,461 @@ class Task:
         except ProcessLookupError:
             pass  # Ignore process if already finished.
 
+    async def __wait_exit(self):
+        # Wait for the process itself to exit: process.wait() also waits for
+        # the outputs to be closed, which a leftover grandchild may delay
+        exited = getattr(self.process, "exited", None)
+        if exited is None:
+            return await self.process.wait()
+
+        return await asyncio.shield(exited)
+
+    async def __terminate(self):
+        self.__mark("stop")
+        await self.__send_stop()
+
+        try:
+            self.log.info("Wait for process to terminate...")
+            await asyncio.wait_for(self.__wait_exit(), timeout=self.stop_timeout)
+            return
+        except asyncio.TimeoutError:
+            self.log.error("Failed to stop process gracefully, KILLING IT WITH FIRE")
+
+        await self.__send_kill()
+        try:
+            await asyncio.wait_for(self.kill_hook(self), timeout=self.kill_timeout)
+        except asyncio.TimeoutError:
+            self.log.error(
+                f"Kill hook for task '{self.name}' failed to execute within {self.kill_timeout}s..."
+            )
+
+        try:
+            await asyncio.wait_for(self.__wait_exit(), timeout=self.kill_timeout)
+        except asyncio.TimeoutError:
+            self.log.error(f"Process '{self.name}' is still alive after SIGKILL")
+
+    async def stop(self):
+        """Stop the task gracefully
+
+        The stop signal is sent, and the process is killed if it did not exit
+        within stop_timeout. A stopped task is not ready anymore, is not marked
+        as failed, and is not restarted.
+
+        Returns:
+            True once the process has exited, False if there was no process to stop
+        """
+
+        self.stopping.set()
+        if self.process is None or self.process.returncode is not None:
+            return False
+
+        await self.__terminate()
+        self.ready.clear()
+
+        return True
+
+    async def restart(self):
+        """Stop the task process, and start it again, whatever the restart policy
+
+        Returns:
+            True once the process has exited, False if there was no process to restart
+        """
+
+        if self.process is None or self.process.returncode is not None:
+            return False
+
+        self.__restart_requested = True
+        await self.__terminate()
+
+        return True
+
+    async def fail(self, reason: str, restart: bool = False):
+        """Stop the task process as failed, it is then restarted according to the restart policy
+
+        Args:
+            reason: why the process is considered failed
+            restart: restart the process whatever the restart policy, still
+                with the restart backoff and crash loop detection
+
+        Returns:
+            True once the process has exited, False if there was no process to stop
+        """
+
+        if self.process is None or self.process.returncode is not None:
+            return False
+
+        self.__failure = reason
+        self.__failure_restart = restart
+        await self.__terminate()
+
+        return True
+
     def set_ready(self):
         """Utility function to indicate task is ready
 
         Is primarly called by hooks that monitor the task
         """
         self.log.info(f"Process '{self.name}' is ready!")
+        self.__mark("ready")
         self.ready.set()
+        self.__notify("ready")
 
-    async def run(self):
-        """Run the task
+    def set_health(self, health: str):
+        """Utility function to indicate task health
+
+        Is primarly called by the health monitor. Watchers are notified when
+        the task becomes healthy or unhealthy.
+
+        Args:
+            health: "starting", "healthy" or "unhealthy"
+        """
+
+        previous, self.health = self.health, health
+        if health != previous and health in ("healthy", "unhealthy"):
+            self.log.info(f"Process '{self.name}' is {health}")
+            self.__notify(health)
+
+    def set_failed(self):
+        """Utility function to indicate task has failed
         """
+        self.failed.set()
+        self.__notify("failed")
+
+    def __on_dependency_state(self, task, state):
+        if state == "restarting" and self.__restarter is None:
+            self.log.warning(f"Dependency '{task.name}' is restarting, restarting too")
+            self.__restarter = asyncio.create_task(self.restart())
+            self.__restarter.add_done_callback(self.__restarted)
+
+    def __restarted(self, future):
+        self.__restarter = None
+
+    def __restart_delay(self, failed):
+        # Delay before starting the process again, None if it is not restarted
+        if self.stopping.is_set():
+            return None
+
+        if self.__restart_requested:
+            self.__restart_requested = False
+            return 0.0
+
+        forced, self.__failure_restart = self.__failure_restart, False
+        if not forced and (
+            self.restart_policy == "never"
+            or (self.restart_policy == "on-failure" and not failed)
+        ):
+            return None
+
+        now = asyncio.get_running_loop().time()
+        times = self.__restart_times
+        if times is None:
+            times = self.__restart_times = collections.deque()
+        while times and times[0] <= now - self.restart_window:
+            times.popleft()
+
+        if len(times) >= self.restart_burst:
+            self.log.error(
+                f"Process '{self.name}' restarted {len(times)} times within {self.restart_window}s, crash looping"
+            )
+            self.crash_looping = True
+            self.__notify("crash-loop")
+            return None
+
+        # Exponential backoff on recent restarts, with jitter
+        times.append(now)
+        delay = min(self.restart_max_delay, self.restart_delay * 2 ** (len(times) - 1))
+        return random.uniform(delay / 2, delay)
 
+    def __mark(self, phase):
+        # Only the first occurrence of a phase in a run is kept
+        self.timestamps.setdefault(phase, time.monotonic())
+
+    def __set_ended(self):
+        if self.output is not None:
+            self.output.close()
+
+        for sock in self.sockets or ():
+            sock.close()
+
+        # Dependents must not start against a process that is gone
+        self.ready.clear()
+        self.ended.set()
+        self.__notify("ended")
+
+        self.log.info(f"Process '{self.name}' exited")
+
+    async def __run_once(self):
+        # Run the process once, returns True if it failed
         self.log.info(f"Start process '{self.name}'")
         self.log.debug(f"Command: '{self.command}'")
-        self.ended.clear()
-        self.ready.clear()
-        self.failed.clear()
+        self.process = None
+        self.__failure = None
+        self.__idle = False
+
+        self.timestamps = {}
+        self.__mark("start")
+        await asyncio.wait_for(self.pre_hook(self), timeout=60.0)
+
+        # Wait for dependencies to be started
+        self.__mark("dependencies")
+        await self.__wait_dependencies()
+
+        env = None
+        if self.environment is not None:
+            env = {**os.environ, **self.environment}
+
+        notifier = None
+        if self.notify:
+            from igniiite.notify import default_notifier
+
+            notifier = default_notifier
+            await notifier.start()
+            env = {**(env or os.environ), **notifier.environment(self)}
+
+        command = self.command
+        activation = None
+        fds = ()
+        if self.sockets:
+            activation = await self.__listen()
+            if activation is None:
+                return False
+
+            command, listen_env, fds = activation.activation_command(command, self.sockets)
+            env = {**(env or os.environ), **listen_env}
+
+        from igniiite import launcher as launchers
+
+        launcher = self.launcher or launchers.default_launcher
+
+        # Limits are set up before exec by the launcher, and checked right
+        # after spawn, see igniiite.limits
+        cgroup = None
+        spawn_args = {}
+        if fds:
+            spawn_args["pass_fds"] = fds
+        if self.limits is not None:
+            from igniiite.limits import prepare_limits, check_limits, release_limits
 
+            cgroup, spawn_args["setup"] = prepare_limits(self.limits, self.name)
+
+        self.__mark("spawn")
         try:
-            await asyncio.wait_for(self.pre_hook(self), timeout=60.0)
-
-            # Wait for dependencies to be started
-            async def wait_for_task(tt):
-                task_ready = asyncio.create_task(tt.ready.wait())
-                task_failed = asyncio.create_task(tt.failed.wait())
-
-                done, pending = await asyncio.wait(
-                    [
-                        task_ready,
-                        task_failed,
-                    ],
-                    return_when=asyncio.FIRST_COMPLETED,
-                )
+            self.process = await launcher.spawn(command, env=env, **spawn_args)
+        except BaseException:
+            if cgroup is not None:
+                release_limits(cgroup)
+            raise
+        finally:
+            for fd in fds:
+                os.close(fd)
 
-                # See if failed condition exited first
-                if tt.failed.is_set():
-                    raise RuntimeError(
-                        f"Dependency '{tt.name}' has failed during process start"
-                    )
+        # Launchers may not have applied them all
+        if self.limits is not None:
+            check_limits(self.process.pid, spawn_args["setup"], self.name)
 
-                # Cancel pending tasks
-                for task in pending:
-                    task.cancel()
+        self.start_time = time.monotonic()
+        self.timestamps["spawned"] = self.start_time
+        if self.output is not None:
+            self.output_start = self.output.cursor
 
-            await asyncio.gather(*[wait_for_task(tt) for tt in self.dependencies])
+        if notifier is not None:
+            notifier.register(self, self.process.pid)
 
-            self.process = await asyncio.create_subprocess_exec(
-                *self.command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
+        monitor = None
+        if self.health_check is not None:
+            from igniiite.health import default_monitor
 
-            task_stdout = asyncio.create_task(
-                self.__stream_data(self.process.stdout, self.stdout_listeners)
-            )
-            task_stderr = asyncio.create_task(
-                self.__stream_data(self.process.stderr, self.stderr_listeners)
-            )
-            task_ready_hook = asyncio.create_task(self.ready_hook(self))
+            monitor = default_monitor
+            monitor.add(self)
+
+        if self.propagate_restart:
+            for tt in self.dependencies:
+                tt.watch(self.__on_dependency_state)
+
+        task_stdout = asyncio.create_task(
+            self.__stream_data(self.process.stdout, "stdout")
+        )
+        task_stderr = asyncio.create_task(
+            self.__stream_data(self.process.stderr, "stderr")
+        )
+        task_ready_hook = asyncio.create_task(
+            null_hook(self) if self.notify or self.sockets else self.ready_hook(self)
+        )
+
+        task_idle = None
+        if self.on_demand and self.idle_timeout is not None:
+            task_idle = asyncio.create_task(self.__stop_idle(activation))
+
+        try:
+            await self.__wait_exit()
+            self.__mark("exited")
+
+            # Let the output pumps reach the end of the streams
+            await asyncio.wait((task_stdout, task_stderr), timeout=1.0)
+
+        except asyncio.CancelledError:
+            self.log.warning("Requested task stop")
+            self.stopping.set()
+            await self.__terminate()
+
+            # Propagate the cancellation once the post hook has run
+            raise
+
+        finally:
+            self.__mark("exited")
+            task_ready_hook.cancel()
+            if task_idle is not None:
+                task_idle.cancel()
+            task_stdout.cancel()
+            task_stderr.cancel()
+
+            # Outputs may still be held open by a leftover grandchild
+            close = getattr(self.process, "close", None)
+            if close is not None:
+                close()
 
+            for tt in self.dependencies:
+                tt.unwatch(self.__on_dependency_state)
+
+            if notifier is not None:
+                notifier.unregister(self)
+
+            if monitor is not None:
+                monitor.remove(self)
+
+            if cgroup is not None:
+                release_limits(cgroup)
+
+        # Get return code
+        if self.stopping.is_set() or self.__restart_requested or self.__idle:
+            self.log.info(f"Process '{self.name}' stopped")
+            return False
+
+        if self.__failure is not None:
+            self.log.error(f"Process '{self.name}' failed: {self.__failure}")
+            return True
+
+        if self.process.returncode != 0:
+            self.log.error(f"Process '{self.name}' returned a non zero code")
+            return True
+
+        return False
+
+    async def __listen(self):
+        # Bind the sockets, and wait for a connection in on demand mode.
+        # Returns the activation module, None if stopped while waiting
+        from igniiite import activation
+
+        for sock in self.sockets:
+            sock.open()
+
+        if not self.ready.is_set():
+            self.set_ready()
+
+        if self.on_demand:
+            self.log.info(f"Waiting for a connection to '{self.name}'")
+            stopping = asyncio.ensure_future(self.stopping.wait())
+            connection = asyncio.ensure_future(activation.wait_for_connection(self.sockets))
             try:
-                await self.process.wait()
+                await asyncio.wait((stopping, connection), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                stopping.cancel()
+                connection.cancel()
 
-            except asyncio.CancelledError:
-                self.log.warning("Requested task stop")
-                await self.__send_stop()
+            if self.stopping.is_set():
+                return None
+
+        return activation
+
+    async def __stop_idle(self, activation):
+        await activation.wait_idle(self.process.pid, self.sockets, self.idle_timeout)
 
+        self.log.info(f"Process '{self.name}' is idle, stopping it until the next connection")
+        self.__idle = True
+        await self.__terminate()
+
+    async def run(self):
+        """Run the task
+
+        When the process exits, it is started again according to the restart
+        policy, after an exponential backoff with jitter. A task restarted more
+        than restart_burst times within restart_window seconds is crash
+        looping: it is not restarted anymore, and is marked as failed.
+        """
+
+        self.ended.clear()
+        self.ready.clear()
+        self.failed.clear()
+        self.stopping.clear()
+
+        self.restarts = 0
+        self.crash_looping = False
+        self.__restart_times = None
+        self.__restart_requested = False
+        self.__failure_restart = False
+
+        if self.output is not None:
+            self.output.reopen()
+
+        while True:
+            delay = None
+            idle = False
+
+            try:
                 try:
-                    self.log.info("Wait for process to terminate...")
-                    await asyncio.wait_for(self.process.wait(), timeout=10.0)
-                except asyncio.TimeoutError:
+                    failed = await self.__run_once()
+                    idle = self.__idle and not self.stopping.is_set()
+
+                except Exception:
+                    delay = self.__restart_delay(True)
+                    if delay is None:
+                        raise
+
                     self.log.error(
-                        "Failed to stop process gracefully, KILLING IT WITH FIRE"
+                        f"Process '{self.name}' failed to start: {traceback.format_exc()}"
                     )
-                    await self.__send_kill()
-                    try:
-                        await self.kill_hook(self)
-                    except asyncio.TimeoutError:
-                        self.log.error(
-                            f"Kill hook for task '{self.name}' failed to execute within 5s..."
-                        )
 
-                asyncio.current_task().cancel()
+                else:
+                    if idle:
+                        # On demand process stopped when idle: wait for the next connection
+                        continue
+
+                    delay = self.__restart_delay(failed)
+                    if delay is None and (failed or self.crash_looping):
+                        self.set_failed()
+
+            except Exception:
+                # Do not leave dependents waiting on a task that never started
+                if not self.failed.is_set():
+                    self.set_failed()
+                raise
 
             finally:
-                task_ready_hook.cancel()
-                task_stdout.cancel()
-                task_stderr.cancel()
+                self.__mark("post_hook")
+                await asyncio.wait_for(self.post_hook(self), timeout=10.0)
+                self.__mark("ended")
+                if delay is None and not idle:
+                    self.__set_ended()
 
-                # Get return code
-                if self.process.returncode != 0:
-                    self.log.error(f"Process '{self.name}' returned a non zero code")
-                    self.failed.set()
+            if delay is None:
+                return
 
-        finally:
-            await asyncio.wait_for(self.post_hook(self), timeout=10.0)
-            self.ended.set()
+            self.restarts += 1
+            self.ready.clear()
+            self.__notify("restarting")
+            self.log.warning(
+                f"Restarting process '{self.name}' in {delay:.3f}s (restart #{self.restarts})"
+            )
 
-            self.log.info(f"Process '{self.name}' exited")
+            # Stop requests are honored during the backoff
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=delay)
+                self.__set_ended()
+                return
+
+            except asyncio.TimeoutError:
+                pass
+
+            except asyncio.CancelledError:
+                self.__set_ended()
+                raise
@@ -0,0 +1,341 @@
+"""
+Startup timeline
+================
+
+Analysis of the phase timestamps recorded by each task (Task.timestamps),
+in the spirit of systemd-analyze: time taken by each task to get ready,
+critical chain of dependencies, and timeline exports as Chrome trace events
+(chrome://tracing, Perfetto) or SVG.
+
+Recorded phases, in time.monotonic() seconds:
+
+- start: the run begins, with the pre hook;
+- dependencies: waiting for the dependencies to be ready;
+- spawn, spawned: launch of the process;
+- first_output: first output line;
+- ready: the task is ready;
+- stop: the task is being stopped;
+- exited: the process has exited;
+- post_hook, ended: the post hook runs, then the run is over.
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import json
+
+from html import escape
+from typing import NamedTuple
+
+
+# Timeline spans: (name, start phase, end phases, the first recorded one is used)
+SPANS = (
+    ("pre_hook", "start", ("dependencies",)),
+    ("dependencies", "dependencies", ("spawn",)),
+    ("spawn", "spawn", ("spawned",)),
+    ("startup", "spawned", ("ready", "exited")),
+    ("running", "ready", ("stop", "exited")),
+    ("stopping", "stop", ("exited",)),
+    ("post_hook", "post_hook", ("ended",)),
+)
+
+SPAN_COLORS = {
+    "pre_hook": "#9e9e9e",
+    "dependencies": "#e0e0e0",
+    "spawn": "#ff9800",
+    "startup": "#f44336",
+    "running": "#4caf50",
+    "stopping": "#2196f3",
+    "post_hook": "#9c27b0",
+}
+
+# SVG layout
+SVG_ROW = 20
+SVG_LABEL = 200
+SVG_WIDTH = 1000
+
+
+##################################
+
+
+class TaskTimes(NamedTuple):
+    """Recorded phases of a task"""
+
+    """Task name"""
+    name: str
+
+    """Names of the task dependencies"""
+    dependencies: tuple
+
+    """Phase name -> time.monotonic() timestamp"""
+    timestamps: dict
+
+    def activation(self):
+        """Time taken by the task to get ready once launched, None if not ready"""
+
+        if "ready" not in self.timestamps or "spawn" not in self.timestamps:
+            return None
+
+        return self.timestamps["ready"] - self.timestamps["spawn"]
+
+
+def task_times(tasks):
+    """Collect the recorded phases of tasks
+
+    Args:
+        tasks: Task objects, or a Graph
+
+    Returns:
+        a dict of task name -> TaskTimes
+    """
+
+    return {
+        tt.name: TaskTimes(
+            tt.name,
+            tuple(sorted(dep.name for dep in tt.dependencies)),
+            dict(tt.timestamps),
+        )
+        for tt in tasks
+    }
+
+
+def times_from_json(entries):
+    """Rebuild recorded phases from their JSON form, see the timeline control command
+
+    Args:
+        entries: a list of {"name", "dependencies", "timestamps"} dicts
+
+    Returns:
+        a dict of task name -> TaskTimes
+    """
+
+    return {
+        entry["name"]: TaskTimes(
+            entry["name"], tuple(entry["dependencies"]), dict(entry["timestamps"])
+        )
+        for entry in entries
+    }
+
+
+def origin(times):
+    """Earliest recorded timestamp, None if nothing was recorded
+
+    Args:
+        times: task name -> TaskTimes
+    """
+
+    stamps = [stamp for tt in times.values() for stamp in tt.timestamps.values()]
+    return min(stamps) if stamps else None
+
+
+def spans(task_times: TaskTimes, now=None):
+    """Timeline spans of a task
+
+    Args:
+        task_times: the task phases
+        now: end of spans still going on, left out if None
+
+    Returns:
+        a list of (span name, start, end)
+    """
+
+    stamps = task_times.timestamps
+    result = []
+    for name, start, ends in SPANS:
+        if start not in stamps:
+            continue
+
+        end = next((stamps[end] for end in ends if end in stamps), now)
+        if end is not None:
+            result.append((name, stamps[start], max(end, stamps[start])))
+
+    return result
+
+
+##################################
+
+
+def blame(times):
+    """Activation time of the tasks, slowest first, like systemd-analyze blame
+
+    Args:
+        times: task name -> TaskTimes
+
+    Returns:
+        a list of (task name, activation time in seconds)
+    """
+
+    result = [
+        (tt.name, tt.activation()) for tt in times.values() if tt.activation() is not None
+    ]
+    result.sort(key=lambda item: item[1], reverse=True)
+
+    return result
+
+
+def critical_chain(times, target=None):
+    """Chain of tasks that delayed a task, like systemd-analyze critical-chain
+
+    Starting from the target, the dependency that got ready last is the one
+    the target waited for: the chain follows these dependencies down to a
+    task with no dependencies.
+
+    Args:
+        times: task name -> TaskTimes
+        target: the last task of the chain, the task that got ready last if None
+
+    Returns:
+        a list of (task name, ready time, activation time) from the first task
+        of the chain to the target, times in seconds from origin()
+    """
+
+    start = origin(times)
+    ready = {name: tt.timestamps["ready"] for name, tt in times.items() if "ready" in tt.timestamps}
+    if not ready:
+        return []
+
+    if target is None:
+        target = max(ready, key=ready.get)
+    elif target not in ready:
+        return []
+
+    chain = []
+    name = target
+    while name is not None:
+        chain.append((name, ready[name] - start, times[name].activation()))
+
+        # Dependencies are ready before their dependents
+        candidates = [
+            dep for dep in times[name].dependencies if dep in ready and ready[dep] <= ready[name]
+        ]
+        name = max(candidates, key=ready.get) if candidates else None
+
+    chain.reverse()
+    return chain
+
+
+def format_critical_chain(chain):
+    """Format a critical chain as text, see critical_chain()
+
+    Args:
+        chain: the chain
+    """
+
+    lines = []
+    for depth, (name, ready, activation) in enumerate(reversed(chain)):
+        spent = "" if activation is None else f" +{activation:.3f}s"
+        lines.append(f"{'  ' * depth}{'└─' if depth else ''}{name} @{ready:.3f}s{spent}")
+
+    return "\n".join(lines)
+
+
+##################################
+
+
+def chrome_trace(times, now=None):
+    """Chrome trace event format of the timeline
+
+    Each task is a thread of a single process, each span a complete event,
+    and the first output an instant event. Load in chrome://tracing or
+    https://ui.perfetto.dev.
+
+    Args:
+        times: task name -> TaskTimes
+        now: end of spans still going on, left out if None
+
+    Returns:
+        the trace, as a JSON compatible dict
+    """
+
+    start = origin(times)
+    events = [{"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "igniiite"}}]
+
+    for tid, tt in enumerate(sorted(times.values(), key=_first_stamp), start=1):
+        events.append(
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": tt.name}}
+        )
+        events.append(
+            {"name": "thread_sort_index", "ph": "M", "pid": 1, "tid": tid, "args": {"sort_index": tid}}
+        )
+
+        for name, begin, end in spans(tt, now):
+            events.append(
+                {
+                    "name": name,
+                    "cat": "task",
+                    "ph": "X",
+                    "pid": 1,
+                    "tid": tid,
+                    "ts": round((begin - start) * 1e6),
+                    "dur": round((end - begin) * 1e6),
+                    "args": {"task": tt.name},
+                }
+            )
+
+        if "first_output" in tt.timestamps:
+            events.append(
+                {
+                    "name": "first_output",
+                    "cat": "task",
+                    "ph": "i",
+                    "s": "t",
+                    "pid": 1,
+                    "tid": tid,
+                    "ts": round((tt.timestamps["first_output"] - start) * 1e6),
+                }
+            )
+
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def dump_chrome_trace(times, now=None):
+    """Chrome trace of the timeline as a JSON string, see chrome_trace()"""
+
+    return json.dumps(chrome_trace(times, now))
+
+
+def svg_timeline(times, now=None):
+    """SVG timeline, one row per task in start order
+
+    Args:
+        times: task name -> TaskTimes
+        now: end of spans still going on, left out if None
+
+    Returns:
+        the SVG document, as a str
+    """
+
+    start = origin(times)
+    rows = sorted(times.values(), key=_first_stamp)
+    all_spans = [spans(tt, now) for tt in rows]
+
+    end = max((span[2] for row in all_spans for span in row), default=start or 0)
+    duration = max((end - start) if start is not None else 0, 1e-3)
+    scale = (SVG_WIDTH - SVG_LABEL - 10) / duration
+    height = SVG_ROW * (len(rows) + 2)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" '
+        f'font-family="sans-serif" font-size="11">',
+        f'<text x="4" y="14">Total: {duration:.3f}s</text>',
+    ]
+
+    for index, (tt, row) in enumerate(zip(rows, all_spans), start=1):
+        y = index * SVG_ROW
+        parts.append(f'<text x="4" y="{y + 14}">{escape(tt.name)}</text>')
+
+        for name, begin, finish in row:
+            x = SVG_LABEL + (begin - start) * scale
+            width = max((finish - begin) * scale, 1)
+            parts.append(
+                f'<rect x="{x:.1f}" y="{y + 3}" width="{width:.1f}" height="{SVG_ROW - 6}" '
+                f'fill="{SPAN_COLORS[name]}"><title>{escape(tt.name)} {name}: '
+                f"{finish - begin:.3f}s</title></rect>"
+            )
+
+    parts.append("</svg>")
+    return "\n".join(parts) + "\n"
+
+
+def _first_stamp(tt):
+    return min(tt.timestamps.values(), default=float("inf"))
@@ -0,0 +1,214 @@
+"""
+Socket activation tests
+=======================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import signal
+import socket
+import asyncio
+import subprocess
+
+import pytest
+
+from igniiite.task import Task
+from igniiite.activation import ListenSocket
+
+
+# Answer each connection with the process pid, after an optional delay
+SERVE = """
+import os, socket, sys, time
+time.sleep(float(sys.argv[1]))
+sock = socket.socket(fileno=3)
+while True:
+    conn, _ = sock.accept()
+    conn.sendall(f"{os.getpid()}\\n".encode())
+    conn.close()
+    if sys.argv[2:] == ["once"]:
+        break
+"""
+
+# Describe the passed sockets
+DESCRIBE = """
+import os, socket
+sockets = [socket.socket(fileno=3 + index) for index in range(int(os.environ["LISTEN_FDS"]))]
+print(os.environ["LISTEN_FDNAMES"], os.environ["LISTEN_PID"] == str(os.getpid()))
+for sock in sockets:
+    print(sock.family.name, sock.getsockopt(socket.SOL_SOCKET, socket.SO_ACCEPTCONN))
+"""
+
+# Launch DESCRIBE with an activation command, made in a process with a given
+# number of extra descriptors open
+LAUNCH = f"""
+import os, subprocess, sys
+from igniiite.activation import ListenSocket, activation_command
+padding = [os.dup(0) for _ in range(int(sys.argv[1]))]
+sock = ListenSocket(path=sys.argv[2], name="padded")
+sock.open()
+command, environment, fds = activation_command([sys.executable, "-c", {DESCRIBE!r}], [sock])
+print(command[0] == "/bin/sh", flush=True)
+subprocess.run(command, env={{**os.environ, **environment}}, pass_fds=fds)
+"""
+
+
+def serving(path, *args, **kwargs):
+    return Task(
+        name="served",
+        command=[sys.executable, "-c", SERVE, *args],
+        sockets=[ListenSocket(path=path)],
+        log_output="none",
+        stop_signal=signal.SIGTERM,
+        **kwargs,
+    )
+
+
+async def request(path):
+    # pid of the process answering a connection
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        return int(await asyncio.wait_for(reader.readline(), 5.0))
+    finally:
+        writer.close()
+
+
+##################################
+
+
+def test_sockets_are_passed_from_fd_3(tmp_path):
+    async def scenario():
+        task = Task(
+            name="described",
+            command=[sys.executable, "-c", DESCRIBE],
+            sockets=[
+                ListenSocket(path=str(tmp_path / "first.sock"), name="first"),
+                ListenSocket(port=0, host="127.0.0.1"),
+            ],
+            log_output="none",
+        )
+        lines = await task.stdout_listeners.register()
+
+        await asyncio.wait_for(task.run(), 5.0)
+
+        assert [await lines.get() for _ in range(3)] == [
+            "first:unknown True",
+            "AF_UNIX 1",
+            "AF_INET 1",
+        ]
+
+        # Closed with the task, with their socket file
+        assert all(sock.sock is None for sock in task.sockets)
+        assert not (tmp_path / "first.sock").exists()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("padding, shell", [(0, True), (10, False)])
+def test_activation_command_wrappers(tmp_path, padding, shell):
+    # Shells can't redirect descriptors above 9
+    process = subprocess.run(
+        [sys.executable, "-c", LAUNCH, str(padding), str(tmp_path / "padded.sock")],
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        capture_output=True,
+        text=True,
+        timeout=10.0,
+    )
+
+    assert process.stdout.splitlines() == [str(shell), "padded True", "AF_UNIX 1"]
+
+
+def test_ready_before_accepting(tmp_path):
+    path = str(tmp_path / "slow.sock")
+
+    async def scenario():
+        task = serving(path, "0.3")
+        runner = asyncio.create_task(task.run())
+
+        await asyncio.wait_for(task.ready.wait(), 0.2)
+
+        # Waits in the backlog until the process accepts it
+        assert await request(path) == task.process.pid
+
+        await task.stop()
+        await asyncio.wait_for(runner, 5.0)
+
+    asyncio.run(scenario())
+
+
+def test_sockets_are_kept_across_restarts(tmp_path):
+    path = str(tmp_path / "restarted.sock")
+
+    async def scenario():
+        task = serving(path, "0", "once", restart_policy="always", restart_delay=0.01)
+        runner = asyncio.create_task(task.run())
+        await asyncio.wait_for(task.ready.wait(), 5.0)
+
+        pids = [await request(path) for _ in range(3)]
+        assert len(set(pids)) == 3
+        assert task.restarts >= 2
+
+        await task.stop()
+        await asyncio.wait_for(runner, 5.0)
+
+    asyncio.run(scenario())
+
+
+def test_on_demand_and_idle(tmp_path):
+    path = str(tmp_path / "on-demand.sock")
+
+    async def scenario():
+        task = serving(path, "0", on_demand=True, idle_timeout=0.2)
+        runner = asyncio.create_task(task.run())
+
+        await asyncio.wait_for(task.ready.wait(), 5.0)
+        await asyncio.sleep(0.1)
+        assert task.process is None
+
+        first = await request(path)
+
+        # Stopped once idle, launched again on the next connection
+        while task.process is not None and task.process.returncode is None:
+            await asyncio.sleep(0.05)
+        assert not task.ended.is_set()
+
+        second = await request(path)
+        assert second != first
+
+        await task.stop()
+        await asyncio.wait_for(runner, 5.0)
+        assert task.ended.is_set()
+
+    asyncio.run(scenario())
+
+
+def test_listen_socket(tmp_path):
+    path = tmp_path / "stale.sock"
+
+    # A socket file left behind is replaced
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(str(path))
+    stale.close()
+
+    listener = ListenSocket(path=str(path), backlog=4)
+    listener.open()
+    try:
+        client = socket.socket(socket.AF_UNIX)
+        client.connect(str(path))
+        assert listener.connections(os.getpid()) >= 1
+        client.close()
+    finally:
+        listener.close()
+
+    assert not path.exists()
+
+    with pytest.raises(ValueError):
+        ListenSocket()
+    with pytest.raises(ValueError):
+        ListenSocket(port=8080, path=str(path))
+    with pytest.raises(ValueError):
+        ListenSocket(port=8080, backlog=0)
+    with pytest.raises(ValueError):
+        Task(name="idle", command=["true"], idle_timeout=1.0)
@@ -0,0 +1,88 @@
+"""
+Benchmark suite tests
+=====================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+from pathlib import Path
+
+
+SUITE = Path(__file__).parent.parent / "benchmarks" / "suite.py"
+
+# Smallest settings, the results are not meaningful
+SMOKE = [
+    "--repeat", "1",
+    "--sizes", "3",
+    "--lines", "1000",
+    "--runs", "2",
+    "--schedules", "10",
+    "--duration", "0.3",
+]
+
+
+def suite(*args):
+    return subprocess.run(
+        [sys.executable, str(SUITE), *SMOKE, *args],
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        capture_output=True,
+        text=True,
+        timeout=120.0,
+    )
+
+
+##################################
+
+
+def test_suite_runs_and_compares(tmp_path):
+    results = tmp_path / "results.json"
+
+    process = suite("-o", str(results))
+    assert process.returncode == 0, process.stderr
+
+    report = json.loads(results.read_text())
+    assert report["version"] == 1
+    assert report["meta"]["settings"]["sizes"] == [3]
+    assert report["results"]
+    assert all(
+        set(metric) == {"value", "unit", "better"} and metric["better"] in ("lower", "higher")
+        for metric in report["results"].values()
+    )
+
+    # A baseline ten times better in every way is a regression
+    for metric in report["results"].values():
+        if metric["better"] == "lower":
+            metric["value"] /= 10
+        else:
+            metric["value"] *= 10
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report))
+
+    process = suite("--only", "graph", "--baseline", str(baseline))
+    assert process.returncode == 1
+    assert "REGRESSION" in process.stdout
+    assert "regression(s)" in process.stderr
+
+    # And everything is fine with a generous tolerance
+    process = suite("--only", "graph", "--baseline", str(baseline), "--tolerance", "100")
+    assert process.returncode == 0, process.stderr
+
+
+def test_baseline_format_is_checked(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"version": 0, "results": {}}))
+
+    process = suite("--only", "nothing", "--baseline", str(baseline))
+    assert process.returncode == 2
+
+    # Told before running the benchmarks
+    process = suite("--baseline", str(tmp_path / "missing.json"))
+    assert process.returncode == 2
+    assert "record one first" in process.stderr
+    assert not process.stdout
@@ -0,0 +1,320 @@
+"""
+Control socket tests
+====================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import json
+import stat
+import signal
+import socket
+import asyncio
+
+import pytest
+
+from igniiite import cli
+from igniiite.task import Task
+from igniiite.graph import Supervisor
+from igniiite.executor import JobExecutor
+from igniiite.control import ControlServer, ControlClient
+
+
+def sleeper(name, *dependencies):
+    return Task(
+        name=name,
+        command=["sleep", "3600"],
+        dependencies=set(dependencies),
+        log_output="none",
+        stop_signal=signal.SIGTERM,
+        stop_timeout=2.0,
+    )
+
+
+class Blocker:
+    """Stand-in task holding an executor slot until released"""
+
+    name = "blocker"
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def run(self):
+        await self.release.wait()
+
+
+async def controlled(tmp_path, tasks, executor=None):
+    # Running supervisor, its control server and a connected client
+    supervisor = Supervisor(tasks, executor)
+    runner = asyncio.create_task(supervisor.run())
+
+    server = ControlServer(supervisor, str(tmp_path / "control.sock"))
+    await server.start()
+    client = ControlClient(server.path)
+    await client.connect()
+
+    return supervisor, runner, server, client
+
+
+async def teardown(supervisor, runner, server, client):
+    await client.close()
+    await server.close()
+    await supervisor.shutdown()
+    await asyncio.wait_for(runner, 5.0)
+
+
+##################################
+
+
+def test_start_goes_through_the_executor(tmp_path):
+    async def scenario():
+        service = sleeper("service")
+        job = Task(name="job", command=["true"], log_output="none")
+        executor = JobExecutor(max_concurrent=1)
+
+        context = await controlled(tmp_path, [service, job], executor)
+        _, _, _, client = context
+        try:
+            await asyncio.wait_for(job.ended.wait(), 5.0)
+
+            blocker = Blocker()
+            holding = asyncio.create_task(executor.run(blocker))
+            await asyncio.sleep(0)
+
+            started = await client.request("start", task="job", priority=5, group="jobs")
+            assert started == ["job"]
+            assert executor.stats()["pending"] == 1
+
+            [status] = await client.request("status", task="job")
+            assert status["state"] == "queued"
+            assert status["pid"] is None
+
+            blocker.release.set()
+            await holding
+            for _ in range(50):
+                if executor.stats()["completed"] == 2:
+                    break
+                await asyncio.sleep(0.1)
+
+            assert executor.stats()["completed"] == 2
+            assert job.process.returncode == 0
+
+        finally:
+            await teardown(*context)
+
+    asyncio.run(scenario())
+
+
+def test_cli_start_priority_and_group(tmp_path, capsys):
+    async def scenario():
+        service = sleeper("service")
+        job = Task(name="job", command=["true"], log_output="none")
+        executor = JobExecutor(max_concurrent=1)
+
+        context = await controlled(tmp_path, [service, job], executor)
+        server = context[2]
+        try:
+            await asyncio.wait_for(job.ended.wait(), 5.0)
+
+            blocker = Blocker()
+            holding = asyncio.create_task(executor.run(blocker))
+            await asyncio.sleep(0)
+
+            argv = ["--socket", server.path, "start", "job", "--priority", "5", "--group", "jobs"]
+            assert await asyncio.to_thread(cli.main, argv) == 0
+
+            [(priority, _, _, group)] = executor.pending
+            assert (priority, group) == (-5, "jobs")
+
+            blocker.release.set()
+            await holding
+
+        finally:
+            await teardown(*context)
+
+    asyncio.run(scenario())
+    assert capsys.readouterr().out == "start: job\n"
+
+
+def test_shutdown_cancels_queued_starts(tmp_path):
+    async def scenario():
+        service = sleeper("service")
+        job = Task(name="job", command=["true"], log_output="none")
+        executor = JobExecutor(max_concurrent=1)
+
+        context = await controlled(tmp_path, [service, job], executor)
+        supervisor, _, _, client = context
+        await asyncio.wait_for(job.ended.wait(), 5.0)
+
+        blocker = Blocker()
+        holding = asyncio.create_task(executor.run(blocker))
+        await asyncio.sleep(0)
+
+        await client.request("start", task="job")
+        assert executor.stats()["pending"] == 1
+
+        await asyncio.wait_for(teardown(*context), 5.0)
+        assert executor.stats()["pending"] == 0
+        assert not supervisor.is_running(job)
+
+        blocker.release.set()
+        await holding
+
+    asyncio.run(scenario())
+
+
+def test_socket_is_owner_only_once_bound(tmp_path, monkeypatch):
+    async def scenario():
+        modes = []
+
+        # Checked when the socket starts listening
+        listen = socket.socket.listen
+
+        def checked_listen(sock, *args):
+            modes.append(stat.S_IMODE(os.stat(sock.getsockname()).st_mode))
+            listen(sock, *args)
+
+        monkeypatch.setattr(socket.socket, "listen", checked_listen)
+
+        server = ControlServer(Supervisor([]), str(tmp_path / "control.sock"))
+        await server.start()
+        await server.close()
+
+        assert modes == [0o600]
+
+    asyncio.run(scenario())
+
+
+def test_status_and_errors(tmp_path):
+    async def scenario():
+        base = sleeper("base")
+        web = sleeper("web", base)
+
+        context = await controlled(tmp_path, [base, web])
+        _, _, _, client = context
+        try:
+            await asyncio.wait_for(web.ready.wait(), 5.0)
+
+            status = {item["name"]: item for item in await client.request("status")}
+            assert status["base"]["state"] == status["web"]["state"] == "ready"
+            assert status["web"]["dependencies"] == ["base"]
+            assert status["web"]["level"] == 1
+            assert status["web"]["pid"] == web.process.pid
+
+            with pytest.raises(RuntimeError, match="unknown task"):
+                await client.request("status", task="missing")
+            with pytest.raises(RuntimeError, match="unknown command"):
+                await client.request("explode")
+
+            # Malformed requests get an error, and the connection goes on
+            client.writer.write(b"not json\n[1, 2]\n")
+            for _ in range(2):
+                response = json.loads(await client.reader.readline())
+                assert response["ok"] is False and response["id"] is None
+
+            assert len(await client.request("status")) == 2
+
+        finally:
+            await teardown(*context)
+
+    asyncio.run(scenario())
+
+
+def test_stop_and_restart_subtree(tmp_path):
+    async def scenario():
+        base = sleeper("base")
+        web = sleeper("web", base)
+        other = sleeper("other")
+
+        context = await controlled(tmp_path, [base, web, other])
+        supervisor, runner, _, client = context
+        try:
+            await asyncio.wait_for(web.ready.wait(), 5.0)
+
+            assert await client.request("stop", task="base", subtree=True) == ["base", "web"]
+            states = {item["name"]: item["state"] for item in await client.request("status")}
+            assert states == {"base": "ended", "web": "ended", "other": "ready"}
+
+            assert await client.request("restart", task="base", subtree=True) == ["base", "web"]
+            await asyncio.wait_for(web.ready.wait(), 5.0)
+            assert supervisor.is_running(base) and supervisor.is_running(web)
+            assert not runner.done()
+
+        finally:
+            await teardown(*context)
+
+    asyncio.run(scenario())
+
+
+def test_logs_tail_and_follow(tmp_path):
+    go = tmp_path / "go"
+
+    async def scenario():
+        talker = Task(
+            name="talker",
+            command=[
+                "sh",
+                "-c",
+                f"echo one; echo two >&2; while [ ! -e {go} ]; do sleep 0.05; done; echo three; exec sleep 3600",
+            ],
+            log_output="none",
+            stop_signal=signal.SIGTERM,
+        )
+
+        context = await controlled(tmp_path, [talker])
+        _, _, server, client = context
+        try:
+            for _ in range(100):
+                if len(talker.output) == 2:
+                    break
+                await asyncio.sleep(0.05)
+
+            lines = await client.request("logs", tasks=["talker"], tail=5)
+            assert sorted((line["stream"], line["line"]) for line in lines) == [
+                ("stderr", "two"),
+                ("stdout", "one"),
+            ]
+
+            stderr = await client.request("logs", tasks=["talker"], stream="stderr", tail=5)
+            assert [line["line"] for line in stderr] == ["two"]
+
+            assert await client.request("logs", tasks=["talker"], stream="stdout", follow=True) == []
+            go.touch()
+
+            events = client.events()
+            event = await asyncio.wait_for(events.__anext__(), 5.0)
+            assert event == {"event": "output", "task": "talker", "stream": "stdout", "line": "three"}
+
+            await client.request("unfollow")
+            assert not server.fanouts
+
+            with pytest.raises(RuntimeError, match="stream"):
+                await client.request("logs", stream="stdin")
+
+        finally:
+            await teardown(*context)
+
+    asyncio.run(scenario())
+
+
+def test_timeline(tmp_path):
+    async def scenario():
+        base = sleeper("base")
+        web = sleeper("web", base)
+
+        context = await controlled(tmp_path, [base, web])
+        try:
+            await asyncio.wait_for(web.ready.wait(), 5.0)
+
+            timeline = await context[3].request("timeline")
+            tasks = {item["name"]: item for item in timeline["tasks"]}
+            assert tasks["web"]["dependencies"] == ["base"]
+            assert tasks["base"]["timestamps"]["ready"] <= tasks["web"]["timestamps"]["spawn"]
+            assert timeline["now"] >= tasks["web"]["timestamps"]["ready"]
+
+        finally:
+            await teardown(*context)
+
+    asyncio.run(scenario())
@@ -0,0 +1,242 @@
+"""
+Job executor tests
+==================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import asyncio
+
+from datetime import datetime
+
+import pytest
+
+from igniiite.executor import JobExecutor, JobDropped
+from igniiite.scheduler import run_at
+
+
+class Job:
+    """Stand-in task recording when it runs, and running until released"""
+
+    def __init__(self, name, started, release=None):
+        self.name = name
+        self.started = started
+        self.release = release
+
+    async def run(self):
+        self.started.append(self.name)
+        if self.release is not None:
+            await self.release.wait()
+
+        return self.name
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+##################################
+
+
+def test_max_concurrent_and_priorities():
+    async def scenario():
+        started = []
+        release = asyncio.Event()
+        executor = JobExecutor(max_concurrent=1)
+
+        runs = [asyncio.create_task(executor.run(Job("first", started, release)))]
+        await settle()
+
+        for name, priority in (("low", 0), ("high", 10), ("middle", 5), ("low-2", 0)):
+            runs.append(asyncio.create_task(executor.run(Job(name, started), priority)))
+        await settle()
+
+        assert started == ["first"]
+        assert executor.stats()["pending"] == 4
+
+        release.set()
+        results = await asyncio.gather(*runs)
+
+        assert started == ["first", "high", "middle", "low", "low-2"]
+        assert results == ["first", "low", "high", "middle", "low-2"]
+        assert executor.stats()["completed"] == 5
+
+    asyncio.run(scenario())
+
+
+def test_group_limit_does_not_hold_back_other_groups():
+    async def scenario():
+        started = []
+        release = asyncio.Event()
+        executor = JobExecutor(group_limits={"backup": 1})
+
+        runs = [
+            asyncio.create_task(executor.run(Job("backup-1", started, release), group="backup")),
+            asyncio.create_task(executor.run(Job("backup-2", started, release), group="backup")),
+            asyncio.create_task(executor.run(Job("report", started, release))),
+        ]
+        await settle()
+
+        assert started == ["backup-1", "report"]
+        assert executor.stats()["groups"] == {"backup": 1}
+
+        release.set()
+        await asyncio.gather(*runs)
+        assert started == ["backup-1", "report", "backup-2"]
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "policy, dropped",
+    [
+        ("drop-newest", "new"),
+        ("drop-oldest", "old"),
+        ("drop-lowest", "old"),
+    ],
+)
+def test_full_queue_policies(policy, dropped):
+    async def scenario():
+        started = []
+        release = asyncio.Event()
+        executor = JobExecutor(max_concurrent=1, max_pending=1, policy=policy)
+
+        running = asyncio.create_task(executor.run(Job("running", started, release)))
+        await settle()
+
+        old = asyncio.create_task(executor.run(Job("old", started), priority=0))
+        await settle()
+        new = asyncio.create_task(executor.run(Job("new", started), priority=5))
+        await settle()
+
+        release.set()
+        outcomes = await asyncio.gather(running, old, new, return_exceptions=True)
+
+        results = dict(zip(("running", "old", "new"), outcomes))
+        assert isinstance(results[dropped], JobDropped)
+        assert [name for name, result in results.items() if result == name] == [
+            name for name in ("running", "old", "new") if name != dropped
+        ]
+        assert executor.stats()["dropped"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_drop_lowest_drops_new_run_of_lowest_priority():
+    async def scenario():
+        started = []
+        release = asyncio.Event()
+        executor = JobExecutor(max_concurrent=1, max_pending=1, policy="drop-lowest")
+
+        running = asyncio.create_task(executor.run(Job("running", started, release)))
+        await settle()
+        pending = asyncio.create_task(executor.run(Job("pending", started), priority=5))
+        await settle()
+
+        with pytest.raises(JobDropped):
+            await executor.run(Job("new", started), priority=0)
+
+        release.set()
+        await asyncio.gather(running, pending)
+        assert started == ["running", "pending"]
+
+    asyncio.run(scenario())
+
+
+def test_block_policy_waits_for_room():
+    async def scenario():
+        started = []
+        release = asyncio.Event()
+        executor = JobExecutor(max_concurrent=1, max_pending=1, policy="block")
+
+        runs = [asyncio.create_task(executor.run(Job("running", started, release)))]
+        await settle()
+        runs.append(asyncio.create_task(executor.run(Job("pending", started))))
+        await settle()
+        blocked = asyncio.create_task(executor.run(Job("blocked", started)))
+        await settle()
+
+        assert not blocked.done()
+        assert executor.stats()["pending"] == 1
+
+        release.set()
+        await asyncio.gather(*runs, blocked)
+        assert started == ["running", "pending", "blocked"]
+        assert executor.stats()["dropped"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_pending_run_leaves_the_queue():
+    async def scenario():
+        started = []
+        release = asyncio.Event()
+        executor = JobExecutor(max_concurrent=1)
+
+        running = asyncio.create_task(executor.run(Job("running", started, release)))
+        await settle()
+        pending = asyncio.create_task(executor.run(Job("pending", started)))
+        await settle()
+
+        pending.cancel()
+        await settle()
+        assert executor.stats()["pending"] == 0
+
+        release.set()
+        await running
+        assert started == ["running"]
+        assert executor.stats()["running"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_run_cancelled_once_dropped_is_not_released():
+    async def scenario():
+        started = []
+        release = asyncio.Event()
+        executor = JobExecutor(max_concurrent=1, max_pending=1, policy="drop-oldest")
+
+        running = asyncio.create_task(executor.run(Job("running", started, release)))
+        await settle()
+        old = asyncio.create_task(executor.run(Job("old", started)))
+        await settle()
+
+        # Dropped, then cancelled before it could resume
+        new = asyncio.create_task(executor.run(Job("new", started)))
+        await asyncio.sleep(0)
+        old.cancel()
+        await settle()
+        assert old.cancelled()
+        assert executor.stats()["running"] == 1
+
+        release.set()
+        assert await asyncio.gather(running, new) == ["running", "new"]
+        assert executor.stats()["running"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_run_at_goes_through_the_executor():
+    async def scenario():
+        started = []
+        release = asyncio.Event()
+        executor = JobExecutor(max_concurrent=1)
+
+        running = asyncio.create_task(executor.run(Job("running", started, release)))
+        await settle()
+
+        later = asyncio.create_task(
+            run_at(datetime.now(), Job("later", started), executor, priority=3)
+        )
+        await settle()
+
+        assert started == ["running"]
+        assert executor.stats()["pending"] == 1
+
+        release.set()
+        assert await later == "later"
+        await running
+
+    asyncio.run(scenario())
@@ -0,0 +1,41 @@
+"""
+Startup footprint tests
+=======================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+from igniiite import footprint
+
+
+# Modules imported along with the core, 19 at the time of writing
+MAX_CORE_MODULES = 25
+
+
+def test_startup_within_budget():
+    report = footprint.measure_startup(tasks=1000)
+
+    text = footprint.format_report(report)
+
+    # Not the import time, which depends on the machine load
+    assert report["third_party"] == [], text
+    assert report["modules"] <= MAX_CORE_MODULES, text
+    assert report["bytes_per_task"] <= footprint.STARTUP_BUDGET.bytes_per_task, text
+
+
+def test_import_time_within_a_generous_ceiling():
+    # Best of a few runs, far above the budget: only catches gross regressions
+    import_ms = min(footprint.measure_startup(tasks=1)["import_ms"] for _ in range(3))
+
+    assert import_ms <= 4 * footprint.STARTUP_BUDGET.import_ms
+
+
+def test_check_budget_reports_overruns():
+    report = {"import_ms": 10.0, "bytes_per_task": 8192.0, "third_party": ["yaml"]}
+    budget = footprint.Budget(import_ms=50.0, bytes_per_task=4096, third_party=0)
+
+    assert footprint.check_budget(report, budget) == [
+        ("bytes_per_task", 8192.0, 4096),
+        ("third_party", 1, 0),
+    ]
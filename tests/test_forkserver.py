@@ -0,0 +1,187 @@
+"""
+Fork server launcher tests
+==========================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import signal
+import asyncio
+
+from igniiite.task import Task
+from igniiite.launcher import ForkServerLauncher
+
+
+async def launch(launcher, command, **kwargs):
+    # Output and return code of a command
+    process = await launcher.spawn(command, **kwargs)
+    stdout = await process.stdout.read()
+    stderr = await process.stderr.read()
+    returncode = await asyncio.wait_for(process.wait(), 10.0)
+
+    return stdout.decode(), stderr.decode(), returncode
+
+
+def with_launcher(scenario, **kwargs):
+    async def run():
+        launcher = ForkServerLauncher(**kwargs)
+        try:
+            await scenario(launcher)
+        finally:
+            await launcher.close()
+
+    asyncio.run(run())
+
+
+def is_alive(pid):
+    # Zombies waiting to be reaped by init are dead
+    try:
+        with open(f"/proc/{pid}/stat") as fhandle:
+            return fhandle.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+##################################
+
+
+def test_mode():
+    launcher = ForkServerLauncher()
+
+    assert launcher.mode([sys.executable, "-m", "json.tool"]) == "python"
+    assert launcher.mode([sys.executable, "job.py", "--flag"]) == "python"
+    assert launcher.mode([sys.executable, "-c", "pass"]) == "exec"
+    assert launcher.mode([sys.executable, "-u", "job.py"]) == "exec"
+    assert launcher.mode(["echo", "job.py"]) == "exec"
+
+
+def test_exec_command():
+    async def scenario(launcher):
+        stdout, _, returncode = await launch(
+            launcher, ["sh", "-c", "echo $GREETING; exit 4"], env={"GREETING": "hello"}
+        )
+        assert (stdout, returncode) == ("hello\n", 4)
+
+        _, stderr, returncode = await launch(launcher, ["/nonexistent/command"])
+        assert returncode == 127
+        assert "FileNotFoundError" in stderr
+
+    with_launcher(scenario)
+
+
+def test_python_script_runs_in_the_forked_child(tmp_path):
+    script = tmp_path / "job.py"
+    script.write_text(
+        "import os, sys\n"
+        "print(sys.argv[1:], os.getcwd(), os.environ.get('GREETING'), os.getppid())\n"
+        "sys.exit(3)\n"
+    )
+
+    async def scenario(launcher):
+        await launcher.start()
+        stdout, _, returncode = await launch(
+            launcher,
+            [sys.executable, str(script), "a", "b"],
+            env={**os.environ, "GREETING": "hello"},
+            cwd=str(tmp_path),
+        )
+
+        assert returncode == 3
+        assert stdout.split() == ["['a',", "'b']", str(tmp_path), "hello", str(launcher.server.pid)]
+
+    with_launcher(scenario)
+
+
+def test_python_module_exceptions(tmp_path):
+    (tmp_path / "failing_job.py").write_text("raise RuntimeError('boom')\n")
+
+    async def scenario(launcher):
+        _, stderr, returncode = await launch(
+            launcher, [sys.executable, "-m", "failing_job"], cwd=str(tmp_path)
+        )
+
+        assert returncode == 1
+        assert "RuntimeError: boom" in stderr
+
+    with_launcher(scenario)
+
+
+def test_passed_descriptors_keep_their_numbers():
+    async def scenario(launcher):
+        read_fd, write_fd = os.pipe()
+        target = os.dup2(write_fd, 42)
+        os.close(write_fd)
+
+        try:
+            _, _, returncode = await launch(
+                launcher,
+                [sys.executable, "-c", "import os; os.write(42, b'passed\\n')"],
+                pass_fds=(target,),
+            )
+        finally:
+            os.close(target)
+
+        assert returncode == 0
+        with os.fdopen(read_fd, "rb") as fhandle:
+            assert fhandle.read() == b"passed\n"
+
+    with_launcher(scenario)
+
+
+def test_signals_reach_the_whole_process_group(tmp_path):
+    script = tmp_path / "job.py"
+    script.write_text(
+        "import subprocess, time\n"
+        "print(subprocess.Popen(['sleep', '60']).pid, flush=True)\n"
+        "time.sleep(60)\n"
+    )
+
+    async def scenario(launcher):
+        for command in (["sh", "-c", "sleep 60 & echo $!; wait"], [sys.executable, str(script)]):
+            process = await launcher.spawn(command)
+            grandchild = int(await asyncio.wait_for(process.stdout.readline(), 10.0))
+
+            assert os.getpgid(process.pid) == os.getsid(process.pid) == process.pid
+            process.send_signal(signal.SIGKILL)
+            assert await asyncio.wait_for(process.wait(), 10.0) == -signal.SIGKILL
+
+            for _ in range(50):
+                if not is_alive(grandchild):
+                    break
+                await asyncio.sleep(0.1)
+            assert not is_alive(grandchild)
+
+            # Exited: no longer signalled
+            process.kill()
+            process.close()
+
+    with_launcher(scenario)
+
+
+def test_many_concurrent_launches():
+    async def scenario(launcher):
+        results = await asyncio.gather(
+            *(launch(launcher, ["sh", "-c", f"echo {index}; exit {index % 3}"]) for index in range(30))
+        )
+
+        assert [(stdout, returncode) for stdout, _, returncode in results] == [
+            (f"{index}\n", index % 3) for index in range(30)
+        ]
+
+    with_launcher(scenario, preload=("json",))
+
+
+def test_task_return_codes():
+    async def scenario(launcher):
+        succeeding = Task(name="succeeding", command=["true"], launcher=launcher, log_output="none")
+        failing = Task(name="failing", command=["sh", "-c", "exit 2"], launcher=launcher, log_output="none")
+
+        await asyncio.wait_for(asyncio.gather(succeeding.run(), failing.run()), 10.0)
+
+        assert succeeding.process.returncode == 0 and not succeeding.failed.is_set()
+        assert failing.process.returncode == 2 and failing.failed.is_set()
+
+    with_launcher(scenario)
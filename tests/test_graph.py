@@ -0,0 +1,301 @@
+"""
+Task graph supervision tests
+============================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import signal
+import asyncio
+
+import pytest
+
+from igniiite.task import Task, null_hook
+from igniiite.graph import Graph, Supervisor
+
+
+def sleeper(name, *dependencies):
+    return Task(
+        name=name,
+        command=["sleep", "3600"],
+        dependencies=set(dependencies),
+        log_output="none",
+        stop_signal=signal.SIGTERM,
+        stop_timeout=2.0,
+    )
+
+
+def slow_stopper(name, *dependencies):
+    # Takes 0.3s to exit once asked to
+    return Task(
+        name=name,
+        command=["sh", "-c", "trap 'sleep 0.3; exit 0' TERM; while :; do sleep 0.05; done"],
+        dependencies=set(dependencies),
+        log_output="none",
+        stop_signal=signal.SIGTERM,
+        stop_timeout=2.0,
+    )
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+##################################
+
+
+def test_graph_levels():
+    base = sleeper("base")
+    cache = sleeper("cache")
+    web = sleeper("web", base, cache)
+    worker = sleeper("worker", base)
+    proxy = sleeper("proxy", web)
+
+    graph = Graph([proxy, web, worker, cache, base, web])
+
+    assert len(graph) == 5 and graph.depth == 3
+    assert [set(level) for level in graph.levels] == [{base, cache}, {web, worker}, {proxy}]
+    assert set(graph.dependents[base]) == {web, worker}
+    assert sleeper("other") not in graph
+
+
+def test_invalid_graphs():
+    base = sleeper("base")
+    with pytest.raises(ValueError, match="not part of the graph"):
+        Graph([sleeper("web", base)])
+
+    first = sleeper("first")
+    second = sleeper("second", first)
+    first.dependencies = {second}
+    with pytest.raises(ValueError, match="cycle"):
+        Graph([first, second])
+
+
+def test_failed_dependencies_skip_dependents():
+    async def scenario():
+        broken = Task(name="broken", command=["false"], ready_hook=null_hook, log_output="none")
+        web = sleeper("web", broken)
+        proxy = sleeper("proxy", web)
+        supervisor = Supervisor([broken, web, proxy])
+
+        # Everything ends: nothing is left waiting
+        await asyncio.wait_for(supervisor.run(), 5.0)
+
+        assert web.process is None and proxy.process is None
+        assert web.failed.is_set() and proxy.failed.is_set()
+
+    asyncio.run(scenario())
+
+
+def test_levels_start_in_parallel():
+    async def scenario():
+        base = sleeper("base")
+        dependents = [sleeper(f"web{index}", base) for index in range(10)]
+        supervisor = Supervisor([base, *dependents])
+
+        runner = asyncio.create_task(supervisor.run())
+        await asyncio.wait_for(asyncio.gather(*(tt.ready.wait() for tt in dependents)), 5.0)
+
+        # All launched at once when base got ready, not one after the other
+        spawns = [tt.timestamps["spawn"] for tt in dependents]
+        assert min(spawns) >= base.timestamps["ready"]
+        assert max(spawns) - min(spawns) < 0.5
+
+        await supervisor.shutdown()
+        await asyncio.wait_for(runner, 5.0)
+
+    asyncio.run(scenario())
+
+
+def test_dependents_start_once_ready():
+    async def scenario():
+        base = sleeper("base")
+        web = sleeper("web", base)
+        supervisor = Supervisor([base, web])
+
+        runner = asyncio.create_task(supervisor.run())
+        await asyncio.wait_for(web.ready.wait(), 5.0)
+        assert base.timestamps["ready"] <= web.timestamps["spawn"]
+
+        await supervisor.shutdown()
+        await runner
+
+    asyncio.run(scenario())
+
+
+def test_dependency_ready_again_is_counted_once():
+    async def scenario():
+        base = sleeper("base")
+        slow = sleeper("slow")
+        slow.ready_hook = null_hook
+        web = sleeper("web", base, slow)
+        supervisor = Supervisor([base, slow, web])
+
+        runner = asyncio.create_task(supervisor.run())
+        await asyncio.wait_for(base.ready.wait(), 5.0)
+
+        # Ready again after a restart, slow is still not ready
+        pid = base.process.pid
+        await supervisor.restart(base)
+        while base.process.pid == pid or not base.ready.is_set():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.2)
+        assert not supervisor.is_running(web) and "start" not in web.timestamps
+
+        slow.set_ready()
+        await asyncio.wait_for(web.ready.wait(), 5.0)
+
+        await supervisor.shutdown()
+        await asyncio.wait_for(runner, 5.0)
+
+    asyncio.run(scenario())
+
+
+def test_restart_subtree_keeps_supervisor_running():
+    async def scenario():
+        base = sleeper("base")
+        web = sleeper("web", base)
+        supervisor = Supervisor([base, web])
+
+        runner = asyncio.create_task(supervisor.run())
+        await asyncio.wait_for(web.ready.wait(), 5.0)
+        old_pids = (base.process.pid, web.process.pid)
+
+        # Every runner ends while the subtree is down
+        await supervisor.restart(base, subtree=True)
+        await asyncio.wait_for(web.ready.wait(), 5.0)
+        assert not runner.done()
+
+        new_pids = (base.process.pid, web.process.pid)
+        assert set(new_pids).isdisjoint(old_pids)
+
+        await supervisor.shutdown()
+        await asyncio.wait_for(runner, 5.0)
+        assert not any(is_alive(pid) for pid in new_pids)
+        assert not supervisor.is_running(base) and not supervisor.is_running(web)
+
+    asyncio.run(scenario())
+
+
+def test_dependents_wait_for_a_stopped_dependency():
+    async def scenario():
+        base = sleeper("base")
+        web = sleeper("web", base)
+        # Keeps the graph running while the subtree is down
+        other = sleeper("other")
+        supervisor = Supervisor([base, web, other])
+
+        runner = asyncio.create_task(supervisor.run())
+        await asyncio.wait_for(web.ready.wait(), 5.0)
+
+        await supervisor.stop(base, subtree=True)
+        assert not base.ready.is_set() and not web.ready.is_set()
+
+        # Not launched before its dependency is back
+        supervisor.start(web)
+        await asyncio.sleep(0.2)
+        assert "spawn" not in web.timestamps
+
+        supervisor.start(base)
+        await asyncio.wait_for(web.ready.wait(), 5.0)
+        assert base.timestamps["ready"] <= web.timestamps["spawn"]
+
+        await supervisor.shutdown()
+        await asyncio.wait_for(runner, 5.0)
+
+    asyncio.run(scenario())
+
+
+def test_start_needs_a_running_graph():
+    async def scenario():
+        job = Task(name="job", command=["true"], log_output="none")
+        supervisor = Supervisor([job])
+
+        with pytest.raises(RuntimeError, match="not running"):
+            supervisor.start(job)
+
+        await asyncio.wait_for(supervisor.run(), 5.0)
+
+        # Nothing would supervise the run once run() returned
+        with pytest.raises(RuntimeError, match="not running"):
+            supervisor.start(job)
+        with pytest.raises(RuntimeError, match="not running"):
+            await supervisor.restart(job, subtree=True)
+        assert not supervisor.is_running(job)
+
+    asyncio.run(scenario())
+
+
+def test_shutdown_in_reverse_order_and_in_parallel():
+    async def scenario():
+        base = slow_stopper("base")
+        dependents = [slow_stopper(f"web{index}", base) for index in range(3)]
+        supervisor = Supervisor([base, *dependents])
+
+        ended = {}
+        loop = asyncio.get_running_loop()
+
+        def on_state(task, state):
+            if state == "ended":
+                ended[task.name] = loop.time()
+
+        for tt in (base, *dependents):
+            tt.watch(on_state)
+
+        runner = asyncio.create_task(supervisor.run())
+        await asyncio.wait_for(asyncio.gather(*(tt.ready.wait() for tt in dependents)), 5.0)
+
+        duration = await supervisor.shutdown()
+        await asyncio.wait_for(runner, 5.0)
+
+        # Dependents are stopped together, then their dependency
+        assert all(ended[tt.name] <= ended["base"] for tt in dependents)
+        assert 0.6 <= duration < 1.2
+        assert supervisor.shutdown_time == duration
+
+    asyncio.run(scenario())
+
+
+def test_shutdown_does_not_start_waiting_tasks():
+    async def scenario():
+        base = sleeper("base")
+        base.ready_hook = null_hook
+        web = sleeper("web", base)
+        supervisor = Supervisor([base, web])
+
+        runner = asyncio.create_task(supervisor.run())
+        while base.process is None:
+            await asyncio.sleep(0.01)
+
+        await supervisor.shutdown()
+        await asyncio.wait_for(runner, 5.0)
+
+        assert web.process is None
+        assert not is_alive(base.process.pid)
+
+    asyncio.run(scenario())
+
+
+def test_signals_shut_the_graph_down():
+    async def scenario():
+        base = sleeper("base")
+        web = sleeper("web", base)
+        supervisor = Supervisor([base, web])
+        supervisor.install_signal_handlers((signal.SIGUSR1,))
+
+        runner = asyncio.create_task(supervisor.run())
+        await asyncio.wait_for(web.ready.wait(), 5.0)
+
+        os.kill(os.getpid(), signal.SIGUSR1)
+        await asyncio.wait_for(runner, 5.0)
+
+        assert base.ended.is_set() and web.ended.is_set()
+        assert supervisor.shutdown_time is not None
+
+    asyncio.run(scenario())
@@ -0,0 +1,208 @@
+"""
+Health checks tests
+===================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import asyncio
+
+import pytest
+
+from igniiite.task import Task
+from igniiite.health import HealthCheck, HealthMonitor, ExecProbe, TcpProbe, HttpProbe
+
+
+def checked(name, probe, ready=True, **settings):
+    settings.setdefault("interval", 0.02)
+    task = Task(
+        name=name,
+        command=["true"],
+        log_output="none",
+        health_check=HealthCheck(probe, **settings),
+    )
+    if ready:
+        task.ready.set()
+
+    return task
+
+
+def results(*values):
+    # Probe giving the values in turn, then staying healthy
+    values = list(values)
+
+    async def probe(task):
+        return values.pop(0) if values else True
+
+    return probe
+
+
+async def serve(response):
+    # Local HTTP server answering every request with the given status line
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(response + b"\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+##################################
+
+
+def test_health_thresholds():
+    async def scenario():
+        monitor = HealthMonitor()
+        task = checked(
+            "web",
+            results(True, False, False, True, False, True, True),
+            failure_threshold=2,
+            success_threshold=2,
+        )
+        states = []
+        task.watch(lambda task, state: states.append(state))
+
+        monitor.add(task)
+        assert task.health == "starting"
+        await asyncio.sleep(0.3)
+        monitor.remove(task)
+
+        # One success is not enough, nor is one failure
+        assert states == ["unhealthy", "healthy"]
+        assert monitor.states == {}
+
+    asyncio.run(scenario())
+
+
+def test_tasks_are_checked_once_ready():
+    async def scenario():
+        monitor = HealthMonitor()
+        task = checked("late", results(), ready=False, start_period=0.1)
+
+        monitor.add(task)
+        state = monitor.state(task)
+        await asyncio.sleep(0.2)
+        assert state.checks == 0
+
+        task.ready.set()
+        await asyncio.sleep(0.1)
+        assert state.checks > 0
+        assert task.health == "healthy"
+
+        monitor.remove(task)
+
+    asyncio.run(scenario())
+
+
+def test_timeouts_and_errors():
+    async def scenario():
+        async def hanging(task):
+            await asyncio.sleep(60)
+
+        async def raising(task):
+            raise ConnectionRefusedError("refused")
+
+        monitor = HealthMonitor()
+        slow = checked("slow", hanging, timeout=0.05, failure_threshold=1)
+        broken = checked("broken", raising, failure_threshold=1)
+        monitor.add(slow)
+        monitor.add(broken)
+
+        await asyncio.sleep(0.2)
+
+        assert slow.health == broken.health == "unhealthy"
+        assert monitor.state(slow).last_error == "timed out after 0.05s"
+        assert monitor.state(broken).last_error == "refused"
+
+        monitor.remove(slow)
+        monitor.remove(broken)
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_limit():
+    async def scenario():
+        running = []
+        peak = 0
+
+        async def probe(task):
+            nonlocal peak
+            running.append(task)
+            peak = max(peak, len(running))
+            await asyncio.sleep(0.05)
+            running.remove(task)
+            return True
+
+        monitor = HealthMonitor(max_concurrency=2)
+        tasks = [checked(f"task{index}", probe) for index in range(6)]
+        for task in tasks:
+            monitor.add(task)
+
+        await asyncio.sleep(0.3)
+        for task in tasks:
+            monitor.remove(task)
+
+        assert peak == 2
+        assert all(task.health == "healthy" for task in tasks)
+
+        # Nothing planned anymore: the runner is gone
+        await asyncio.sleep(0.1)
+        assert monitor.runner is None
+
+    asyncio.run(scenario())
+
+
+def test_unhealthy_task_is_failed():
+    async def scenario():
+        task = Task(
+            name="unhealthy",
+            command=["sleep", "60"],
+            log_output="none",
+            health_check=HealthCheck(
+                ExecProbe(["false"]), interval=0.05, failure_threshold=2, action="fail"
+            ),
+        )
+
+        await asyncio.wait_for(task.run(), 5.0)
+
+        assert task.health == "unhealthy"
+        assert task.failed.is_set()
+
+    asyncio.run(scenario())
+
+
+def test_probes():
+    async def scenario():
+        ok, ok_port = await serve(b"HTTP/1.0 204 No Content")
+        error, error_port = await serve(b"HTTP/1.0 503 Service Unavailable")
+        task = Task(name="probed", command=["true"])
+
+        try:
+            assert await ExecProbe(["true"])(task)
+            assert not await ExecProbe(["false"])(task)
+
+            assert await TcpProbe(ok_port)(task)
+            assert await HttpProbe(ok_port, "/health")(task)
+            assert not await HttpProbe(error_port)(task)
+            assert await HttpProbe(error_port, statuses=(503,))(task)
+
+        finally:
+            ok.close()
+            error.close()
+
+        with pytest.raises(OSError):
+            await TcpProbe(ok_port)(task)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [{"interval": 0}, {"timeout": -1}, {"failure_threshold": 0}, {"action": "restart"}],
+)
+def test_invalid_settings(settings):
+    with pytest.raises(ValueError):
+        HealthCheck(results(), **settings)
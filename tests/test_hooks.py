@@ -0,0 +1,178 @@
+"""
+Readiness probes tests
+======================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import time
+import signal
+import socket
+import asyncio
+import itertools
+import subprocess
+
+from igniiite.task import Task
+from igniiite import hooks, metrics
+
+
+# Listen on a socket after a short delay, then idle
+LISTENER = """
+import socket, sys, time
+time.sleep(0.2)
+if sys.argv[1] == "tcp":
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+else:
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(sys.argv[2])
+server.listen()
+print("listening", flush=True)
+time.sleep(60)
+"""
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def run_until_ready(command, ready_hook, timeout=5.0):
+    async def scenario():
+        task = Task(name="probed", command=command, ready_hook=ready_hook, log_output="none")
+        runner = asyncio.create_task(task.run())
+        try:
+            await asyncio.wait_for(task.ready.wait(), timeout)
+        finally:
+            await task.stop()
+            await asyncio.wait_for(runner, 5.0)
+
+    asyncio.run(scenario())
+
+
+##################################
+
+
+def test_poll_intervals_grow_to_the_maximum():
+    intervals = list(itertools.islice(hooks.poll_intervals(0.01, 0.1, 2.0), 6))
+
+    assert intervals == [0.01, 0.02, 0.04, 0.08, 0.1, 0.1]
+
+
+def test_is_listening_tcp_and_unix(tmp_path):
+    path = str(tmp_path / "listening.sock")
+
+    with socket.socket() as tcp, socket.socket(socket.AF_UNIX) as unix:
+        tcp.bind(("127.0.0.1", 0))
+        port = tcp.getsockname()[1]
+        unix.bind(path)
+
+        assert not hooks.is_listening(os.getpid(), port=port)
+        assert not hooks.is_listening(os.getpid(), path=path)
+
+        tcp.listen()
+        unix.listen()
+
+        assert hooks.is_listening(os.getpid(), port=port)
+        assert hooks.is_listening(os.getpid(), path=path)
+        assert hooks.is_listening(os.getpid())
+
+
+def test_is_listening_looks_at_children():
+    # The shell does not exec the listener, which stays its child
+    shell = subprocess.Popen(
+        ["sh", "-c", f"{sys.executable} -c '{LISTENER}' tcp; true"],
+        stdout=subprocess.PIPE,
+        start_new_session=True,
+    )
+
+    try:
+        shell.stdout.readline()
+        assert hooks.is_listening(shell.pid)
+        assert not hooks.socket_inodes(shell.pid)
+    finally:
+        os.killpg(shell.pid, signal.SIGKILL)
+        shell.wait()
+
+
+def test_process_tree_reads_only_the_tree(monkeypatch):
+    shell = subprocess.Popen(["sh", "-c", "sleep 60 & sleep 60; true"], start_new_session=True)
+
+    try:
+        tree = []
+        for _ in range(100):
+            tree = hooks._process_tree(shell.pid)
+            if len(tree) == 3:
+                break
+            time.sleep(0.01)
+
+        # Through the children files, with no scan of every process
+        def scan_processes(*args):
+            raise AssertionError("all processes scanned")
+
+        monkeypatch.setattr(metrics, "scan_processes", scan_processes)
+        assert hooks._process_tree(shell.pid) == tree
+        monkeypatch.undo()
+
+        # Same tree without children files
+        monkeypatch.setattr(hooks, "_children", lambda pid: None)
+        assert sorted(hooks._process_tree(shell.pid)) == sorted(tree)
+        assert len(tree) == 3 and tree[0] == shell.pid
+    finally:
+        os.killpg(shell.pid, signal.SIGKILL)
+        shell.wait()
+
+
+def test_wait_for_tcp():
+    port = free_port()
+    run_until_ready(
+        [sys.executable, "-c", f"import time, socket; time.sleep(0.2); s = socket.socket(); "
+         f"s.bind(('127.0.0.1', {port})); s.listen(); time.sleep(60)"],
+        hooks.wait_for_tcp(port, max_interval=0.05),
+    )
+
+
+def test_wait_for_unix(tmp_path):
+    path = str(tmp_path / "service.sock")
+    run_until_ready(
+        [sys.executable, "-c", LISTENER, "unix", path], hooks.wait_for_unix(path, max_interval=0.05)
+    )
+
+
+def test_wait_for_listen(tmp_path):
+    path = str(tmp_path / "service.sock")
+    run_until_ready(
+        [sys.executable, "-c", LISTENER, "unix", path], hooks.wait_for_listen(path=path, max_interval=0.05)
+    )
+    run_until_ready([sys.executable, "-c", LISTENER, "tcp"], hooks.wait_for_listen(max_interval=0.05))
+
+    # Listening from a child of the process
+    run_until_ready(
+        ["sh", "-c", f"{sys.executable} -c '{LISTENER}' tcp; true"],
+        hooks.wait_for_listen(max_interval=0.05),
+    )
+
+
+def test_wait_for_file(tmp_path):
+    path = tmp_path / "missing" / "ready"
+
+    # The parent directory does not exist yet
+    run_until_ready(
+        ["sh", "-c", f"sleep 0.2; mkdir {path.parent}; touch {path}; sleep 60"],
+        hooks.wait_for_file(str(path), max_interval=0.05),
+    )
+
+
+def test_wait_for_pidfile(tmp_path):
+    path = tmp_path / "service.pid"
+
+    # A pidfile naming a dead process is not enough
+    path.write_text("999999999\n")
+    run_until_ready(
+        ["sh", "-c", f"sleep 0.2; echo $$ > {path}.tmp; mv {path}.tmp {path}; sleep 60"],
+        hooks.wait_for_pidfile(str(path), max_interval=0.05),
+    )
@@ -0,0 +1,157 @@
+"""
+Resource limits tests
+=====================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import sys
+import asyncio
+import resource
+import subprocess
+
+import pytest
+
+from igniiite import limits
+from igniiite.task import Task
+from igniiite.limits import ResourceLimits, CgroupManager, prepare_limits
+from igniiite.launcher import ExecLauncher, ForkServerLauncher
+from igniiite.reaper import ChildReaper, ReaperLauncher
+
+
+# Prints the limits the command sees as soon as it starts
+PRINT_LIMITS = (
+    "import os, resource; "
+    "print(os.getpriority(os.PRIO_PROCESS, 0), "
+    "resource.getrlimit(resource.RLIMIT_AS)[0], "
+    "min(os.sched_getaffinity(0)), len(os.sched_getaffinity(0)))"
+)
+
+
+@pytest.fixture
+def child_only(tmp_path, monkeypatch):
+    # Memory limits fall back to rlimits, and nothing is applied from the
+    # supervisor once the process is launched
+    monkeypatch.setattr(limits, "default_cgroups", CgroupManager(root=str(tmp_path)))
+    monkeypatch.setattr(limits, "check_limits", lambda *args, **kwargs: None)
+
+
+def reaper_launcher():
+    # The default reaper would make the test process a child subreaper
+    return ReaperLauncher(ChildReaper(subreaper=False))
+
+
+async def print_limits(launcher, task_limits, delay=0.0):
+    # What a task with the given limits sees once started
+    task = Task(
+        name="limited",
+        command=[sys.executable, "-c", f"import time; time.sleep({delay}); {PRINT_LIMITS}"],
+        launcher=launcher,
+        log_output="none",
+        limits=task_limits,
+    )
+    lines = await task.stdout_listeners.register()
+
+    try:
+        await asyncio.wait_for(task.run(), 10.0)
+    finally:
+        if isinstance(launcher, ForkServerLauncher):
+            await launcher.close()
+        elif isinstance(launcher, ReaperLauncher):
+            launcher.reaper.close()
+
+    return [int(value) for value in (await lines.get()).split()]
+
+
+def wanted_limits():
+    cpu = min(os.sched_getaffinity(0))
+    memory_max = 4 * 2**30
+    nice = min(os.getpriority(os.PRIO_PROCESS, 0) + 3, 19)
+
+    return ResourceLimits(memory_max=memory_max, nice=nice, cpu_affinity={cpu}), [nice, memory_max, cpu, 1]
+
+
+##################################
+
+
+@pytest.mark.parametrize("make_launcher", [ExecLauncher, reaper_launcher, ForkServerLauncher])
+def test_limits_are_set_before_exec(child_only, monkeypatch, make_launcher):
+    task_limits, expected = wanted_limits()
+
+    # Forking a threaded supervisor must not run Python code in the child
+    popen = subprocess.Popen.__init__
+
+    def checked_popen(self, *args, **kwargs):
+        assert kwargs.get("preexec_fn") is None
+        popen(self, *args, **kwargs)
+
+    monkeypatch.setattr(subprocess.Popen, "__init__", checked_popen)
+
+    assert asyncio.run(print_limits(make_launcher(), task_limits)) == expected
+
+
+def test_process_joins_its_cgroup_before_exec(tmp_path):
+    async def scenario():
+        setup = {"cgroup": str(tmp_path), "rlimits": [], "nice": None, "ioprio": None, "affinity": None}
+        process = await ExecLauncher().spawn(
+            ["sh", "-c", f"cat {tmp_path}/cgroup.procs; echo; echo $$"], setup=setup
+        )
+        output = await asyncio.wait_for(process.stdout.read(), 5.0)
+        await process.wait()
+
+        return output.split()
+
+    joined, pid = asyncio.run(scenario())
+    assert joined == pid
+
+
+def test_prepare_limits_without_cgroups(tmp_path):
+    path, setup = prepare_limits(
+        ResourceLimits(memory_max=2**30, pids_max=100, cpu_weight=200, io_class="idle"),
+        "prepared",
+        CgroupManager(root=str(tmp_path)),
+    )
+
+    assert path is None
+    assert setup["cgroup"] is None
+    assert sorted(setup["rlimits"]) == sorted(
+        [(resource.RLIMIT_AS, 2**30), (resource.RLIMIT_NPROC, 100)]
+    )
+    assert setup["nice"] == limits.nice_from_weight(200)
+    assert setup["ioprio"] == ("idle", 4)
+    assert setup["affinity"] is None
+
+
+def test_task_groups_do_not_collide(tmp_path):
+    cgroups = CgroupManager(root=str(tmp_path))
+    cgroups.base = str(tmp_path)
+
+    names = ["a/b", "a_b", "a%2Fb", ".a", "a", ".."]
+    paths = {cgroups.create(name, ResourceLimits())[0] for name in names}
+
+    assert len(paths) == len(names)
+    assert all(os.path.dirname(path) == str(tmp_path) for path in paths)
+
+
+def test_check_limits_applies_missing_limits(tmp_path):
+    async def scenario():
+        process = await asyncio.create_subprocess_exec("sleep", "10")
+        try:
+            cpu = min(os.sched_getaffinity(0))
+            path = limits.apply_limits(
+                process.pid,
+                ResourceLimits(memory_max=2**31, cpu_affinity={cpu}),
+                "late",
+                CgroupManager(root=str(tmp_path)),
+            )
+
+            assert path is None
+            assert resource.prlimit(process.pid, resource.RLIMIT_AS) == (2**31, 2**31)
+            assert os.sched_getaffinity(process.pid) == {cpu}
+        finally:
+            process.kill()
+            await process.wait()
+
+    asyncio.run(scenario())
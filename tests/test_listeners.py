@@ -0,0 +1,121 @@
+"""
+Output listeners tests
+======================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import asyncio
+
+import pytest
+
+from igniiite.task import TaskListeners
+
+
+LINES = [b"one", b"two ", b"three", b"four", b"five"]
+
+
+def drain(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+##################################
+
+
+def test_text_and_raw_listeners():
+    async def scenario():
+        listeners = TaskListeners()
+        text = await listeners.register()
+        raw = await listeners.register(raw=True)
+
+        listeners.publish(LINES[:2])
+        listeners.publish(LINES[2:])
+
+        assert drain(text) == ["one", "two", "three", "four", "five"]
+        assert drain(raw) == [LINES[:2], LINES[2:]]
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "policy, kept, dropped",
+    [
+        ("drop-newest", ["one", "two"], 3),
+        ("drop-oldest", ["four", "five"], 3),
+        # The oldest line makes room for the end of stream marker
+        ("disconnect", ["two", None], 4),
+    ],
+)
+def test_lossy_policies(policy, kept, dropped):
+    async def scenario():
+        listeners = TaskListeners()
+        bounded = await listeners.register(maxsize=2, policy=policy)
+        unbounded = await listeners.register()
+        state = listeners.state(bounded)
+
+        listeners.publish(LINES)
+
+        assert drain(bounded) == kept
+        assert state.dropped == listeners.dropped == dropped
+
+        # Other listeners are not affected
+        assert len(drain(unbounded)) == 5
+        assert (bounded in listeners.listeners) == (policy != "disconnect")
+
+    asyncio.run(scenario())
+
+
+def test_block_policy_delivers_in_order():
+    async def scenario():
+        listeners = TaskListeners()
+        bounded = await listeners.register(maxsize=2, policy="block")
+
+        listeners.publish(LINES[:3])
+        listeners.publish(LINES[3:4])
+
+        received = [await asyncio.wait_for(bounded.get(), 1.0) for _ in range(4)]
+        assert received == ["one", "two", "three", "four"]
+        assert listeners.state(bounded).dropped == 0
+
+    asyncio.run(scenario())
+
+
+def test_block_policy_disconnects_stalled_listeners():
+    async def scenario():
+        listeners = TaskListeners()
+        bounded = await listeners.register(maxsize=2, policy="block", block_timeout=0.1)
+        state = listeners.state(bounded)
+
+        listeners.publish(LINES[:3])
+        await asyncio.sleep(0.3)
+
+        assert bounded not in listeners.listeners
+        assert drain(bounded) == ["two", None]
+        assert state.dropped == 2
+
+    asyncio.run(scenario())
+
+
+def test_block_policy_bounds_the_backlog():
+    async def scenario():
+        listeners = TaskListeners()
+        bounded = await listeners.register(maxsize=2, policy="block")
+
+        listeners.publish(LINES)
+
+        assert bounded not in listeners.listeners
+        assert drain(bounded)[-1] is None
+
+    asyncio.run(scenario())
+
+
+def test_invalid_policy():
+    async def scenario():
+        with pytest.raises(ValueError):
+            await TaskListeners().register(policy="explode")
+
+    asyncio.run(scenario())
@@ -0,0 +1,145 @@
+"""
+Output matcher tests
+====================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import asyncio
+
+import pytest
+
+from igniiite.task import Task
+from igniiite.hooks import wait_for_str_re
+
+
+def make_task(**kwargs):
+    return Task(name="matched", command=["true"], log_output="none", **kwargs)
+
+
+def collect(matches):
+    return lambda match: matches.append(match.group(0))
+
+
+##################################
+
+
+def test_lines_are_dispatched_to_matching_patterns():
+    async def scenario():
+        task = make_task()
+        ready, errors, ports = [], [], []
+
+        await task.matcher.add("ready", collect(ready))
+        await task.matcher.add(r"error \d+", collect(errors))
+        await task.matcher.add(r"port (\d+)", lambda match: ports.append(int(match.group(1))))
+
+        task.stderr_listeners.publish([b"starting", b"error 12 then ready", b"port 8080"])
+        task.stderr_listeners.publish([b"error 13"])
+
+        assert ready == ["ready"]
+        assert errors == ["error 12", "error 13"]
+        assert ports == [8080]
+
+    asyncio.run(scenario())
+
+
+def test_unmergeable_patterns():
+    async def scenario():
+        task = make_task()
+        doubled, named, ignored_case = [], [], []
+
+        await task.matcher.add(r"(\w+) \1", collect(doubled))
+        await task.matcher.add(r"(?P<word>up)", lambda match: named.append(match.group("word")))
+        await task.matcher.add(r"(?i)DOWN", collect(ignored_case))
+
+        task.stderr_listeners.publish([b"again again", b"going up", b"down", b"one two"])
+
+        assert doubled == ["again again"]
+        assert named == ["up"]
+        assert ignored_case == ["down"]
+
+    asyncio.run(scenario())
+
+
+def test_streams():
+    async def scenario():
+        task = make_task()
+        found = {"stdout": [], "stderr": [], "both": []}
+
+        for stream, matches in found.items():
+            await task.matcher.add("line", collect(matches), stream=stream)
+
+        task.stdout_listeners.publish([b"line"])
+        task.stderr_listeners.publish([b"line", b"line"])
+
+        assert {stream: len(matches) for stream, matches in found.items()} == {
+            "stdout": 1,
+            "stderr": 2,
+            "both": 3,
+        }
+
+        with pytest.raises(ValueError):
+            await task.matcher.add("line", collect([]), stream="stdin")
+
+    asyncio.run(scenario())
+
+
+def test_removed_patterns_stop_matching():
+    async def scenario():
+        task = make_task()
+        kept, removed = [], []
+
+        await task.matcher.add("line", collect(kept))
+        entry = await task.matcher.add("line", collect(removed))
+        task.stderr_listeners.publish([b"line"])
+
+        await task.matcher.remove(entry)
+        task.stderr_listeners.publish([b"line"])
+        assert (len(kept), len(removed)) == (2, 1)
+
+        # The matcher stops listening once it has no pattern left
+        [(entry, _)] = task.matcher.streams["stderr"].entries.items()
+        await task.matcher.remove(entry)
+        assert not task.stderr_listeners.listeners
+
+    asyncio.run(scenario())
+
+
+def test_failing_callbacks_do_not_stop_others():
+    async def scenario():
+        task = make_task()
+        matches = []
+
+        await task.matcher.add("line", lambda match: 1 / 0)
+        await task.matcher.add("line", collect(matches))
+        task.stderr_listeners.publish([b"line"])
+
+        assert matches == ["line"]
+
+    asyncio.run(scenario())
+
+
+def test_ready_hooks_share_the_matcher():
+    async def scenario():
+        task = Task(
+            name="matched",
+            command=["sh", "-c", "echo listening >&2; sleep 60"],
+            ready_hook=wait_for_str_re("listening"),
+            log_output="none",
+        )
+
+        runner = asyncio.create_task(task.run())
+        await asyncio.wait_for(task.ready.wait(), 5.0)
+
+        # The hook is done: its pattern was removed
+        assert not task.matcher.streams["stderr"].entries
+
+        # The line is still in the history of the current process
+        match = await asyncio.wait_for(task.matcher.wait_for("listen(ing)"), 1.0)
+        assert match.group(1) == "ing"
+
+        await task.stop()
+        await asyncio.wait_for(runner, 5.0)
+
+    asyncio.run(scenario())
@@ -0,0 +1,125 @@
+"""
+Resource accounting tests
+=========================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import sys
+import asyncio
+import subprocess
+
+from igniiite.metrics import ResourceSampler, ResourceSample, sample_trees
+
+
+# Two children, one of them burning CPU
+TREE = "sleep 60 & " + f"{sys.executable} -c 'while True: pass' & " + "echo started; wait"
+
+
+class Sampled:
+    """Stand-in task, with the attributes the sampler looks at"""
+
+    def __init__(self, name, process=None):
+        self.name = name
+        self.process = process
+
+
+def start_tree():
+    process = subprocess.Popen(["sh", "-c", TREE], stdout=subprocess.PIPE)
+    process.stdout.readline()
+    return process
+
+
+def stop_tree(process):
+    # The shell reaps its children, then exits
+    subprocess.run(["pkill", "-KILL", "-P", str(process.pid)])
+    process.wait()
+
+
+##################################
+
+
+def test_sample_trees():
+    process = start_tree()
+    try:
+        samples = sample_trees({"tree": process.pid, "gone": 999999999})
+
+        assert list(samples) == ["tree"]
+        sample = samples["tree"]
+        assert sample.processes == 3
+        assert sample.threads >= 3
+        assert sample.rss > 0
+        assert sample.fds >= 3
+    finally:
+        stop_tree(process)
+
+
+def test_sampler_history_and_cpu_usage():
+    async def scenario():
+        process = start_tree()
+        # returncode of a Popen object is None while it runs
+        task = Sampled("busy", process)
+        sampler = ResourceSampler([task], history=3)
+
+        try:
+            for _ in range(5):
+                await sampler.sample()
+                await asyncio.sleep(0.2)
+        finally:
+            stop_tree(process)
+
+        samples = sampler.samples(task)
+        assert len(samples) == 3
+        assert samples[-1] is sampler.latest(task)
+        assert [sample.time for sample in samples] == sorted(sample.time for sample in samples)
+
+        # The busy child uses a good share of a core
+        assert sampler.cpu_usage(task) > 0.2
+
+        # Ended tasks are not sampled anymore
+        await sampler.sample()
+        assert len(sampler.samples(task)) == 3
+
+        sampler.remove(task)
+        assert sampler.latest(task) is None and sampler.cpu_usage(task) is None
+
+    asyncio.run(scenario())
+
+
+def test_run_samples_periodically():
+    async def scenario():
+        process = start_tree()
+        task = Sampled("periodic", process)
+        sampler = ResourceSampler([task], interval=0.05)
+
+        runner = asyncio.create_task(sampler.run())
+        try:
+            await asyncio.sleep(0.32)
+        finally:
+            runner.cancel()
+            stop_tree(process)
+
+        assert 5 <= len(sampler.samples(task)) <= 8
+
+    asyncio.run(scenario())
+
+
+def test_dumps():
+    sampler = ResourceSampler()
+    task, idle = Sampled('web "front"\\back'), Sampled("idle")
+    sampler.add(task)
+    sampler.add(idle)
+    sampler.buffers[task].append(ResourceSample(0.0, 2, 3, 1.5, 0.5, 4 * 2**20, 0, 2**20, 7, 10))
+
+    text = sampler.dump_text().splitlines()
+    assert len(text) == 2
+    assert text[1].split()[-7:] == ["2", "3", "-", "4.0", "0.0", "1.0", "7"]
+
+    prometheus = sampler.dump_prometheus()
+    label = 'task="web \\"front\\"\\\\back"'
+    assert f'igniiite_task_cpu_seconds_total{{{label},mode="user"}} 1.5' in prometheus
+    assert f"igniiite_task_resident_memory_bytes{{{label}}} {4 * 2**20}" in prometheus
+    assert f"igniiite_task_open_fds{{{label}}} 7" in prometheus
+    assert "idle" not in prometheus
+    assert prometheus.count("# TYPE") == 8
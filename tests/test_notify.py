@@ -0,0 +1,192 @@
+"""
+Service notification tests
+==========================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import sys
+import signal
+import socket
+import asyncio
+import logging
+
+from igniiite.task import Task
+from igniiite.notify import Notifier, default_notifier
+
+
+# Send each notification argument, "sleep <seconds>" waits, then idle
+NOTIFY = """
+import os, socket, sys, time
+sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+for message in sys.argv[1:]:
+    if message.startswith("sleep "):
+        time.sleep(float(message[6:]))
+    else:
+        sock.sendto(message.encode(), os.environ["NOTIFY_SOCKET"])
+time.sleep(60)
+"""
+
+
+def hung(name, **kwargs):
+    # Never sends WATCHDOG=1
+    return Task(
+        name=name,
+        command=["sleep", "3600"],
+        notify=True,
+        watchdog_timeout=0.2,
+        log_output="none",
+        stop_signal=signal.SIGTERM,
+        stop_timeout=2.0,
+        **kwargs,
+    )
+
+
+def notifying(name, *messages, child=False, **kwargs):
+    command = [sys.executable, "-c", NOTIFY, *messages]
+    if child:
+        # The shell does not exec the last command, which stays its child
+        command = ["sh", "-c", '"$@"; true', "sh", *command]
+
+    return Task(
+        name=name,
+        command=command,
+        notify=True,
+        log_output="none",
+        stop_signal=signal.SIGTERM,
+        **kwargs,
+    )
+
+
+##################################
+
+
+def test_watchdog_expiry_restarts_whatever_the_policy():
+    async def scenario():
+        task = hung("hung", restart_policy="never", restart_delay=0.0)
+        runner = asyncio.create_task(task.run())
+
+        try:
+            for _ in range(50):
+                if task.restarts >= 2:
+                    break
+                await asyncio.sleep(0.1)
+
+            assert task.restarts >= 2
+            assert not task.failed.is_set()
+
+            await task.stop()
+            await asyncio.wait_for(runner, 5.0)
+
+        finally:
+            runner.cancel()
+            default_notifier.close()
+
+    asyncio.run(scenario())
+
+
+def test_watchdog_expiry_fails_with_fail_action():
+    async def scenario():
+        task = hung("failing", restart_policy="never", watchdog_action="fail")
+
+        try:
+            await asyncio.wait_for(task.run(), 5.0)
+        finally:
+            default_notifier.close()
+
+        assert task.failed.is_set()
+        assert task.restarts == 0
+
+    asyncio.run(scenario())
+
+
+def test_ready_and_status_from_a_child():
+    async def scenario():
+        task = notifying(
+            "child", "STATUS=starting", "sleep 0.2", "READY=1\nSTATUS=serving", child=True
+        )
+        runner = asyncio.create_task(task.run())
+
+        try:
+            await asyncio.sleep(0.1)
+            assert not task.ready.is_set()
+            assert task.status == "starting"
+
+            await asyncio.wait_for(task.ready.wait(), 5.0)
+            assert task.status == "serving"
+
+            await task.stop()
+            await asyncio.wait_for(runner, 5.0)
+
+        finally:
+            runner.cancel()
+            default_notifier.close()
+
+    asyncio.run(scenario())
+
+
+def test_watchdog_keepalive():
+    async def scenario():
+        keepalive = ["READY=1"] + ["sleep 0.1", "WATCHDOG=1"] * 10
+        task = notifying("alive", *keepalive, watchdog_timeout=0.3)
+        runner = asyncio.create_task(task.run())
+
+        try:
+            await asyncio.sleep(0.8)
+            assert task.restarts == 0 and not task.failed.is_set()
+
+            await task.stop()
+            await asyncio.wait_for(runner, 5.0)
+
+        finally:
+            runner.cancel()
+            default_notifier.close()
+
+    asyncio.run(scenario())
+
+
+def test_watchdog_timeout_changes_and_trigger():
+    async def scenario():
+        # The new timeout is longer than the time before the trigger
+        task = notifying(
+            "triggered",
+            "WATCHDOG_USEC=2000000",
+            "sleep 0.5",
+            "WATCHDOG=trigger",
+            watchdog_timeout=0.2,
+            watchdog_action="fail",
+        )
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            await asyncio.wait_for(task.run(), 5.0)
+        finally:
+            default_notifier.close()
+
+        assert 0.5 <= loop.time() - start < 1.5
+        assert task.failed.is_set()
+
+    asyncio.run(scenario())
+
+
+def test_unknown_senders_are_ignored(tmp_path, caplog):
+    async def scenario():
+        notifier = Notifier(str(tmp_path / "notify.sock"))
+        await notifier.start()
+        caplog.set_level(logging.WARNING, logger="igniiite.notify")
+
+        try:
+            sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sender.sendto(b"READY=1", notifier.path)
+            sender.close()
+            await asyncio.sleep(0.05)
+
+            assert "unknown process" in caplog.text
+        finally:
+            notifier.close()
+
+        assert notifier.sock is None
+
+    asyncio.run(scenario())
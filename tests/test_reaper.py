@@ -0,0 +1,150 @@
+"""
+Child reaper tests
+==================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import signal
+import asyncio
+
+from igniiite.task import Task
+from igniiite.reaper import ChildReaper, ReaperLauncher
+
+
+def is_alive(pid):
+    # Zombies of processes we are not the parent of are dead
+    try:
+        with open(f"/proc/{pid}/stat") as fhandle:
+            return fhandle.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+async def eventually(check, timeout=5.0):
+    for _ in range(int(timeout / 0.05)):
+        if check():
+            return True
+        await asyncio.sleep(0.05)
+
+    return check()
+
+
+def with_reaper(scenario, **kwargs):
+    async def run():
+        reaper = ChildReaper(subreaper=False, **kwargs)
+        reaper.start()
+        try:
+            await scenario(reaper, ReaperLauncher(reaper))
+        finally:
+            reaper.close()
+
+    asyncio.run(run())
+
+
+##################################
+
+
+def test_return_codes():
+    async def scenario(reaper, launcher):
+        exiting = await launcher.spawn(["sh", "-c", "exit 5"])
+        killed = await launcher.spawn(["sleep", "60"])
+        killed.kill()
+
+        assert await asyncio.wait_for(exiting.wait(), 5.0) == 5
+        assert await asyncio.wait_for(killed.wait(), 5.0) == -signal.SIGKILL
+        assert not reaper.exits
+
+    with_reaper(scenario)
+
+
+def test_burst_of_exits():
+    async def scenario(reaper, launcher):
+        processes = [
+            await launcher.spawn(["sh", "-c", f"exit {index % 7}"]) for index in range(50)
+        ]
+        codes = await asyncio.wait_for(asyncio.gather(*(pp.wait() for pp in processes)), 10.0)
+
+        assert codes == [index % 7 for index in range(50)]
+        assert not reaper.exits and not reaper.pidfds
+
+    with_reaper(scenario)
+
+
+def test_group_leftovers_are_killed():
+    async def scenario(reaper, launcher):
+        process = await launcher.spawn(["sh", "-c", "sleep 60 & echo $!"])
+        leftover = int(await process.stdout.readline())
+
+        assert await asyncio.wait_for(process.wait(), 5.0) == 0
+        assert await eventually(lambda: not is_alive(leftover))
+
+    with_reaper(scenario)
+
+
+def test_group_leftovers_can_be_kept():
+    async def scenario(reaper, launcher):
+        process = await launcher.spawn(["sh", "-c", "sleep 60 & echo $!"])
+        leftover = int(await process.stdout.readline())
+
+        await asyncio.wait_for(process.wait(), 5.0)
+        await asyncio.sleep(0.2)
+        assert is_alive(leftover)
+
+        # Still swept once it exits
+        os.kill(leftover, signal.SIGTERM)
+        assert await eventually(lambda: not is_alive(leftover))
+        process.close()
+
+    with_reaper(scenario, kill_remaining=False)
+
+
+def test_stray_children_are_reaped():
+    async def scenario(reaper, launcher):
+        # Not started through the launcher, so not tracked
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0)
+
+        assert await eventually(lambda: reaper.strays == 1)
+        assert not os.path.exists(f"/proc/{pid}")
+
+    with_reaper(scenario, reap_all=True)
+
+
+def test_daemonized_grandchildren_are_reaped():
+    async def run():
+        reaper = ChildReaper()
+        reaper.start()
+        try:
+            launcher = ReaperLauncher(reaper)
+            # The grandchild leaves the task group, and is reparented once its parent exits
+            process = await launcher.spawn(["sh", "-c", "setsid sleep 0.3 & echo $!; sleep 0.1"])
+            grandchild = int(await process.stdout.readline())
+
+            assert await asyncio.wait_for(process.wait(), 5.0) == 0
+            assert await eventually(lambda: not os.path.exists(f"/proc/{grandchild}"))
+        finally:
+            reaper.close()
+
+    asyncio.run(run())
+
+
+def test_task_with_reaper_launcher():
+    async def scenario(reaper, launcher):
+        task = Task(
+            name="reaped",
+            command=["sh", "-c", "echo started; exit 2"],
+            launcher=launcher,
+            log_output="none",
+        )
+        lines = await task.stdout_listeners.register()
+
+        await asyncio.wait_for(task.run(), 5.0)
+
+        assert await lines.get() == "started"
+        assert task.process.returncode == 2
+
+    with_reaper(scenario)
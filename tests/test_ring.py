@@ -0,0 +1,128 @@
+"""
+Task output history tests
+=========================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import random
+import asyncio
+
+import pytest
+
+from igniiite.ring import OutputRing, OutputLine
+
+
+class Model:
+    """Reference history: every line, kept ones computed from the limits"""
+
+    def __init__(self, max_bytes, max_lines):
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self.lines = []
+        self.total = 0
+
+    def append(self, stream, lines):
+        for line in lines:
+            self.lines.append(OutputLine(self.total, stream, line))
+            self.total += len(line) + 1
+
+    def kept(self):
+        kept = []
+        size = 0
+        for line in reversed(self.lines):
+            size += len(line.line) + 1
+            if size > self.max_bytes or len(kept) >= self.max_lines:
+                break
+            kept.append(line)
+
+        return kept[::-1]
+
+
+##################################
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_ring_matches_model(seed):
+    rand = random.Random(seed)
+    ring = OutputRing(max_bytes=rand.choice((40, 100, 300)), max_lines=rand.choice((3, 7, 50)))
+    model = Model(ring.max_bytes, ring.max_lines)
+
+    for _ in range(200):
+        stream = rand.choice(("stdout", "stderr"))
+        lines = [
+            bytes(rand.choice(b"abcxyz") for _ in range(rand.choice((0, 1, 5, 12, 60))))
+            for _ in range(rand.randint(1, 6))
+        ]
+
+        if rand.random() < 0.5:
+            ring.append(stream, lines)
+        else:
+            ring.append(stream, b"\n".join(lines))
+        model.append(stream, lines)
+
+        kept = model.kept()
+        assert ring.cursor == model.total
+        assert ring.first == (kept[0].cursor if kept else model.total)
+        assert len(ring) == len(kept)
+        assert ring.since(0) == kept
+
+        n = rand.randint(1, 10)
+        assert ring.tail(n) == kept[-n:]
+        assert ring.tail(n, "stderr") == [line for line in kept if line.stream == "stderr"][-n:]
+
+        cursor = rand.choice(model.lines).cursor
+        assert ring.since(cursor, "stdout") == [
+            line for line in kept if line.cursor >= cursor and line.stream == "stdout"
+        ]
+
+
+def test_line_cursors_chain():
+    ring = OutputRing()
+    ring.append("stdout", [b"one", b"two"])
+    ring.append("stderr", b"three")
+
+    first, second, third = ring.tail(3)
+    assert (first.next, second.next) == (second.cursor, third.cursor)
+    assert third.next == ring.cursor
+    assert [line.text() for line in ring.since(second.cursor)] == ["two", "three"]
+
+
+def test_batch_larger_than_the_ring():
+    ring = OutputRing(max_bytes=10, max_lines=100)
+    ring.append("stdout", [b"old"])
+    ring.append("stdout", [b"aaaaaaaaaaaaaaa", b"bbb", b"cc"])
+
+    assert [line.line for line in ring.tail(10)] == [b"bbb", b"cc"]
+
+
+def test_follow_gives_kept_then_new_lines():
+    async def scenario():
+        ring = OutputRing()
+        ring.append("stdout", [b"before"])
+
+        seen = []
+
+        async def follower():
+            async for line in ring.follow():
+                seen.append(line.text())
+
+        following = asyncio.create_task(follower())
+        await asyncio.sleep(0)
+        assert seen == ["before"]
+
+        ring.append("stderr", [b"during"])
+        await asyncio.sleep(0)
+        ring.append("stdout", [b"last"])
+        ring.close()
+
+        await asyncio.wait_for(following, 1.0)
+        assert seen == ["before", "during", "last"]
+
+    asyncio.run(scenario())
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        OutputRing(max_bytes=0)
@@ -0,0 +1,124 @@
+"""
+Scheduling rules tests
+======================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from igniiite.rules import CronRule, IntervalRule, LaterPeriodRule
+
+
+def brute_force(now, minutes, hours, days, months, weekdays):
+    # Next matching minute, checking each minute in turn. Weekdays: 0 is monday
+    then = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    while True:
+        if (
+            then.minute in minutes
+            and then.hour in hours
+            and then.day in days
+            and then.month in months
+            and then.weekday() in weekdays
+        ):
+            return then
+        then += timedelta(minutes=1)
+
+
+##################################
+
+
+@pytest.mark.parametrize(
+    "expression, sets",
+    [
+        ("*/15 * * * *", ({0, 15, 30, 45}, range(24), range(1, 32), range(1, 13), range(7))),
+        ("5 4 * * *", ({5}, {4}, range(1, 32), range(1, 13), range(7))),
+        ("0 22 * * 1-5", ({0}, {22}, range(1, 32), range(1, 13), range(5))),
+        ("23 0-20/2 * * *", ({23}, range(0, 21, 2), range(1, 32), range(1, 13), range(7))),
+        ("0 0,12 1 */2 *", ({0}, {0, 12}, {1}, range(1, 13, 2), range(7))),
+        ("0 4 8-14 * *", ({0}, {4}, range(8, 15), range(1, 13), range(7))),
+        ("0 0 * * sat,sun", ({0}, {0}, range(1, 32), range(1, 13), {5, 6})),
+        ("0 0 * * 7", ({0}, {0}, range(1, 32), range(1, 13), {6})),
+        ("@hourly", ({0}, range(24), range(1, 32), range(1, 13), range(7))),
+    ],
+)
+def test_cron_matches_brute_force(expression, sets):
+    rule = CronRule(expression)
+    now = datetime(2026, 12, 30, 21, 7, 42)
+
+    for _ in range(20):
+        expected = brute_force(now, *sets)
+        assert rule.next_after(now) == expected
+        now = expected
+
+
+def test_cron_day_fields_match_either():
+    # The 13th, or any friday
+    rule = CronRule("0 0 13 * fri")
+    now = datetime(2026, 10, 1)
+    runs = []
+    for _ in range(4):
+        now = rule(now)
+        runs.append(now)
+
+    assert runs == [
+        datetime(2026, 10, 2),
+        datetime(2026, 10, 9),
+        datetime(2026, 10, 13),
+        datetime(2026, 10, 16),
+    ]
+
+
+def test_cron_nth_week_day():
+    rule = CronRule("30 9 * * mon#1")
+    assert rule(datetime(2026, 10, 17)) == datetime(2026, 11, 2, 9, 30)
+    assert rule(datetime(2026, 11, 2, 9, 30)) == datetime(2026, 12, 7, 9, 30)
+
+
+def test_cron_skips_months_without_the_day():
+    assert CronRule("0 0 31 * *")(datetime(2026, 4, 1)) == datetime(2026, 5, 31)
+    assert CronRule("0 0 29 2 *")(datetime(2026, 3, 1)) == datetime(2028, 2, 29)
+
+
+def test_cron_runs_are_strictly_after():
+    rule = CronRule("0 12 * * *")
+    assert rule(datetime(2026, 10, 17, 12, 0)) == datetime(2026, 10, 18, 12, 0)
+    assert rule(datetime(2026, 10, 17, 11, 59, 59)) == datetime(2026, 10, 17, 12, 0)
+
+
+def test_cron_never_matching_rule():
+    with pytest.raises(ValueError, match="never matches"):
+        CronRule("0 0 30 2 *")(datetime(2026, 1, 1))
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["* * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *", "5-1 * * * *", "* * * * mon#6", "x * * * *"],
+)
+def test_cron_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronRule(expression)
+
+
+def test_interval_rule_does_not_drift():
+    anchor = datetime(2026, 10, 17, 0, 0, 0)
+    rule = IntervalRule(timedelta(minutes=10), anchor)
+
+    # Late evaluations still land on the anchor grid
+    assert rule(datetime(2026, 10, 17, 0, 10, 3)) == datetime(2026, 10, 17, 0, 20)
+    assert rule(datetime(2026, 10, 17, 0, 20)) == datetime(2026, 10, 17, 0, 30)
+
+    with pytest.raises(ValueError):
+        IntervalRule(0)
+
+
+def test_later_period_rule():
+    rule = CronRule("*/5 * * * *")
+
+    assert LaterPeriodRule(rule, "hour")(datetime(2026, 10, 17, 8, 12)) == datetime(2026, 10, 17, 9, 0)
+    assert LaterPeriodRule(rule, "day")(datetime(2026, 10, 17, 8, 12)) == datetime(2026, 10, 18, 0, 0)
+    assert LaterPeriodRule(rule, "week")(datetime(2026, 10, 17, 8, 12)) == datetime(2026, 10, 19, 0, 0)
+    assert LaterPeriodRule(rule, "month")(datetime(2026, 12, 17, 8, 12)) == datetime(2027, 1, 1, 0, 0)
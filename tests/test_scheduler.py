@@ -0,0 +1,248 @@
+"""
+Scheduler tests
+===============
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import asyncio
+import calendar
+import logging
+import dataclasses
+
+from datetime import timedelta
+
+import pytest
+
+from igniiite.task import Task
+from igniiite.executor import JobExecutor
+from igniiite.activation import ListenSocket
+from igniiite import scheduler as scheduling
+from igniiite.scheduler import Scheduler
+
+
+@dataclasses.dataclass(eq=False)
+class Job:
+    """Stand-in task recording its runs. Copies share the record"""
+
+    name: str
+    duration: float = 0.0
+    runs: list = dataclasses.field(default_factory=list)
+
+    log = logging.getLogger("job")
+
+    async def run(self):
+        self.runs.append(self.name)
+        await asyncio.sleep(self.duration)
+
+
+def every(seconds, first=None):
+    # Fixed period rule, the first run being offset from the add time if given
+    offsets = [] if first is None else [first]
+
+    def next_run(after):
+        offset = offsets.pop() if offsets else seconds
+        return after + timedelta(seconds=offset)
+
+    return next_run
+
+
+def with_scheduler(scenario):
+    async def run():
+        scheduler = Scheduler(executor=JobExecutor())
+        runner = scheduler.start()
+        try:
+            await scenario(scheduler)
+        finally:
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+    asyncio.run(run())
+
+
+##################################
+
+
+def test_earliest_schedule_fires_first():
+    async def scenario(scheduler):
+        fast, slow = Job("fast"), Job("slow")
+        runs = []
+        fast.runs = slow.runs = runs
+
+        scheduler.add(slow, every(0.25))
+        scheduler.add(fast, every(0.1))
+        assert [what.name for _, what in scheduler.next_runs(4)] == ["fast", "fast", "slow", "fast"]
+
+        await asyncio.sleep(0.35)
+        assert runs[:3] == ["fast", "fast", "slow"]
+
+    with_scheduler(scenario)
+
+
+def test_added_schedules_wake_the_scheduler_up():
+    async def scenario(scheduler):
+        scheduler.add(Job("later"), every(3600))
+        await asyncio.sleep(0.05)
+
+        # The scheduler sleeps until the first run, unless woken up
+        soon = Job("soon")
+        scheduler.add(soon, every(0.05))
+        await asyncio.sleep(0.2)
+
+        assert soon.runs
+
+    with_scheduler(scenario)
+
+
+def test_removed_schedules_stop_firing():
+    async def scenario(scheduler):
+        jobs = [Job(f"job{index}") for index in range(100)]
+        schedules = [scheduler.add(job, every(0.05)) for job in jobs]
+        assert len(scheduler) == 100
+
+        await asyncio.sleep(0.2)
+        assert all(job.runs for job in jobs)
+
+        for schedule in schedules[1:]:
+            scheduler.remove(schedule)
+
+        counts = [len(job.runs) for job in jobs]
+        await asyncio.sleep(0.2)
+
+        assert len(jobs[0].runs) > counts[0]
+        assert [len(job.runs) for job in jobs[1:]] == counts[1:]
+
+        # Removed entries do not pile up in the heap
+        assert len(scheduler) == 1
+        assert len(scheduler.heap) <= 2 * len(scheduler) + 16
+
+    with_scheduler(scenario)
+
+
+@pytest.mark.parametrize(
+    "missed, actions",
+    [
+        ("catch-up", ["run", "queued", "queued", "queued"]),
+        ("coalesce", ["dropped", "dropped", "dropped", "run"]),
+        ("drop", ["dropped", "dropped", "dropped", "dropped"]),
+    ],
+)
+def test_missed_policies(missed, actions):
+    async def scenario(scheduler):
+        job = Job("late")
+
+        # First run one second ago: four runs missed by more than the grace time
+        schedule = scheduler.add(
+            job, every(0.3, first=-1.0), missed=missed, grace=0.05, overlap="concurrent"
+        )
+        await asyncio.sleep(0.1)
+
+        assert [firing.action for firing in schedule.history] == actions
+        assert len(job.runs) == len(actions) - actions.count("dropped")
+
+        # Missed runs are late by up to a second
+        _, maximum = schedule.lateness()
+        assert 0.9 < maximum < 1.5
+
+    with_scheduler(scenario)
+
+
+@pytest.mark.parametrize("overlap", ["skip", "queue", "concurrent"])
+def test_overlap_policies(overlap):
+    async def scenario(scheduler):
+        job = Job("slow", duration=0.25)
+        schedule = scheduler.add(job, every(0.1), overlap=overlap)
+        await asyncio.sleep(0.45)
+
+        actions = [firing.action for firing in schedule.history]
+        assert actions[:2] == ["run", {"skip": "skipped", "queue": "queued"}.get(overlap, overlap)]
+
+        if overlap == "skip":
+            assert len(job.runs) == actions.count("run")
+        elif overlap == "queue":
+            # Queued runs start back to back, not all at once
+            assert len(job.runs) < len(actions)
+        else:
+            assert len(job.runs) == len(actions)
+            # Each concurrent run has its own copy of the task
+            assert set(job.runs[:3]) == {"slow", "slow#1", "slow#2"}
+
+    with_scheduler(scenario)
+
+
+def test_caught_up_runs_follow_each_other():
+    async def scenario(scheduler):
+        job = Job("late", duration=0.05)
+
+        # Not skipped as overlapping the first caught up run
+        schedule = scheduler.add(job, every(0.3, first=-1.0), missed="catch-up", grace=0.05)
+        await asyncio.sleep(0.4)
+
+        actions = [firing.action for firing in schedule.history]
+        assert actions[:4] == ["run", "queued", "queued", "queued"]
+        assert len(job.runs) >= 4
+
+    with_scheduler(scenario)
+
+
+def test_removed_queued_runs_are_forgotten():
+    async def scenario(scheduler):
+        job = Job("slow", duration=0.2)
+        schedule = scheduler.add(job, every(0.05), overlap="queue")
+        await asyncio.sleep(0.15)
+        assert schedule.queued
+
+        scheduler.remove(schedule)
+        await asyncio.sleep(0.3)
+
+        assert not schedule.running
+        assert len(job.runs) == 1
+
+    with_scheduler(scenario)
+
+
+def test_invalid_policies():
+    with pytest.raises(ValueError):
+        Scheduler().add(Job("job"), every(1.0), overlap="replace")
+
+    with pytest.raises(ValueError):
+        Scheduler().add(Job("job"), every(1.0), missed="ignore")
+
+    # Copies of the task can't share its sockets
+    server = Task(name="server", command=["true"], sockets=[ListenSocket(port=0)])
+    with pytest.raises(ValueError, match="sockets"):
+        Scheduler().add(server, every(1.0), overlap="concurrent")
+
+
+@pytest.mark.parametrize(
+    "helper, args",
+    [
+        (scheduling.monthly, (1, calendar.FRIDAY)),
+        (scheduling.weekly, (calendar.FRIDAY,)),
+        (scheduling.daily, (3,)),
+        (scheduling.hourly, (30,)),
+    ],
+)
+def test_helpers_forward_policies(monkeypatch, helper, args):
+    forwarded = {}
+
+    async def run_scheduled(what, next_run, **kwargs):
+        forwarded.update(kwargs)
+
+    monkeypatch.setattr(scheduling, "run_scheduled", run_scheduled)
+    asyncio.run(
+        helper(
+            Job("job"), *args, overlap="queue", missed="catch-up", grace=5.0, priority=3, group="jobs"
+        )
+    )
+
+    assert forwarded.pop("label")
+    assert forwarded == {
+        "run_at_start": False,
+        "overlap": "queue",
+        "missed": "catch-up",
+        "grace": 5.0,
+        "priority": 3,
+        "group": "jobs",
+    }
@@ -0,0 +1,160 @@
+"""
+Service files tests
+===================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import asyncio
+
+import pytest
+
+pytest.importorskip("yaml")
+
+from igniiite.services import Services, SpecCache, load_specs
+
+
+SERVICES = """
+tasks:
+  database:
+    command: [sleep, "3600"]
+    stop_signal: TERM
+
+  web:
+    command: sleep 3600
+    dependencies: [database]
+    stop_signal: TERM
+
+  worker:
+    command: [sleep, "3600"]
+    dependencies: [database]
+    stop_signal: TERM
+"""
+
+
+def write(tmp_path, text):
+    path = tmp_path / "services.yaml"
+    path.write_text(text)
+    return path
+
+
+##################################
+
+
+def test_reload_diff(tmp_path):
+    path = write(tmp_path, SERVICES)
+    services = Services(path, cache_dir=False)
+
+    assert services.load() == {"database", "web", "worker"}
+    before = dict(services.tasks)
+
+    # web changed, worker removed, cache added
+    write(
+        tmp_path,
+        """
+tasks:
+  database:
+    command: [sleep, "3600"]
+    stop_signal: TERM
+
+  web:
+    command: sleep 7200
+    dependencies: [database]
+    stop_signal: TERM
+
+  cache:
+    command: [sleep, "3600"]
+""",
+    )
+
+    assert asyncio.run(services.reload()) == {"web", "worker", "cache"}
+
+    # Unchanged tasks are kept, changed ones are new objects
+    assert services.tasks["database"] is before["database"]
+    assert services.tasks["web"] is not before["web"]
+    assert services.tasks["web"].command == ["sleep", "7200"]
+    assert services.tasks["web"].dependencies == {services.tasks["database"]}
+    assert "worker" not in services.tasks
+    assert {tt.name for tt in services.graph.tasks} == {"database", "web", "cache"}
+
+
+def test_changed_dependency_relinks_unchanged_dependents(tmp_path):
+    path = write(tmp_path, SERVICES)
+    services = Services(path, cache_dir=False)
+    services.load()
+    web = services.tasks["web"]
+
+    write(tmp_path, SERVICES.replace("command: [sleep, \"3600\"]", "command: [sleep, \"60\"]", 1))
+    assert asyncio.run(services.reload()) == {"database"}
+
+    assert services.tasks["web"] is web
+    assert web.dependencies == {services.tasks["database"]}
+
+
+def test_invalid_reload_changes_nothing(tmp_path):
+    path = write(tmp_path, SERVICES)
+    services = Services(path, cache_dir=False)
+    services.load()
+    specs, tasks = services.specs, services.tasks
+
+    for text in (
+        SERVICES.replace("dependencies: [database]", "dependencies: [missing]", 1),
+        SERVICES.replace("stop_signal: TERM", "stop_signal: NOPE", 1),
+        SERVICES + "  broken: [",
+    ):
+        write(tmp_path, text)
+        with pytest.raises(ValueError):
+            asyncio.run(services.reload())
+
+        assert services.specs is specs and services.tasks is tasks
+
+
+def test_compiled_files_are_cached(tmp_path):
+    path = write(tmp_path, SERVICES)
+    cache_dir = tmp_path / "cache"
+
+    specs = load_specs(path, cache_dir)
+    [entry] = os.listdir(cache_dir)
+    assert entry == SpecCache(cache_dir).key(path.read_bytes())
+
+    # Entries are used as is: a hand made entry shows it
+    cache = SpecCache(cache_dir)
+    cache.put(entry, {"cached": specs["database"]})
+    assert list(load_specs(path, cache_dir)) == ["cached"]
+
+    # Corrupted entries are compiled again
+    (cache_dir / entry).write_bytes(b"garbage")
+    assert load_specs(path, cache_dir) == specs
+
+
+def test_reload_restarts_changed_tasks_only(tmp_path):
+    path = write(tmp_path, SERVICES)
+
+    async def scenario():
+        services = Services(path, cache_dir=False)
+        services.load()
+        runner = asyncio.create_task(services.run())
+
+        tasks = services.tasks
+        await asyncio.wait_for(
+            asyncio.gather(*(tt.ready.wait() for tt in tasks.values())), 5.0
+        )
+        pids = {name: tt.process.pid for name, tt in tasks.items()}
+
+        write(tmp_path, SERVICES.replace("command: sleep 3600", "command: sleep 7200"))
+        assert await services.reload() == {"web"}
+
+        web = services.tasks["web"]
+        await asyncio.wait_for(web.ready.wait(), 5.0)
+
+        assert services.tasks["database"].process.pid == pids["database"]
+        assert services.tasks["worker"].process.pid == pids["worker"]
+        assert web.process.pid != pids["web"]
+        assert tasks["web"].ended.is_set()
+
+        await services.supervisor.shutdown()
+        await asyncio.wait_for(runner, 5.0)
+
+    asyncio.run(scenario())
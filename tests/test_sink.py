@@ -0,0 +1,122 @@
+"""
+Task output sink tests
+======================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import os
+import json
+import asyncio
+
+import pytest
+
+from igniiite.task import Task
+from igniiite.sink import OutputSink, task_filename
+
+
+##################################
+
+
+def test_task_outputs_go_to_per_task_files(tmp_path):
+    sink = OutputSink(tmp_path / "logs")
+    try:
+        task = Task(
+            name="web",
+            command=["sh", "-c", "echo a; echo b >&2"],
+            output_sink=sink,
+            log_output="none",
+        )
+        asyncio.run(asyncio.wait_for(task.run(), 5.0))
+        sink.flush()
+    finally:
+        sink.close()
+
+    # Records are "<timestamp> <stream>: <line>"
+    lines = (tmp_path / "logs" / "web.log").read_text().splitlines()
+    assert sorted(line.split(" ", 1)[1] for line in lines) == ["stderr: b", "stdout: a"]
+
+
+def test_combined_json_records(tmp_path):
+    sink = OutputSink(tmp_path / "all.log", per_task=False, format="json")
+    try:
+        sink.write("web", "stderr", [b"a", b"b"])
+        sink.write("db", "stdout", b"c\nd")
+        sink.flush()
+    finally:
+        sink.close()
+
+    records = [json.loads(line) for line in (tmp_path / "all.log").read_text().splitlines()]
+    assert [(record["task"], record["stream"], record["line"]) for record in records] == [
+        ("web", "stderr", "a"),
+        ("web", "stderr", "b"),
+        ("db", "stdout", "c"),
+        ("db", "stdout", "d"),
+    ]
+
+    # Lines of a same batch share a timestamp
+    assert records[0]["ts"] == records[1]["ts"]
+
+
+def test_files_rotate_by_size(tmp_path):
+    sink = OutputSink(tmp_path, max_bytes=100, backups=2)
+    try:
+        for index in range(10):
+            sink.write("web", "stdout", [b"%d" % index + b"x" * 40])
+            sink.flush()
+    finally:
+        sink.close()
+
+    # About 75 bytes per record: two records per file, the oldest are gone
+    assert sorted(os.listdir(tmp_path)) == ["web.log", "web.log.1", "web.log.2"]
+    assert (tmp_path / "web.log").read_text().count("\n") == 2
+    assert " stdout: 9x" in (tmp_path / "web.log").read_text()
+    assert " stdout: 4x" in (tmp_path / "web.log.2").read_text()
+
+
+def test_task_filename_escapes_separators():
+    assert task_filename("web") == "web.log"
+    assert task_filename("jobs/backup") == "jobs%2Fbackup.log"
+    assert task_filename("a/../b") == "a%2F..%2Fb.log"
+    assert task_filename("nul\0name") == "nul%00name.log"
+
+
+def test_task_filenames_do_not_collide():
+    names = ["a/b", "a_b", "a%2Fb", "a%252Fb", "a%b", "a\0b", "a%00b"]
+
+    assert len({task_filename(name) for name in names}) == len(names)
+
+
+@pytest.mark.parametrize("name", ["", ".", "..", "../etc/passwd", ".hidden"])
+def test_task_filename_rejects_dot_names(name):
+    with pytest.raises(ValueError):
+        task_filename(name)
+
+
+def test_files_stay_in_the_sink_directory(tmp_path):
+    sink = OutputSink(tmp_path / "logs")
+    try:
+        sink.write("jobs/backup", "stdout", [b"saved"])
+        sink.write("../escaped", "stdout", [b"lost"])
+        sink.flush()
+    finally:
+        sink.close()
+
+    assert os.listdir(tmp_path) == ["logs"]
+    assert os.listdir(tmp_path / "logs") == ["jobs%2Fbackup.log"]
+    assert (tmp_path / "logs" / "jobs%2Fbackup.log").read_text().endswith("stdout: saved\n")
+
+
+def test_tasks_with_unusable_names_are_rejected(tmp_path):
+    sink = OutputSink(tmp_path)
+    try:
+        with pytest.raises(ValueError):
+            Task(name="../escaped", command=["true"], output_sink=sink)
+
+        # Any name goes in a combined file
+        combined = OutputSink(tmp_path / "all.log", per_task=False)
+        Task(name="../escaped", command=["true"], output_sink=combined)
+        combined.close()
+    finally:
+        sink.close()
@@ -0,0 +1,250 @@
+"""
+Task tests
+==========
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import time
+import signal
+import logging
+import asyncio
+
+import pytest
+
+from igniiite.task import Task
+
+
+def is_alive(pid):
+    # Zombies waiting to be reaped by init are dead
+    try:
+        with open(f"/proc/{pid}/stat") as fhandle:
+            return fhandle.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+##################################
+
+
+def test_stop_does_not_wait_for_inherited_outputs():
+    async def scenario():
+        # The grandchild keeps stdout open, and the leader ignores the stop signal
+        task = Task(
+            name="leader",
+            command=["sh", "-c", "sleep 60 & echo $!; trap '' TERM; while :; do sleep 0.1; done"],
+            log_output="none",
+            stop_signal=signal.SIGTERM,
+            stop_timeout=1.0,
+            kill_timeout=1.0,
+        )
+        lines = await task.stdout_listeners.register()
+
+        runner = asyncio.create_task(task.run())
+        grandchild = int(await asyncio.wait_for(lines.get(), 5.0))
+
+        start = time.monotonic()
+        await task.stop()
+        await asyncio.wait_for(runner, 5.0)
+
+        assert time.monotonic() - start < 3.0
+        assert task.ended.is_set()
+        assert not is_alive(grandchild)
+
+    asyncio.run(scenario())
+
+
+def test_exit_does_not_wait_for_leftover_processes():
+    async def scenario():
+        task = Task(
+            name="daemonizing",
+            command=["sh", "-c", "sleep 60 & exit 3"],
+            log_output="none",
+        )
+
+        start = time.monotonic()
+        await asyncio.wait_for(task.run(), 5.0)
+
+        assert time.monotonic() - start < 3.0
+        assert task.process.returncode == 3
+
+    asyncio.run(scenario())
+
+
+def test_dependents_wake_on_flags_set_directly():
+    async def scenario():
+        database = Task(name="database", command=["true"])
+        web = Task(name="web", command=["true"], dependencies={database}, log_output="none")
+
+        runner = asyncio.create_task(web.run())
+        await asyncio.sleep(0.1)
+        assert "spawn" not in web.timestamps
+
+        database.ready.set()
+        await asyncio.wait_for(runner, 5.0)
+        assert web.process.returncode == 0
+
+    asyncio.run(scenario())
+
+
+def test_dependents_fail_on_failed_flag_set_directly():
+    async def scenario():
+        database = Task(name="database", command=["true"])
+        web = Task(name="web", command=["true"], dependencies={database}, log_output="none")
+
+        runner = asyncio.create_task(web.run())
+        await asyncio.sleep(0.1)
+
+        database.failed.set()
+        with pytest.raises(RuntimeError, match="database"):
+            await asyncio.wait_for(runner, 5.0)
+
+        assert web.process is None
+
+    asyncio.run(scenario())
+
+
+async def collect(task, raw=False):
+    # Run the task, then return what a listener of its standard output got
+    lines = await task.stdout_listeners.register(raw=raw)
+    await asyncio.wait_for(task.run(), 5.0)
+
+    items = []
+    while not lines.empty():
+        items.append(lines.get_nowait())
+    return items
+
+
+def test_lines_are_rebuilt_across_reads():
+    task = Task(
+        name="chunked",
+        command=["sh", "-c", "printf ab; sleep 0.05; printf 'c\\nde'; sleep 0.05; printf 'f\\ng'"],
+        chunk_size=2,
+        log_output="none",
+    )
+
+    assert asyncio.run(collect(task)) == ["abc", "def", "g"]
+
+
+def test_long_lines_are_split():
+    task = Task(
+        name="long",
+        command=["printf", "x" * 20],
+        chunk_size=4,
+        max_line_size=8,
+        log_output="none",
+    )
+
+    assert asyncio.run(collect(task)) == ["x" * 8, "x" * 8, "x" * 4]
+
+
+def test_raw_listeners_get_batches():
+    task = Task(name="raw", command=["printf", "a\\nb\\nc\\n"], log_output="none")
+
+    batches = asyncio.run(collect(task, raw=True))
+    assert [line for batch in batches for line in batch] == [b"a", b"b", b"c"]
+
+
+@pytest.mark.parametrize("log_output, records", [("lines", ["a", "b", "c"]), ("batch", ["a\nb\nc"])])
+def test_output_logging(caplog, log_output, records):
+    task = Task(name="logged", command=["printf", "a\\nb\\nc\\n"], log_output=log_output)
+
+    with caplog.at_level(logging.INFO, logger="logged"):
+        asyncio.run(asyncio.wait_for(task.run(), 5.0))
+
+    # Leave the task state records out
+    output = [
+        record.getMessage()
+        for record in caplog.records
+        if not record.getMessage().startswith(("Start process", "Process "))
+    ]
+    assert output == records
+
+
+def restarting(command, **kwargs):
+    kwargs.setdefault("restart_delay", 0.01)
+    return Task(name="restarting", command=["sh", "-c", command], log_output="none", **kwargs)
+
+
+@pytest.mark.parametrize(
+    "policy, command, restarts",
+    [
+        ("never", "exit 1", 0),
+        ("on-failure", "exit 0", 0),
+        ("on-failure", "exit 1", 3),
+        ("always", "exit 0", 3),
+    ],
+)
+def test_restart_policies(policy, command, restarts):
+    async def scenario():
+        task = restarting(command, restart_policy=policy, restart_burst=3)
+        states = []
+        task.watch(lambda task, state: states.append(state))
+
+        await asyncio.wait_for(task.run(), 5.0)
+
+        assert task.restarts == restarts
+        assert task.crash_looping == (restarts > 0)
+        assert task.failed.is_set() == (command == "exit 1" or restarts > 0)
+        assert states.count("restarting") == restarts
+        assert ("crash-loop" in states) == (restarts > 0)
+        assert states[-1] == "ended"
+
+    asyncio.run(scenario())
+
+
+def test_restart_backoff_grows_up_to_the_maximum():
+    async def scenario(max_delay):
+        task = restarting(
+            "exit 1",
+            restart_policy="always",
+            restart_burst=4,
+            restart_delay=0.1,
+            restart_max_delay=max_delay,
+        )
+
+        start = time.monotonic()
+        await asyncio.wait_for(task.run(), 10.0)
+        return time.monotonic() - start
+
+    # Delays are drawn in [delay / 2, delay] for 0.1, 0.2, 0.4 and 0.8s
+    assert 0.75 <= asyncio.run(scenario(30.0)) < 2.5
+    assert asyncio.run(scenario(0.1)) < 0.75
+
+
+def test_restarts_out_of_the_window_are_forgotten():
+    async def scenario():
+        task = restarting(
+            "sleep 0.05; exit 1", restart_policy="on-failure", restart_burst=1, restart_window=0.02
+        )
+
+        runner = asyncio.create_task(task.run())
+        await asyncio.sleep(0.5)
+
+        assert task.restarts > 1
+        assert not task.crash_looping
+
+        await task.stop()
+        await asyncio.wait_for(runner, 5.0)
+        assert task.ended.is_set()
+
+    asyncio.run(scenario())
+
+
+def test_stop_during_the_backoff():
+    async def scenario():
+        task = restarting("exit 1", restart_policy="always", restart_delay=60.0)
+        runner = asyncio.create_task(task.run())
+
+        while not task.restarts:
+            await asyncio.sleep(0.01)
+
+        start = time.monotonic()
+        await task.stop()
+        await asyncio.wait_for(runner, 5.0)
+
+        assert time.monotonic() - start < 1.0
+        assert task.restarts == 1 and task.ended.is_set()
+
+    asyncio.run(scenario())
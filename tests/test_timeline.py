@@ -0,0 +1,145 @@
+"""
+Startup timeline tests
+======================
+
+- Florian Dupeyron &lt;florian.dupeyron@mugcat.fr&gt;
+- October 2026
+"""
+
+import json
+import signal
+import asyncio
+
+import pytest
+
+from igniiite import timeline
+from igniiite.task import Task
+from igniiite.graph import Supervisor
+from igniiite.timeline import TaskTimes
+
+
+def times(**tasks):
+    # name -> (dependencies, spawn time, ready time)
+    return {
+        name: TaskTimes(
+            name,
+            dependencies,
+            {
+                "start": 100.0,
+                "dependencies": 100.0,
+                "spawn": 100.0 + spawn,
+                "spawned": 100.0 + spawn,
+                "ready": 100.0 + ready,
+            },
+        )
+        for name, (dependencies, spawn, ready) in tasks.items()
+    }
+
+
+# database and cache start together, web waits for both, cache is slower
+GRAPH = times(
+    database=((), 0.0, 1.0),
+    cache=((), 0.0, 2.5),
+    web=(("cache", "database"), 2.5, 3.0),
+    worker=(("database",), 1.0, 1.2),
+)
+
+
+##################################
+
+
+def test_blame():
+    assert timeline.blame(GRAPH) == [
+        ("cache", 2.5),
+        ("database", 1.0),
+        ("web", 0.5),
+        ("worker", pytest.approx(0.2)),
+    ]
+
+
+def test_critical_chain():
+    assert timeline.critical_chain(GRAPH) == [("cache", 2.5, 2.5), ("web", 3.0, 0.5)]
+    assert timeline.critical_chain(GRAPH, "worker") == [
+        ("database", 1.0, 1.0),
+        ("worker", pytest.approx(1.2), pytest.approx(0.2)),
+    ]
+    assert timeline.critical_chain(GRAPH, "missing") == []
+
+    text = timeline.format_critical_chain(timeline.critical_chain(GRAPH))
+    assert text.splitlines() == ["web @3.000s +0.500s", "  └─cache @2.500s +2.500s"]
+
+
+def test_spans_of_a_task_going_on():
+    running = TaskTimes(
+        "running", (), {"start": 1.0, "dependencies": 1.25, "spawn": 1.5, "spawned": 1.75}
+    )
+    done = [("pre_hook", 1.0, 1.25), ("dependencies", 1.25, 1.5), ("spawn", 1.5, 1.75)]
+
+    # Without an end, spans going on are left out
+    assert timeline.spans(running) == done
+    assert timeline.spans(running, now=2.0) == done + [("startup", 1.75, 2.0)]
+
+
+def test_exports():
+    trace = json.loads(timeline.dump_chrome_trace(GRAPH))
+    complete = {
+        (event["args"]["task"], event["name"]): event
+        for event in trace["traceEvents"]
+        if event["ph"] == "X"
+    }
+
+    assert complete["web", "dependencies"]["ts"] == 0
+    assert complete["web", "dependencies"]["dur"] == 2_500_000
+    assert complete["cache", "startup"]["dur"] == 2_500_000
+
+    named = {
+        event["args"]["name"] for event in trace["traceEvents"] if event["name"] == "thread_name"
+    }
+    assert named == set(GRAPH)
+
+    svg = timeline.svg_timeline({**GRAPH, "<odd>": TaskTimes("<odd>", (), {"start": 100.0})})
+    assert svg.startswith("<svg") and svg.rstrip().endswith("</svg>")
+    assert "Total: 3.000s" in svg
+    assert "&lt;odd&gt;" in svg and "<odd>" not in svg
+
+
+def test_recorded_phases_of_a_graph():
+    async def scenario():
+        base = Task(
+            name="base", command=["sleep", "60"], log_output="none", stop_signal=signal.SIGTERM
+        )
+        web = Task(
+            name="web",
+            command=["sh", "-c", "echo hello; sleep 60"],
+            dependencies={base},
+            log_output="none",
+            stop_signal=signal.SIGTERM,
+        )
+        supervisor = Supervisor([base, web])
+
+        runner = asyncio.create_task(supervisor.run())
+        await asyncio.wait_for(web.ready.wait(), 5.0)
+        await asyncio.sleep(0.1)
+        await supervisor.shutdown()
+        await asyncio.wait_for(runner, 5.0)
+
+        return timeline.task_times([base, web])
+
+    recorded = asyncio.run(scenario())
+    assert recorded["web"].dependencies == ("base",)
+
+    stamps = recorded["web"].timestamps
+    order = [
+        "start", "dependencies", "spawn", "spawned", "ready", "stop", "exited", "post_hook", "ended"
+    ]
+    assert [stamps[phase] for phase in order] == sorted(stamps[phase] for phase in order)
+    assert "first_output" in stamps
+
+    assert [name for name, _, _ in timeline.critical_chain(recorded)] == ["base", "web"]
+    assert [name for name, _, _ in timeline.spans(recorded["web"])] == [
+        name for name, _, _ in timeline.SPANS
+    ]
+
+    # The JSON form sent by the control server gives the same times
+    entries = [tt._asdict() for tt in recorded.values()]
+    assert timeline.times_from_json(json.loads(json.dumps(entries))) == recorded